@@ -0,0 +1,66 @@
+"""
+Micro-benchmark of the gedcom date parser over every DATE line of the test gedcom files
+
+usage: python benchmarks/bench_date_parser.py [repetitions]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from life_line_chart import GedcomParsing  # noqa: E402
+
+test_dir = os.path.join(os.path.dirname(__file__), '..', 'tests')
+
+
+def get_date_lines():
+    """
+    get all DATE lines of the test gedcom files
+
+    Returns:
+        list: list of (date string, event tag) tuples
+    """
+    date_lines = []
+    for filename in sorted(os.listdir(test_dir)):
+        if not filename.endswith('.ged'):
+            continue
+        parent_tag = None
+        with open(os.path.join(test_dir, filename), 'r', encoding='utf-8-sig') as f:
+            for line in f:
+                level, _, line = line.strip().partition(' ')
+                tag_name, _, tag_data = line.partition(' ')
+                if level == '1':
+                    parent_tag = tag_name
+                elif level == '2' and tag_name == 'DATE':
+                    date_lines.append((tag_data, parent_tag))
+    return date_lines
+
+
+def run(parse_function, date_lines, repetitions):
+    t = time.time()
+    for _ in range(repetitions):
+        for content, tag_name in date_lines:
+            try:
+                parse_function(content, tag_name)
+            except Exception:
+                pass
+    return time.time() - t
+
+
+def main(repetitions=20):
+    date_lines = get_date_lines()
+    print('{} DATE lines ({} unique), {} repetitions'.format(
+        len(date_lines), len(set(date_lines)), repetitions))
+    GedcomParsing._parse_date.cache_clear()
+    for name, parse_function in (
+            ('regular expressions', GedcomParsing._parse_date_expr),
+            ('fast path', GedcomParsing._parse_date.__wrapped__),
+            ('fast path, memoized', GedcomParsing._parse_date)):
+        duration = run(parse_function, date_lines, repetitions)
+        print('{:20s} {:6.3f} s {:6.2f} us/date'.format(
+            name, duration, duration / repetitions / len(date_lines) * 1e6))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,47 @@
+"""
+Benchmark of the descendant range cache: descendant charts with many generations,
+with the cache vs. a cache which never stores a range
+
+usage: python benchmarks/bench_descendant_range.py [generations]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from life_line_chart import DescendantChart  # noqa: E402
+from life_line_chart.GedcomInstanceContainer import get_gedcom_instance_container  # noqa: E402
+from life_line_chart.RangeCache import RangeCache  # noqa: E402
+
+
+class DisabledRangeCache(RangeCache):
+    """
+    Range cache which recalculates every range, like before the cache was used
+    """
+
+    def add_range(self, key, value, read_g_ids, used_keys):
+        pass
+
+
+def main(generations=12):
+    filename = os.path.join(os.path.dirname(__file__), '..', 'tests', 'autogenerated.ged')
+    for chart_layout in ('enclosing', 'cactus'):
+        for cached in (False, True):
+            instances = get_gedcom_instance_container(filename)
+            if not cached:
+                instances.descendant_range_cache = DisabledRangeCache()
+            chart = DescendantChart(instance_container=instances, positioning={'chart_layout': chart_layout})
+            chart.set_chart_configuration({'root_individuals': [
+                {'individual_id': '@I2@', 'generations': generations}]})
+            t = time.time()
+            chart.update_chart()
+            duration = time.time() - t
+            statistics = instances.descendant_range_cache.get_statistics()
+            print('{:9s} {:8s} chart: {:6.2f} s individuals: {} range requests: {} hit rate: {:.2f}'.format(
+                chart_layout, 'cached' if cached else 'uncached', duration, len(chart.gr_individuals),
+                statistics['hits'] + statistics['misses'], statistics['hit_rate']))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
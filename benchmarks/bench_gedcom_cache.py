@@ -0,0 +1,37 @@
+"""
+Benchmark of the gedcom cache: parsing vs. cold start (parse and write cache) vs. warm start (read cache)
+
+usage: python benchmarks/bench_gedcom_cache.py [copies]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from life_line_chart.ReadGedcom import read_data  # noqa: E402
+from life_line_chart.GedcomCache import read_data_cached  # noqa: E402
+from scaled_gedcom import get_scaled_gedcom  # noqa: E402
+
+
+def main(copies=20):
+    filename = get_scaled_gedcom(copies)
+    print('file: {} ({:.1f} MB)'.format(filename, os.path.getsize(filename) / 1e6))
+    t = time.time()
+    read_data(filename)
+    print('parse:      {:6.2f} s'.format(time.time() - t))
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for compact in (False, True):
+            t = time.time()
+            read_data_cached(filename, cache_dir, compact)
+            cold = time.time() - t
+            t = time.time()
+            read_data_cached(filename, cache_dir, compact)
+            warm = time.time() - t
+            print('{:8s} cold start: {:6.2f} s warm start: {:6.2f} s'.format(
+                'compact' if compact else 'dict', cold, warm))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,39 @@
+"""
+Benchmark of the lazy gedcom access: a 10 generation ancestor chart from a large file,
+with all records parsed vs. records parsed on demand from the memory mapped file
+
+usage: python benchmarks/bench_lazy_access.py [copies]
+"""
+
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from life_line_chart import AncestorChart  # noqa: E402
+from life_line_chart.GedcomInstanceContainer import get_gedcom_instance_container  # noqa: E402
+from scaled_gedcom import get_scaled_gedcom  # noqa: E402
+
+
+def main(copies=100):
+    filename = get_scaled_gedcom(copies)
+    print('file: {} ({:.1f} MB)'.format(filename, os.path.getsize(filename) / 1e6))
+    for lazy in (False, True):
+        t = time.time()
+        instances = get_gedcom_instance_container(filename, lazy=lazy)
+        load_duration = time.time() - t
+        t = time.time()
+        chart = AncestorChart(instance_container=instances)
+        chart.set_chart_configuration({'root_individuals': [
+            {'individual_id': '@I1033_0@', 'generations': 10}]})
+        chart.update_chart()
+        chart_duration = time.time() - t
+        print('{:6s} load: {:6.2f} s chart: {:6.2f} s individuals in the chart: {}'.format(
+            'lazy' if lazy else 'full', load_duration, chart_duration, len(chart.gr_individuals)))
+        del instances, chart
+        gc.collect()
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,36 @@
+"""
+Scaling of the parallel gedcom parser. The default of 735 copies of tests/autogenerated.ged contains 1M individuals.
+
+usage: python benchmarks/bench_parallel_parsing.py [copies] [max_workers]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from life_line_chart.ReadGedcom import read_data  # noqa: E402
+from scaled_gedcom import get_scaled_gedcom  # noqa: E402
+
+
+def main(copies=735, max_workers=None):
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    filename = get_scaled_gedcom(copies)
+    print('file: {} ({:.1f} MB)'.format(filename, os.path.getsize(filename) / 1e6))
+    serial_duration = None
+    workers = 1
+    while workers <= max_workers:
+        t = time.time()
+        database_indi, database_fam = read_data(filename, workers=workers)
+        duration = time.time() - t
+        if serial_duration is None:
+            serial_duration = duration
+        print('workers: {:3d} individuals: {:8d} families: {:8d} time: {:7.2f} s speedup: {:5.2f}'.format(
+            workers, len(database_indi), len(database_fam), duration, serial_duration / duration))
+        del database_indi, database_fam
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,40 @@
+"""
+Memory benchmark: nested OrderedDict trees (read_data) vs. compact record store (read_data_compact)
+
+usage: python benchmarks/bench_record_store_memory.py [copies]
+"""
+
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from life_line_chart.ReadGedcom import read_data, read_data_compact  # noqa: E402
+from scaled_gedcom import get_scaled_gedcom  # noqa: E402
+
+
+def measure(read_function, filename):
+    gc.collect()
+    tracemalloc.start()
+    t = time.time()
+    databases = read_function(filename)
+    duration = time.time() - t
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return databases, current, peak, duration
+
+
+def main(copies=20):
+    filename = get_scaled_gedcom(copies)
+    print('file: {} ({:.1f} MB)'.format(filename, os.path.getsize(filename) / 1e6))
+    for name, read_function in (('OrderedDict', read_data), ('compact', read_data_compact)):
+        databases, current, peak, duration = measure(read_function, filename)
+        print('{:12s} individuals: {:8d} families: {:8d} retained: {:8.1f} MB peak: {:8.1f} MB time: {:6.2f} s'.format(
+            name, len(databases[0]), len(databases[1]), current / 1e6, peak / 1e6, duration))
+        del databases
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,50 @@
+"""
+Helper for the benchmarks: scaled up copies of tests/autogenerated.ged
+"""
+
+import os
+import re
+import tempfile
+
+source_filename = os.path.join(
+    os.path.dirname(__file__), '..', 'tests', 'autogenerated.ged')
+_xref_expr = re.compile('@([A-Z]+[0-9]+)@')
+
+
+def write_scaled_gedcom(filename, copies):
+    """
+    write a gedcom file which contains the records of autogenerated.ged several times
+
+    The xrefs of every copy get a suffix, so the copies are independent trees.
+
+    Args:
+        filename (str): target gedcom file
+        copies (int): number of copies
+    """
+    with open(source_filename, 'r', encoding='utf-8-sig') as f:
+        lines = f.read().split('\n')
+    # the records start with the first INDI or FAM and end before the trailer
+    first = next(i for i, line in enumerate(lines) if line.startswith('0 @I') or line.startswith('0 @F'))
+    last = next(i for i in range(len(lines) - 1, -1, -1) if lines[i].startswith('0 TRLR'))
+    records = '\n'.join(lines[first:last]) + '\n'
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines[:first]) + '\n')
+        for copy in range(copies):
+            f.write(_xref_expr.sub('@\\1_' + str(copy) + '@', records))
+        f.write('0 TRLR\n')
+
+
+def get_scaled_gedcom(copies):
+    """
+    get the filename of a scaled gedcom file, which is created in the temp directory if needed
+
+    Args:
+        copies (int): number of copies
+
+    Returns:
+        str: gedcom file
+    """
+    filename = os.path.join(tempfile.gettempdir(), 'life_line_chart_autogenerated_x{}.ged'.format(copies))
+    if not os.path.exists(filename):
+        write_scaled_gedcom(filename, copies)
+    return filename
@@ -1,9 +1,14 @@
 import logging
-from collections import OrderedDict
+from bisect import bisect_left
+from collections import Counter, OrderedDict
 from copy import deepcopy
 from .BaseSVGChart import BaseSVGChart
 from .Exceptions import LifeLineChartCannotMoveIndividual, LifeLineChartCollisionDetected
 from .Translation import get_strings, recursive_merge_dict_members
+from .Traversal import run_iteratively
+from .LayoutSnapshot import get_layout_filename, load_layout, save_layout
+from .LayoutBudget import LayoutBudget
+from .ParallelCompression import compress_branches, is_parallel_compression_available
 
 logger = logging.getLogger("life_line_chart")
 
@@ -30,7 +35,10 @@ class AncestorChart(BaseSVGChart):
         'debug_optimization_compression_steps': -1,  # debugging option
         'debug_optimization_flipping_steps': -1,  # debugging option
         'compress': False,
+        'compression_engine': 'shift',
         'flip_to_optimize': False,
+        'warm_start_compression': False,
+        'compression_processes': 1,
     }
     DEFAULT_POSITIONING.update(BaseSVGChart.DEFAULT_POSITIONING)
 
@@ -55,7 +63,14 @@ class AncestorChart(BaseSVGChart):
         # configuration of this chart
         self._chart_configuration.update(AncestorChart.DEFAULT_CHART_CONFIGURATION)
 
-    def select_individuals(self, individual, generations=None, filter=None, discovery_cache=None):
+        # (g_id of the family, g_id of the parent) -> x_index offsets of the parent and its ancestors
+        # during the compression of the current and of the previous layout
+        self._compression_offsets = {}
+        self._previous_compression_offsets = {}
+        # g_ids of the families whose branch has been compressed in worker processes
+        self._compressed_branch_families = set()
+
+    def select_individuals(self, individual, generations=None, filter=None, discovery_cache=None, frontier=None):
         """
         Select individuals to show. This is done by creating instances of graphical representations.
 
@@ -64,12 +79,24 @@ class AncestorChart(BaseSVGChart):
             generations (int): number of generations to search for ancestors.
             filter (lambda, optional): lambda(BaseIndividual) : return Boolean. Defaults to None.
             discovery_cache (list): list of discovered individuals
+            frontier (list, optional): collects the graphical individuals where the selection stopped
+                due to the generation limit. Defaults to None.
+
+        Returns:
+            GraphicalIndividual: graphical representation of the individual
         """
+        if discovery_cache is None:
+            discovery_cache = []
+        if frontier is None:
+            frontier = []
+        return run_iteratively(self._select_individuals_steps(individual, generations, filter, discovery_cache, frontier))
 
+    def _select_individuals_steps(self, individual, generations, filter, discovery_cache, frontier):
+        """
+        Steps of select_individuals, see run_iteratively.
+        """
         if individual is None or filter and filter(individual):
             return
-        if discovery_cache is None:
-            discovery_cache = []
 
         needs_instance = not individual.has_graphical_representation()
 
@@ -85,6 +112,8 @@ class AncestorChart(BaseSVGChart):
 
         go_deeper = True
         child_of_families = individual.child_of_families[:1]
+        if generations == 0 and child_of_families:
+            frontier.append(gr_individual)
         for child_of_family in child_of_families:
             gr_child_of_family = self._create_family_graphical_representation(
                 child_of_family, not self._positioning['unique_graphical_representation'])
@@ -93,11 +122,12 @@ class AncestorChart(BaseSVGChart):
             if generations > 0 or generations < 0:
                 father, mother = child_of_family.get_husband_and_wife()
                 if father:
-                    gr_father = self.select_individuals(
+                    gr_father = yield self._select_individuals_steps(
                         father,
                         generations - 1 if go_deeper else 0,
-                        filter=filter,
-                        discovery_cache=discovery_cache)
+                        filter,
+                        discovery_cache,
+                        frontier)
 
                     if gr_father and gr_child_of_family.gr_husb is None:
                         gr_child_of_family.gr_husb = gr_father
@@ -105,10 +135,11 @@ class AncestorChart(BaseSVGChart):
             if generations > 0 or generations < 0:
                 father, mother = child_of_family.get_husband_and_wife()
                 if mother:
-                    gr_mother = self.select_individuals(
+                    gr_mother = yield self._select_individuals_steps(
                         mother, generations - 1 if go_deeper else 0,
-                        filter=filter,
-                        discovery_cache=discovery_cache)
+                        filter,
+                        discovery_cache,
+                        frontier)
                     if gr_mother and gr_child_of_family.gr_wife is None:
                         gr_child_of_family.gr_wife = gr_mother
         return gr_individual
@@ -151,14 +182,21 @@ class AncestorChart(BaseSVGChart):
             gr_spouse_family (GraphicalFamily): Spouse family of this individual
             gr_child_of_family (GraphicalFamily): child-of-family of this individual
             x_offset (int): starting position
-            discovery_cache (list): list of discovered individuals
-            root_node_discovery_cache (list): list of discovered individuals
+            discovery_cache (set): g_ids of the individuals and spouse families which have been placed
+            root_node_discovery_cache (set): g_ids of the discovered individuals
         """
         if discovery_cache is None:
-            discovery_cache = []
+            discovery_cache = set()
         if root_node_discovery_cache is None:
-            root_node_discovery_cache = []
+            root_node_discovery_cache = set()
+        run_iteratively(self._place_selected_individuals_steps(
+            gr_individual, gr_spouse_family, gr_child_of_family, x_offset, discovery_cache, root_node_discovery_cache))
 
+    def _place_selected_individuals_steps(self, gr_individual, gr_spouse_family, gr_child_of_family, x_offset, discovery_cache,
+                                          root_node_discovery_cache):
+        """
+        Steps of place_selected_individuals, see run_iteratively.
+        """
         individual = gr_individual.individual
         if gr_child_of_family:
             child_of_family = gr_child_of_family.family
@@ -168,7 +206,8 @@ class AncestorChart(BaseSVGChart):
             spouse_family = gr_spouse_family.family
         else:
             spouse_family = None
-        if (gr_individual, gr_spouse_family) in discovery_cache:
+        gr_spouse_family_g_id = gr_spouse_family.g_id if gr_spouse_family else None
+        if (gr_individual.g_id, gr_spouse_family_g_id) in discovery_cache:
             # if this individual has already been placed in this marriage family
             return
 
@@ -187,7 +226,6 @@ class AncestorChart(BaseSVGChart):
         else:
             siblings = [gr_individual]
 
-        gr_spouse_family_g_id = gr_spouse_family.g_id if gr_spouse_family else None
         gr_child_of_family_g_id = gr_child_of_family.g_id if gr_child_of_family else None
 
         placement_config = self._chart_configuration['ancestor_placement'].get(gr_child_of_family_g_id)
@@ -203,22 +241,24 @@ class AncestorChart(BaseSVGChart):
                 (not gr_individual.visible_marriages or gr_spouse_family == gr_individual.visible_marriages[0])
 
         # go back to root node
-        root_node_discovery_cache += siblings
+        root_node_discovery_cache.update(gr_sibling.g_id for gr_sibling in siblings)
         if gr_spouse_family:
             for gr_child in gr_spouse_family.visible_children:
                 c_vms = gr_child.visible_marriages
                 if not c_vms:
                     c_vms = [None]
                 for c_m in c_vms:
-                    if gr_child not in root_node_discovery_cache:
+                    if gr_child.g_id not in root_node_discovery_cache:
                         if gr_child.get_position_dict() is None:
-                            self.place_selected_individuals(
+                            yield self._place_selected_individuals_steps(
                                 gr_child, c_m, gr_spouse_family,
                                 x_position, discovery_cache, root_node_discovery_cache)
 
-        if (gr_individual, spouse_family) in discovery_cache:
+        if spouse_family is None and (gr_individual.g_id, None) in discovery_cache:
             # when this node was handled by the place_selected_individuals call in a root node
             # then we should return here
+            # (the former list based check compared the spouse family with its graphical
+            # representation, so it only matched if there is no spouse family)
             return
 
         # +----------------------------------------------
@@ -249,7 +289,7 @@ class AncestorChart(BaseSVGChart):
                             gr_parent_family = None
 
                         gr_individual.ancestor_chart_parent_family_placement = gr_local_child_of_family, gr_spouse_family
-                        self.place_selected_individuals(
+                        yield self._place_selected_individuals_steps(
                             gr_parent, gr_local_child_of_family, gr_parent_family,
                             x_position, discovery_cache, root_node_discovery_cache)
                         width = gr_parent.get_ancestor_width(
@@ -263,7 +303,7 @@ class AncestorChart(BaseSVGChart):
             return x_position
 
         # add the father branch
-        x_position = add_parent('husb', x_position)
+        x_position = yield from add_parent('husb', x_position)
 
         # add the main individual and its visible siblings
         for gr_sibling in siblings:
@@ -304,7 +344,7 @@ class AncestorChart(BaseSVGChart):
                 gr_individual.ancestor_chart_parent_family_placement = gr_child_of_family, gr_spouse_family
 
         # add the mother branch
-        x_position = add_parent('wife', x_position)
+        x_position = yield from add_parent('wife', x_position)
 
         self.max_x_index = max(self.max_x_index, x_position)
 
@@ -317,7 +357,7 @@ class AncestorChart(BaseSVGChart):
         elif death_ordinal_value and birth_ordinal_value:
             self.min_ordinal = birth_ordinal_value
             self.max_ordinal = death_ordinal_value
-        discovery_cache.append((gr_individual, gr_spouse_family))
+        discovery_cache.add((gr_individual.g_id, gr_spouse_family_g_id))
 
     def _flip_family(self, gr_family):
         """
@@ -392,7 +432,68 @@ class AncestorChart(BaseSVGChart):
             self._move_individual_and_ancestors(gr_family.gr_husb, gr_family, husb_x_delta)
         if gr_family.gr_wife:
             self._move_individual_and_ancestors(gr_family.gr_wife, gr_family, wife_x_delta)
-        self._instances.ancestor_width_cache.clear()
+
+    def _flip_family_and_record(self, gr_family):
+        """
+        Flip family and record the moved individuals.
+
+        Args:
+            gr_family (GraphicalFamily): family instance
+
+        Returns:
+            OrderedDict: g_id -> (gr_individual, x_indices before flipping) of the moved individuals
+        """
+        self._moved_individuals = OrderedDict()
+        try:
+            self._flip_family(gr_family)
+        finally:
+            moved_individuals = self._moved_individuals
+            self._moved_individuals = None
+        return moved_individuals
+
+    def _get_moved_distance_difference(self, moved_individuals):
+        """
+        Change of the sum of distances (see _calculate_sum_of_distances) caused by moving individuals.
+
+        Args:
+            moved_individuals (OrderedDict): g_id -> (gr_individual, x_indices before moving)
+
+        Returns:
+            float: difference
+        """
+        difference = 0
+        for gr_individual, old_x_indices in moved_individuals.values():
+            x_indices = gr_individual.get_position_dict().get_x_indices()
+            difference += self._get_distance_of_x_indices(x_indices) - self._get_distance_of_x_indices(old_x_indices)
+        return difference
+
+    def _check_moved_x_positions(self, moved_individuals, run_full_check=True):
+        """
+        Check if the moved individuals occupy the same horizontal slots as before. In
+        this case, a valid chart stays valid. Otherwise the full check_unique_x_position is used.
+
+        Args:
+            moved_individuals (OrderedDict): g_id -> (gr_individual, x_indices before moving)
+            run_full_check (bool, optional): run check_unique_x_position if the slots changed. Defaults to True.
+
+        Returns:
+            list: list of failures
+        """
+        def get_slots(x_indices):
+            # like in check_unique_x_position, repeated x_indices occupy one slot
+            return [x_index for i, x_index in enumerate(x_indices) if i == 0 or x_indices[i-1] != x_index]
+
+        old_slots = Counter()
+        new_slots = Counter()
+        for gr_individual, old_x_indices in moved_individuals.values():
+            old_slots.update(get_slots(old_x_indices))
+            new_slots.update(get_slots(gr_individual.get_position_dict().get_x_indices()))
+        if old_slots == new_slots:
+            return []
+        if not run_full_check:
+            return ['moved']
+        failed, _, _ = self.check_unique_x_position()
+        return failed
 
     def _compress_single_individual_position(self, gr_individual, gr_cof, direction, nSteps=50000):
         """
@@ -402,6 +503,12 @@ class AncestorChart(BaseSVGChart):
             return
         try:
             i = 0
+            if self._positioning['compression_engine'] == 'shift':
+                i, collision_detected = self._shift_until_collision(
+                    lambda x_index_offset: self._move_single_individual(gr_individual, gr_cof, x_index_offset),
+                    direction, nSteps, 15)
+                if collision_detected:
+                    raise LifeLineChartCollisionDetected()
             while i < nSteps:
                 i += 1
                 self._move_single_individual(gr_individual, gr_cof, direction)
@@ -422,6 +529,57 @@ class AncestorChart(BaseSVGChart):
                 else:
                     break
 
+    def _shift_until_collision(self, move, direction, max_steps, last_min_distance=1):
+        """
+        Shift a block of individuals until it collides, like moving it step by step and
+        checking the chart after every step. The distance to the next collision is
+        calculated from the span index, so the block is moved in one shift.
+
+        Args:
+            move (function): moves the block by an x_index offset
+            direction (int): x_index offset of one step
+            max_steps (int): maximum number of steps
+            last_min_distance (float, optional): min_distance of the check after the last step. Defaults to 1.
+
+        Returns:
+            tuple: number of steps, collision detected after the last step
+        """
+        if self._collision_index is None:
+            self._build_collision_index()
+        collision_index = self._collision_index
+
+        # the first step shows which spans are moved by the block
+        collision_index.start_recording()
+        try:
+            move(direction)
+        finally:
+            old_spans = collision_index.stop_recording()
+        try:
+            self._check_compressed_x_position(True, min_distance=1 if max_steps > 1 else last_min_distance)
+        except LifeLineChartCollisionDetected:
+            return 1, True
+        if max_steps <= 1:
+            return 1, False
+
+        moving_spans = []
+        for g_id, spans in old_spans.items():
+            for (old_x_index, _), (x_index, entry) in zip(spans, collision_index.get_spans(g_id)):
+                if x_index != old_x_index:
+                    moving_spans.append((x_index, entry, x_index - old_x_index))
+        # other collisions do not change while the block is moved
+        steps = collision_index.get_steps_to_collision(
+            moving_spans, 1, max_steps - 1 if last_min_distance == 1 else max_steps - 2)
+        if steps is not None:
+            move(direction * steps)
+            return steps + 1, True
+        move(direction * (max_steps - 1))
+        if last_min_distance != 1:
+            try:
+                self._check_compressed_x_position(True, min_distance=last_min_distance)
+            except LifeLineChartCollisionDetected:
+                return max_steps, True
+        return max_steps, False
+
     def _compress_chart_ancestor_graph(self, gr_family):
         """
         Compress the chart horizontally.
@@ -429,8 +587,17 @@ class AncestorChart(BaseSVGChart):
         Args:
             gr_family (GraphicalFamily): graphical family representation instance
         """
+        run_iteratively(self._compress_chart_ancestor_graph_steps(gr_family))
+
+    def _compress_chart_ancestor_graph_steps(self, gr_family):
+        """
+        Steps of _compress_chart_ancestor_graph, see run_iteratively.
+        """
         gr_individuals = []
-        if gr_family is None:
+        if gr_family is None or self._layout_budget.is_exhausted():
+            return
+        if gr_family.g_id in self._compressed_branch_families:
+            self._compressed_branch_families.discard(gr_family.g_id)
             return
 
         family_was_flipped = False
@@ -464,16 +631,20 @@ class AncestorChart(BaseSVGChart):
             gr_cofs = gr_individual.connected_parent_families
             for gr_cof in gr_cofs:
                 try:
-                    self._compress_chart_ancestor_graph(gr_cof)
+                    yield self._compress_chart_ancestor_graph_steps(gr_cof)
                 except KeyError:
                     pass
             if self.debug_optimization_compression_steps <= 0:
                 break
         if self.debug_optimization_compression_steps <= 0:
             return
+        self._layout_budget.advance('compression', len(self.gr_families))
         for original_direction_factor, gr_individual in sorted(gr_individuals):
             if gr_individual is None:
                 continue
+            # the chart is consistent between two individuals
+            if self._layout_budget.is_exhausted():
+                return
             i = 0
             i2 = 0
             if family_was_flipped:
@@ -487,7 +658,25 @@ class AncestorChart(BaseSVGChart):
             if this_individual_x_pos and (this_individual_x_pos + direction_factor*1) in blocked_positions:
                 continue
 
+            # with pedigree collapse, a family can be compressed more than once
+            compression_offsets = self._compression_offsets.setdefault((gr_family.g_id, gr_individual.g_id), [])
+            previous_compression_offsets = self._previous_compression_offsets.get((gr_family.g_id, gr_individual.g_id), [])
+            if len(compression_offsets) < len(previous_compression_offsets) and self._positioning['warm_start_compression'] and not (
+                    self._positioning['debug_optimization_compression_steps'] > 0):
+                compression_offset = previous_compression_offsets[len(compression_offsets)]
+                if self._move_by_previous_compression_offset(gr_individual, gr_family, compression_offset):
+                    compression_offsets.append(compression_offset)
+                    continue
+
             try:
+                if self._positioning['compression_engine'] == 'shift' and not (
+                        self._positioning['debug_optimization_compression_steps'] > 0):
+                    i, collision_detected = self._shift_until_collision(
+                        lambda x_index_offset: self._move_individual_and_ancestors(gr_individual, gr_family, x_index_offset),
+                        direction_factor*1, 50000)
+                    self.debug_optimization_compression_steps -= i
+                    if collision_detected:
+                        raise LifeLineChartCollisionDetected()
                 while i < 50000:
                     if (i+1) % 1000 == 0:
                         logger.warning('i {i} for gr_individual {gr_individual}'.format(**locals()))
@@ -521,6 +710,7 @@ class AncestorChart(BaseSVGChart):
                 pass
             except KeyError:
                 pass
+            compression_offsets.append(gr_individual.get_x_index(gr_family.g_id) - this_individual_x_pos)
 
             if self.debug_optimization_compression_steps <= 0:
                 break
@@ -536,6 +726,162 @@ class AncestorChart(BaseSVGChart):
             if self.debug_optimization_compression_steps <= 0:
                 break
 
+    def _get_branch(self, gr_family):
+        """
+        Get the branch of a family, i.e. the parents, their ancestors and the visible children of the
+        ancestor families. The compression of the family only moves individuals of the branch.
+
+        Args:
+            gr_family (GraphicalFamily): family
+
+        Returns:
+            tuple: (slots of the positions, g_ids of the individuals, g_ids of the families) or None, if
+                an individual of the branch is connected to a family outside the branch
+        """
+        gr_individuals = OrderedDict()
+        family_g_ids = {gr_family.g_id}
+        gr_families = [gr_family]
+        while gr_families:
+            gr_branch_family = gr_families.pop()
+            gr_parents = [gr_parent for gr_parent in (gr_branch_family.gr_husb, gr_branch_family.gr_wife) if gr_parent is not None]
+            if gr_branch_family is not gr_family:
+                gr_parents += gr_branch_family.visible_children
+            for gr_individual in gr_parents:
+                if gr_individual.g_id in gr_individuals:
+                    continue
+                gr_individuals[gr_individual.g_id] = gr_individual
+                for gr_cof in gr_individual.connected_parent_families:
+                    if gr_cof.g_id not in family_g_ids:
+                        family_g_ids.add(gr_cof.g_id)
+                        gr_families.append(gr_cof)
+
+        slots = []
+        for gr_individual in gr_individuals.values():
+            position_dict = gr_individual.get_position_dict()
+            # the position without family (i.e. without parents) does not connect to other individuals
+            if position_dict is None or any(g_id is not None and g_id not in family_g_ids for g_id in position_dict):
+                return None
+            slots += position_dict.get_slots()
+        return slots, set(gr_individuals), family_g_ids
+
+    def _get_independent_branches(self, gr_family, number_of_branches):
+        """
+        Split the ancestors of a family into independent branches, which can be compressed concurrently.
+        Two branches are independent, if they do not share individuals or families and if their x_index
+        ranges do not overlap. Since the compression moves the ancestors towards their children, the
+        branches stay within their range. The largest branch is split into the branches of the parents
+        until there are enough branches.
+
+        Args:
+            gr_family (GraphicalFamily): family which is compressed
+            number_of_branches (int): number of branches which is sufficient
+
+        Returns:
+            list: list of (family, slots of the positions, x_index range) tuples
+        """
+        x_indices = self._instances.position_table.x_indices
+        # the family itself is compressed afterwards, only the branches of its parents are candidates
+        branches = [(gr_family, None)]
+        unsplittable_branches = []
+        while branches and len(branches) + len(unsplittable_branches) < number_of_branches:
+            branches.sort(key=lambda branch: float('inf') if branch[1] is None else len(branch[1]))
+            gr_branch_family, slots = branches.pop()
+            parent_branches = []
+            for gr_parent in (gr_branch_family.gr_husb, gr_branch_family.gr_wife):
+                if gr_parent is None:
+                    continue
+                for gr_cof in gr_parent.connected_parent_families:
+                    branch = self._get_branch(gr_cof)
+                    if branch is None:
+                        parent_branches = None
+                        break
+                    parent_branches.append((gr_cof, branch))
+                if parent_branches is None:
+                    break
+            if parent_branches:
+                ranges = sorted(
+                    (min(x_indices[slot] for slot in branch[0]), max(x_indices[slot] for slot in branch[0]))
+                    for _, branch in parent_branches)
+                individual_g_ids = [g_id for _, branch in parent_branches for g_id in branch[1]]
+                family_g_ids = [g_id for _, branch in parent_branches for g_id in branch[2]]
+                if len(set(individual_g_ids)) == len(individual_g_ids) and len(set(family_g_ids)) == len(family_g_ids) and all(
+                        range_a[1] < range_b[0] for range_a, range_b in zip(ranges[:-1], ranges[1:])):
+                    branches += [(gr_cof, branch[0]) for gr_cof, branch in parent_branches]
+                    continue
+            unsplittable_branches.append((gr_branch_family, slots))
+        return [
+            (gr_branch_family, slots, (min(x_indices[slot] for slot in slots), max(x_indices[slot] for slot in slots)))
+            for gr_branch_family, slots in branches + unsplittable_branches if slots]
+
+    def _compress_branches_in_parallel(self, gr_family):
+        """
+        Compress the independent branches of the ancestors of a family in worker processes. The
+        compression of these branches is skipped afterwards, so that the result is the same as
+        the compression in one process.
+
+        Args:
+            gr_family (GraphicalFamily): family which is compressed
+
+        Returns:
+            list: g_ids of the families whose branches have been compressed in worker processes
+        """
+        processes = self._positioning['compression_processes']
+        if processes <= 1 or not is_parallel_compression_available() or self._layout_budget.is_exhausted() or \
+                self._positioning['debug_optimization_compression_steps'] > 0:
+            return []
+        branches = self._get_independent_branches(gr_family, 2 * processes)
+        if len(branches) < 2:
+            return []
+        family_indices = {gr_branch_family.g_id: index for index, gr_branch_family in enumerate(self.gr_families)}
+        results = compress_branches(
+            self, [(family_indices[gr_branch_family.g_id], slots) for gr_branch_family, slots, _ in branches], processes)
+
+        # the branches must have stayed in their range, otherwise they might have affected each other
+        for (_, _, (min_x_index, max_x_index)), (new_x_indices, _) in zip(branches, results):
+            if min(new_x_indices) < min_x_index or max(new_x_indices) > max_x_index:
+                logger.warning('a branch left its range during the parallel compression, it is compressed again')
+                return []
+        x_indices = self._instances.position_table.x_indices
+        for (gr_branch_family, slots, _), (new_x_indices, compression_offsets) in zip(branches, results):
+            for slot, x_index in zip(slots, new_x_indices):
+                x_indices[slot] = x_index
+            for key, offsets in compression_offsets.items():
+                self._compression_offsets.setdefault(key, []).extend(offsets)
+            self._compressed_branch_families.add(gr_branch_family.g_id)
+            # the compressed families of the branch have not been reported by the workers
+            self._layout_budget.advance('compression', len(self.gr_families), len(self._get_branch(gr_branch_family)[2]))
+        # all ranges may have been moved
+        self._instances.ancestor_width_cache.clear()
+        self._instances.descendant_range_cache.clear()
+        self._reset_collision_index()
+        return [gr_branch_family.g_id for gr_branch_family, _, _ in branches]
+
+    def _move_by_previous_compression_offset(self, gr_individual, gr_family, x_index_offset):
+        """
+        Move an individual and its ancestors by the offset they have been moved by the compression
+        of the previous layout. The block is moved back, if it collides at this position.
+
+        Args:
+            gr_individual (GraphicalIndividual): individual
+            gr_family (GraphicalFamily): family in which the individual is moved
+            x_index_offset (int): offset of the previous layout
+
+        Returns:
+            bool: the individual has been moved
+        """
+        try:
+            if x_index_offset != 0:
+                self._move_individual_and_ancestors(gr_individual, gr_family, x_index_offset)
+        except (LifeLineChartCannotMoveIndividual, KeyError):
+            return False
+        try:
+            self._check_compressed_x_position(True)
+        except LifeLineChartCollisionDetected:
+            if x_index_offset != 0:
+                self._move_individual_and_ancestors(gr_individual, gr_family, -x_index_offset)
+            return False
+        return True
+
     def _move_child_to_center_between_parents(self, gr_individual):
         """
         Move an individual to the center between its parents.
@@ -575,59 +921,86 @@ class AncestorChart(BaseSVGChart):
         Args:
             root_individual_id (str): root individual id used as root node for compression
         """
+        self._instances.ancestor_width_cache.reset_statistics()
         failed, _, _ = self.check_unique_x_position()
 
         candidates = []
         if self._positioning['flip_to_optimize']:
             width, loli = self._calculate_sum_of_distances()
             old_width = width
+            candidate_g_ids = set()
             for key in loli.keys():
                 def collect_candidates(gr_children):
-                    for gr_child in gr_children:
+                    # depth first, in the same order as a recursive traversal
+                    stack = list(reversed(gr_children))
+                    while stack:
+                        gr_child = stack.pop()
                         # if gr_child not in candidates:
                         candidates.append(gr_child)
-                        collect_candidates(gr_child.visible_children)
+                        candidate_g_ids.add(gr_child.g_id)
+                        stack += reversed(gr_child.visible_children)
 
                 gr_individual = loli[key]
-                if gr_individual not in candidates:
+                if gr_individual.g_id not in candidate_g_ids:
                     candidates.append(gr_individual)
+                    candidate_g_ids.add(gr_individual.g_id)
                 collect_candidates(gr_individual.visible_children)
                 for gr_cof in gr_individual.connected_parent_families:
                     collect_candidates(gr_cof.visible_children)
 
             nSteps = self._positioning['debug_optimization_flipping_steps']
 
+            # the cross connections and the horizontal slots are only updated for the moved
+            # individuals. If the chart was not valid before, the full checks are used.
+            incremental = len(failed) == 0
+            current_width = width
             failed = []
-            has_been_done = []
+            has_been_done = set()
             for gr_child in candidates:
+                # the chart is consistent between two candidates
+                if self._layout_budget.is_exhausted():
+                    break
+                self._layout_budget.advance('flipping', len(candidates))
                 ov = gr_child.birth_date_ov
                 for gr_family in gr_child.visible_marriages:
                     if gr_family is None:
                         continue
-                    if gr_family not in has_been_done:
-                        has_been_done.append(gr_family)
+                    if gr_family.g_id not in has_been_done:
+                        has_been_done.add(gr_family.g_id)
 
                         nSteps -= 1
                         if nSteps == 0:
                             break
 
-                        self._flip_family(gr_family)
+                        moved_individuals = self._flip_family_and_record(gr_family)
 
                         nSteps -= 1
                         if nSteps == 0:
                             break
 
-                        failed, _, _ = self.check_unique_x_position()
+                        if incremental:
+                            failed = self._check_moved_x_positions(moved_individuals)
+                        else:
+                            failed, _, _ = self.check_unique_x_position()
                         if len(failed) > 0:
                             logger.error(
                                 "failed flipping " +
                                 str((gr_family, gr_family.family_id, ov)) + str(nSteps))
                             break
 
-                        new_width, _ = self._calculate_sum_of_distances()
+                        if incremental:
+                            new_width = current_width + self._get_moved_distance_difference(moved_individuals)
+                        else:
+                            new_width, _ = self._calculate_sum_of_distances()
+                        current_width = new_width
                         # print (f'step={nSteps} new_width={new_width} width_difference={new_width-old_width} algorithm_failed={len(failed) > 0} better={new_width < width}')
                         if new_width >= width:
-                            self._flip_family(gr_family)
+                            moved_individuals = self._flip_family_and_record(gr_family)
+                            if incremental:
+                                current_width += self._get_moved_distance_difference(moved_individuals)
+                                if len(self._check_moved_x_positions(moved_individuals, False)) > 0:
+                                    # flipping back did not restore the chart
+                                    incremental = False
                         else:
                             width = new_width
                 # print (x_pos)
@@ -652,10 +1025,17 @@ class AncestorChart(BaseSVGChart):
             self.debug_optimization_compression_steps = 1e30
             if 'debug_optimization_compression_steps' in self._positioning and self._positioning['debug_optimization_compression_steps'] > 0:
                 self.debug_optimization_compression_steps = self._positioning['debug_optimization_compression_steps']
-            for gr_family in gr_root_individual.connected_parent_families:
-                self._compress_chart_ancestor_graph(gr_family)
-            if self.debug_optimization_compression_steps > 0:
-                self._move_child_to_center_between_parents(gr_root_individual)
+            self._reset_collision_index()
+            if self._positioning['compression_engine'] == 'constraint_graph':
+                self._compress_chart_constraint_graph()
+            else:
+                for gr_family in gr_root_individual.connected_parent_families:
+                    self._compress_branches_in_parallel(gr_family)
+                    self._compress_chart_ancestor_graph(gr_family)
+                self._compressed_branch_families.clear()
+                if self.debug_optimization_compression_steps > 0:
+                    self._move_child_to_center_between_parents(gr_root_individual)
+            self._reset_collision_index()
 
             # compressed chart should be aligned left
             _, min_index_x, max_index_x = self._check_compressed_x_position(
@@ -678,8 +1058,236 @@ class AncestorChart(BaseSVGChart):
         else:
             self._check_compressed_x_position(
                 False, self.position_to_person_map)
+        logger.info(
+            "ancestor width cache: {hits} hits, {misses} misses, {invalidated} invalidated entries".format(
+                **self._instances.ancestor_width_cache.get_statistics()))
+
+    def _calculate_layout(self, filter_lambda):
+        """
+        Select, place and compress the individuals of the root individuals
+
+        Args:
+            filter_lambda (lambda(BaseIndividual)): filtering of individuals
+        """
+        # the compression of the previous layout is the starting point of the warm start compression
+        if self._compression_offsets:
+            self._previous_compression_offsets = self._compression_offsets
+        self._compression_offsets = {}
+
+        for index, settings in enumerate(self._chart_configuration['root_individuals']):
+            root_individual_id = settings['individual_id']
+            generations = settings['generations']
+            root_individual = self._instances[(
+                'i', root_individual_id)]
+            frontier = []
+            self.select_individuals(root_individual, generations, filter=filter_lambda, discovery_cache=[], frontier=frontier)
+            self._selection_frontier[index] = frontier
+
+        for family_id in self._chart_configuration['family_children']:
+            family = self._instances[(
+                'f', family_id)]
+            if family.has_graphical_representation():
+                self.select_family_children(family.graphical_representations[0], filter=filter_lambda)
+
+        x_pos = 0
+        for settings in self._chart_configuration['root_individuals']:
+            if 'x_offset' in settings:
+                x_pos += settings['x_offset']
+            root_individual_id = settings['individual_id']
+            generations = settings['generations']
+            root_individual = self._instances[(
+                'i', root_individual_id)]
+            if root_individual is None or \
+                    root_individual.has_graphical_representation() and root_individual.graphical_representations[0].get_position_dict() is not None:
+                continue
+            gr_root_individual = root_individual.graphical_representations[0]
+            cof_family_id = None
+            if root_individual.child_of_family_id:
+                cof_family_id = root_individual.child_of_family_id[0]
+            cof_family = self._instances[('f', cof_family_id)]
+            gr_cof_family = None
+            if cof_family:
+                gr_cof_family = cof_family.graphical_representations[0]
+            spouse_family = None
+            vms = gr_root_individual.visible_marriages
+            if vms:
+                for vm in vms:
+                    gr_spouse_family = vm
+                    self.place_selected_individuals(
+                        gr_root_individual, gr_spouse_family, gr_cof_family, x_pos)
+            else:
+                self.place_selected_individuals(
+                    gr_root_individual, None, gr_cof_family, x_pos)
+
+            x_pos = max(0, self.max_x_index)
+            self._layout_budget.advance('placement', len(self._chart_configuration['root_individuals']))
 
-    def update_chart(self, filter_lambda=None, color_lambda=None, images_lambda=None, rebuild_all=False, update_view=False):
+        if self._positioning['layout_mode'] == 'fast':
+            self._modify_layout_fast()
+            return
+
+        for settings in self._chart_configuration['root_individuals']:
+            root_individual_id = settings['individual_id']
+            generations = settings['generations']
+            try:
+                self.modify_layout(root_individual_id)
+            except Exception:
+                pass
+
+    def _insert_ancestor_branch(self, gr_parent, gr_family, parent_variable_name, empty_x_indices):
+        """
+        Place a parent and its ancestors beside the children of a family. The branch is placed
+        right of the chart and then moved into new columns beside the children.
+
+        Args:
+            gr_parent (GraphicalIndividual): father or mother
+            gr_family (GraphicalFamily): family of the parent
+            parent_variable_name (str): 'husb' or 'wife'
+            empty_x_indices (set): empty columns of the layout, updated if columns are inserted
+
+        Returns:
+            bool: the branch has been inserted, False if no child of the family has been placed
+        """
+        children_x_indices = [
+            gr_child.get_x_index(gr_family.g_id) for gr_child in gr_family.visible_children
+            if gr_child.has_position_vector(gr_family)]
+        if not children_x_indices:
+            return False
+        position_table = self._instances.position_table
+        first_new_slot = len(position_table)
+        branch_x_index = position_table.get_x_index_range()[1] + 1
+        gr_parent_families = gr_parent.connected_parent_families
+        gr_parent_family = gr_parent_families[0] if gr_parent_families else None
+        self.place_selected_individuals(gr_parent, gr_family, gr_parent_family, branch_x_index)
+        new_x_indices = position_table.x_indices[first_new_slot:]
+        if not new_x_indices:
+            return True
+        width = max(new_x_indices) - branch_x_index + 1
+
+        if parent_variable_name == 'husb':
+            insert_x_index = min(children_x_indices)
+        else:
+            insert_x_index = max(children_x_indices) + 1
+
+        def x_index_mapping(x_index):
+            if x_index >= branch_x_index:
+                return x_index - branch_x_index + insert_x_index
+            if x_index >= insert_x_index:
+                return x_index + width
+            return x_index
+        position_table.map_x_indices(x_index_mapping)
+        mapped_empty_x_indices = {x_index_mapping(x_index) for x_index in empty_x_indices}
+        empty_x_indices.clear()
+        empty_x_indices.update(mapped_empty_x_indices)
+
+        setattr(gr_family, parent_variable_name + '_width',
+                lambda gr=gr_parent, cof=gr_family: gr.get_ancestor_width(cof))
+        # all ranges have been moved
+        self._instances.ancestor_width_cache.clear()
+        self._instances.descendant_range_cache.clear()
+        self._reset_collision_index()
+        return True
+
+    def _remove_empty_columns(self, empty_x_indices):
+        """
+        Remove the columns which have become empty, e.g. by compression.
+
+        Args:
+            empty_x_indices (set): empty columns which are kept
+        """
+        position_table = self._instances.position_table
+        min_x_index, max_x_index = position_table.get_x_index_range()
+        used_x_indices = set(position_table.x_indices)
+        removed_x_indices = [
+            x_index for x_index in range(min_x_index, max_x_index + 1)
+            if x_index not in used_x_indices and x_index not in empty_x_indices]
+        if removed_x_indices:
+            position_table.map_x_indices(lambda x_index: x_index - bisect_left(removed_x_indices, x_index))
+            self._instances.ancestor_width_cache.clear()
+            self._instances.descendant_range_cache.clear()
+            self._reset_collision_index()
+
+    def _expand_layout(self, expansion, filter_lambda):
+        """
+        Add the ancestors of additional generations to the current layout. The selection continues
+        where it stopped before. The new branches are placed beside the children and only these
+        branches are compressed. The families are not flipped again.
+
+        Args:
+            expansion (list): list of (index of the root individual, additional generations) tuples
+            filter_lambda (lambda(BaseIndividual)): filtering of individuals
+
+        Returns:
+            bool: the layout has been expanded
+        """
+        for family_id in self._chart_configuration['family_children']:
+            family = self._instances[('f', family_id)]
+            if family is not None and not family.has_graphical_representation():
+                # the family might become visible, then its children are selected as well
+                return False
+
+        # select the additional ancestors
+        gr_families = OrderedDict()
+        for index, generations in expansion:
+            frontier = []
+            selected_g_ids = set()
+            for gr_individual in self._selection_frontier[index]:
+                if gr_individual.g_id in selected_g_ids:
+                    continue
+                selected_g_ids.add(gr_individual.g_id)
+                self.select_individuals(
+                    gr_individual.individual, generations, filter=filter_lambda, discovery_cache=[], frontier=frontier)
+                for gr_family in gr_individual.connected_parent_families[:1]:
+                    gr_families[gr_family.g_id] = gr_family
+            self._selection_frontier[index] = frontier
+
+        # place them beside the children
+        position_table = self._instances.position_table
+        min_x_index, max_x_index = position_table.get_x_index_range()
+        used_x_indices = set(position_table.x_indices)
+        empty_x_indices = {x_index for x_index in range(min_x_index, max_x_index + 1) if x_index not in used_x_indices}
+        expanded_families = []
+        for gr_family in gr_families.values():
+            gr_placement_children = [
+                gr_child for gr_child in gr_family.visible_children
+                if gr_child.qualified_for_placement and
+                (gr_child.ancestor_chart_parent_family_placement or (None, None))[0] == gr_family]
+            gr_parents = [
+                (parent_variable_name, getattr(gr_family, 'gr_' + parent_variable_name))
+                for parent_variable_name in ('husb', 'wife')]
+            gr_parents = [
+                (parent_variable_name, gr_parent) for parent_variable_name, gr_parent in gr_parents
+                if gr_parent is not None and not gr_parent.has_position_vector(gr_family)]
+            if not gr_parents:
+                continue
+            if not gr_placement_children:
+                return False
+            for parent_variable_name, gr_parent in gr_parents:
+                if not self._insert_ancestor_branch(gr_parent, gr_family, parent_variable_name, empty_x_indices):
+                    return False
+            expanded_families.append((gr_family, gr_placement_children[0]))
+
+        if self._positioning['layout_mode'] == 'fast':
+            self._remove_empty_columns(empty_x_indices)
+            self._modify_layout_fast()
+            return True
+
+        if self._positioning['compress'] and self._positioning['compression_engine'] == 'constraint_graph':
+            self._compress_chart_constraint_graph()
+        elif self._positioning['compress']:
+            self.debug_optimization_compression_steps = 1e30
+            self._reset_collision_index()
+            for gr_family, gr_placement_child in expanded_families:
+                self._compress_chart_ancestor_graph(gr_family)
+                self._move_child_to_center_between_parents(gr_placement_child)
+            self._reset_collision_index()
+        self._remove_empty_columns(empty_x_indices)
+
+        self._check_compressed_x_position(False, self.position_to_person_map)
+        return True
+
+    def update_chart(self, filter_lambda=None, color_lambda=None, images_lambda=None, rebuild_all=False, update_view=False,
+                     layout_cache_dir=None, layout_budget=None):
         """
         Update the chart, caching of positioning data is regarded
 
@@ -689,11 +1297,18 @@ class AncestorChart(BaseSVGChart):
             images_lambda (lambda(BaseIndividual), optional): images of individuals. Defaults to None.
             rebuild_all (bool, optional): clear cache, rebuild everything. Defaults to False.
             update_view (bool, optional): update formatting only. Defaults to False.
+            layout_cache_dir (str, optional): directory of layout snapshots. Without filter_lambda, a saved
+                layout is restored instead of calculating it. Defaults to None (no snapshots).
+            layout_budget (LayoutBudget, optional): time budget, cancellation and progress reporting of the
+                layout. If it is exhausted, the optimization stops early. Defaults to None (unlimited).
 
         Returns:
             bool: view has changed
         """
         self._debug_check_collision_counter = 0
+        self._layout_budget = layout_budget if layout_budget is not None else LayoutBudget()
+        self._layout_budget.start()
+        expansion = None if rebuild_all else self._get_generation_expansion(filter_lambda)
         rebuild_all = rebuild_all or self._positioning != self._backup_positioning or \
             self._chart_configuration != self._backup_chart_configuration
         update_view = update_view or rebuild_all or self._formatting != self._backup_formatting
@@ -711,59 +1326,17 @@ class AncestorChart(BaseSVGChart):
         self._instances.color_getter = self._instances.color_getters[self._formatting['coloring_of_individuals']]
 
         if rebuild_all:
-            self.clear_graphical_representations()
-            for settings in self._chart_configuration['root_individuals']:
-                root_individual_id = settings['individual_id']
-                generations = settings['generations']
-                root_individual = self._instances[(
-                    'i', root_individual_id)]
-                self.select_individuals(root_individual, generations, filter=local_filter_lambda, discovery_cache=[])
-
-            for family_id in self._chart_configuration['family_children']:
-                family = self._instances[(
-                    'f', family_id)]
-                if family.has_graphical_representation():
-                    self.select_family_children(family.graphical_representations[0], filter=local_filter_lambda)
-
-            x_pos = 0
-            for settings in self._chart_configuration['root_individuals']:
-                if 'x_offset' in settings:
-                    x_pos += settings['x_offset']
-                root_individual_id = settings['individual_id']
-                generations = settings['generations']
-                root_individual = self._instances[(
-                    'i', root_individual_id)]
-                if root_individual is None or \
-                        root_individual.has_graphical_representation() and root_individual.graphical_representations[0].get_position_dict() is not None:
-                    continue
-                gr_root_individual = root_individual.graphical_representations[0]
-                cof_family_id = None
-                if root_individual.child_of_family_id:
-                    cof_family_id = root_individual.child_of_family_id[0]
-                cof_family = self._instances[('f', cof_family_id)]
-                gr_cof_family = None
-                if cof_family:
-                    gr_cof_family = cof_family.graphical_representations[0]
-                spouse_family = None
-                vms = gr_root_individual.visible_marriages
-                if vms:
-                    for vm in vms:
-                        gr_spouse_family = vm
-                        self.place_selected_individuals(
-                            gr_root_individual, gr_spouse_family, gr_cof_family, x_pos)
-                else:
-                    self.place_selected_individuals(
-                        gr_root_individual, None, gr_cof_family, x_pos)
-
-                x_pos = max(0, self.max_x_index)
-
-            for settings in self._chart_configuration['root_individuals']:
-                root_individual_id = settings['individual_id']
-                generations = settings['generations']
-                try:
-                    self.modify_layout(root_individual_id)
-                except Exception:
-                    pass
+            if self._try_to_expand_layout(expansion, local_filter_lambda):
+                self.clear_svg_items()
+            else:
+                self.clear_graphical_representations()
+                layout_filename = None
+                if layout_cache_dir and filter_lambda is None:
+                    layout_filename = get_layout_filename(self, layout_cache_dir)
+                if layout_filename is None or not load_layout(self, layout_filename):
+                    self._calculate_layout(local_filter_lambda)
+                    if layout_filename and not self._layout_budget.exhausted:
+                        save_layout(self, layout_filename)
 
             for gir in self.gr_individuals:
                 color = None
@@ -806,4 +1379,5 @@ class AncestorChart(BaseSVGChart):
         self._backup_chart_configuration = deepcopy(self._chart_configuration)
         self._backup_formatting = deepcopy(self._formatting)
         self._backup_positioning = deepcopy(self._positioning)
+        self._backup_filter_lambda = filter_lambda
         return update_view or rebuild_all
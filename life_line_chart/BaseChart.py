@@ -5,6 +5,10 @@ from collections import OrderedDict
 from .GraphicalFamily import GraphicalFamily
 from .GraphicalIndividual import GraphicalIndividual
 from .Exceptions import LifeLineChartCollisionDetected, LifeLineChartCannotMoveIndividual
+from .CollisionIndex import CollisionIndex, spans_collide
+from .ConstraintGraph import compact_columns
+from .LayoutBudget import LayoutBudget
+from .Traversal import run_iteratively
 from .Translation import get_strings
 
 logger = logging.getLogger("life_line_chart")
@@ -56,7 +60,9 @@ class BaseChart():
         'line_weighting': 'none'
     }
     DEFAULT_POSITIONING = {
-        'unique_graphical_representation': True
+        'unique_graphical_representation': True,
+        'expand_incrementally': False,
+        'layout_mode': 'default'
     }
     DEFAULT_CHART_CONFIGURATION = {
     }
@@ -113,7 +119,16 @@ class BaseChart():
         self._backup_positioning = None
         self._backup_formatting = None
         self._backup_chart_configuration = None
+        self._backup_filter_lambda = None
         self._debug_check_collision_counter = 0
+        # index of the root individual -> graphical representations where the selection stopped
+        self._selection_frontier = {}
+        # span index used by the collision checks while the chart is compressed
+        self._collision_index = None
+        # g_id -> (gr_individual, x_indices before the first move) while moves are recorded
+        self._moved_individuals = None
+        # time budget, cancellation and progress of the current layout calculation
+        self._layout_budget = LayoutBudget()
 
     def instantiate_all(self):
         """
@@ -157,6 +172,79 @@ class BaseChart():
         """
         return deepcopy(self._chart_configuration)
 
+    def _get_generation_expansion(self, filter_lambda):
+        """
+        Check if the current layout can be expanded instead of rebuilding it. This is the case
+        if the generations of the root individuals have been increased and nothing else has changed.
+
+        Args:
+            filter_lambda (lambda(BaseIndividual)): filtering of individuals passed to update_chart
+
+        Returns:
+            list: list of (index of the root individual, additional generations) tuples or None
+        """
+        if not self._positioning['expand_incrementally'] or not self._positioning['unique_graphical_representation']:
+            return None
+        if self._backup_chart_configuration is None or self._positioning != self._backup_positioning or \
+                filter_lambda is not self._backup_filter_lambda or not self.gr_individuals:
+            return None
+        old_configuration = dict(self._backup_chart_configuration)
+        new_configuration = dict(self._chart_configuration)
+        old_root_individuals = old_configuration.pop('root_individuals')
+        new_root_individuals = new_configuration.pop('root_individuals')
+        if old_configuration != new_configuration or len(old_root_individuals) != len(new_root_individuals):
+            return None
+        expansion = []
+        for index, (old_settings, new_settings) in enumerate(zip(old_root_individuals, new_root_individuals)):
+            old_generations = old_settings['generations']
+            new_generations = new_settings['generations']
+            if dict(old_settings, generations=None) != dict(new_settings, generations=None):
+                return None
+            if old_generations == new_generations:
+                continue
+            if old_generations < 0 or 0 <= new_generations < old_generations:
+                return None
+            if index not in self._selection_frontier:
+                return None
+            expansion.append((index, new_generations - old_generations if new_generations >= 0 else -1))
+        if not expansion:
+            return None
+        return expansion
+
+    def _expand_layout(self, expansion, filter_lambda):
+        """
+        Add the individuals of additional generations to the current layout. Charts which
+        support this overwrite the method.
+
+        Args:
+            expansion (list): list of (index of the root individual, additional generations) tuples
+            filter_lambda (lambda(BaseIndividual)): filtering of individuals
+
+        Returns:
+            bool: the layout has been expanded
+        """
+        return False
+
+    def _try_to_expand_layout(self, expansion, filter_lambda):
+        """
+        Expand the current layout, see _expand_layout. If the individuals cannot be placed without
+        collision, the chart needs to be rebuilt.
+
+        Args:
+            expansion (list): list of (index of the root individual, additional generations) tuples or None
+            filter_lambda (lambda(BaseIndividual)): filtering of individuals
+
+        Returns:
+            bool: the layout has been expanded
+        """
+        if expansion is None:
+            return False
+        try:
+            return self._expand_layout(expansion, filter_lambda)
+        except (LifeLineChartCollisionDetected, LifeLineChartCannotMoveIndividual) as e:
+            logger.info('failed to expand the layout, rebuilding the chart: ' + str(e))
+            return False
+
     def _create_individual_graphical_representation(self, individual, always_instantiate_new=False):
         """
         Create a graphical representation for an individual
@@ -221,14 +309,27 @@ class BaseChart():
             position_dict = gr_individual.get_position_dict()
             distance_of_this_individual = 0
             if position_dict:
-                all_x_indices = [p[1] for k, p in position_dict.items()]
-                distance_of_this_individual += sum([abs(a-b) for a, b in zip(all_x_indices[:-1], all_x_indices[1:])])
+                all_x_indices = position_dict.get_x_indices()
+                distance_of_this_individual += self._get_distance_of_x_indices(all_x_indices)
             total_distance += distance_of_this_individual
             if distance_of_this_individual > 0:
                 list_of_linked_individuals[(
                     distance_of_this_individual, index)] = gr_individual
         return total_distance, list_of_linked_individuals
 
+    @staticmethod
+    def _get_distance_of_x_indices(x_indices):
+        """
+        Sum of distances between the x_indices of one individual.
+
+        Args:
+            x_indices (list): x_indices of the position vector
+
+        Returns:
+            float: distance
+        """
+        return sum([abs(a-b) for a, b in zip(x_indices[:-1], x_indices[1:])])
+
     def _move_single_individual(self, gr_individual, gr_family, x_index_offset):
         """
         Move an x-position of an individual in a family.
@@ -246,6 +347,10 @@ class BaseChart():
         """
 
         position_dict = gr_individual.get_position_dict()
+        if self._moved_individuals is not None and gr_individual.g_id not in self._moved_individuals:
+            self._moved_individuals[gr_individual.g_id] = (gr_individual, position_dict.get_x_indices())
+        self._instances.ancestor_width_cache.invalidate_individual(gr_individual.g_id)
+        self._instances.descendant_range_cache.invalidate_individual(gr_individual.g_id)
         other_g_id = gr_individual.get_other_family_connected_to_birth_position(gr_family)
 
         if gr_family is not None:
@@ -253,28 +358,21 @@ class BaseChart():
         else:
             g_id = None
 
-        if other_g_id != "there is no connected family":
-            if g_id in position_dict and other_g_id in position_dict:
-                position_dict[other_g_id] = (
-                    position_dict[other_g_id][0],
-                    position_dict[other_g_id][1]+x_index_offset,
-                    position_dict[other_g_id][2],
-                    position_dict[other_g_id][3],
-                )
-
         if g_id in position_dict:
-            position_dict[g_id] = (
-                position_dict[g_id][0],
-                position_dict[g_id][1]+x_index_offset,
-                position_dict[g_id][2],
-                position_dict[g_id][3],
-            )
+            if other_g_id != "there is no connected family" and other_g_id in position_dict:
+                position_dict.move((g_id, other_g_id), x_index_offset)
+            else:
+                position_dict.move((g_id,), x_index_offset)
         else:
+            if self._collision_index is not None:
+                self._collision_index.update(gr_individual)
             raise LifeLineChartCannotMoveIndividual(
                 'This family does not exist')
+        if self._collision_index is not None:
+            self._collision_index.update(gr_individual)
         return position_dict
 
-    def _move_individual_and_ancestors(self, gr_individual, gr_family, x_index_offset, discovery_cache=None):
+    def _move_individual_and_ancestors(self, gr_individual, gr_family, x_index_offset):
         """
         Move an individual and its ancestors horizontally. Only ancestors are moved,
         which are strongly coupled with the individual.
@@ -284,17 +382,19 @@ class BaseChart():
             gr_family (GraphicalFamily): family instance
             x_index_offset (int): horizontal offset
         """
-        if discovery_cache is None:
-            discovery_cache = []
-        discovery_cache.append(gr_individual)
+        run_iteratively(self._move_individual_and_ancestors_steps(
+            gr_individual, gr_family, x_index_offset))
 
+    def _move_individual_and_ancestors_steps(self, gr_individual, gr_family, x_index_offset):
+        """
+        Steps of _move_individual_and_ancestors, see run_iteratively.
+        """
         # move this individual
         self._move_single_individual(
             gr_individual, gr_family, x_index_offset)
 
         gr_cofs = gr_individual.connected_parent_families
         if len(gr_cofs) == 0:
-            discovery_cache.pop()
             return
         gr_cof = gr_cofs[0]
 
@@ -307,12 +407,12 @@ class BaseChart():
         ):
             if strongly_connected_parent_family.gr_husb:
                 # if cof.gr_husb.get_position_dict() and len(cof.gr_husb.get_position_dict()) == 1:
-                self._move_individual_and_ancestors(
-                    strongly_connected_parent_family.gr_husb, strongly_connected_parent_family, x_index_offset, discovery_cache)
+                yield self._move_individual_and_ancestors_steps(
+                    strongly_connected_parent_family.gr_husb, strongly_connected_parent_family, x_index_offset)
             if strongly_connected_parent_family.gr_wife:
                 # if cof.gr_wife.get_position_dict() and len(cof.gr_wife.get_position_dict()) == 1:
-                self._move_individual_and_ancestors(
-                    strongly_connected_parent_family.gr_wife, strongly_connected_parent_family, x_index_offset, discovery_cache)
+                yield self._move_individual_and_ancestors_steps(
+                    strongly_connected_parent_family.gr_wife, strongly_connected_parent_family, x_index_offset)
             # print (gr_individual.get)
             if True or gr_cof and gr_cof.gr_husb is None and gr_cof.gr_wife is None:
                 for gr_child_individual in gr_cof.visible_children:
@@ -320,7 +420,6 @@ class BaseChart():
                         continue
                     self._move_single_individual(
                         gr_child_individual, gr_cof, x_index_offset)
-        discovery_cache.pop()
 
     def _check_compressed_x_position(self, early_raise, position_to_person_map=None, min_distance=15):
         """
@@ -336,6 +435,16 @@ class BaseChart():
             LifeLineChartCollisionDetected: overlapping found
         """
         self._debug_check_collision_counter += 1
+        if early_raise and position_to_person_map is None:
+            # only the existence of a collision is required, the span index answers this
+            # without looking at the whole chart
+            if self._collision_index is None:
+                self._build_collision_index()
+            collision = self._collision_index.find_collision(min_distance)
+            if collision:
+                raise LifeLineChartCollisionDetected(*collision)
+            return [], None, None
+
         v = OrderedDict()
         collisions = []
         min_x = 999999
@@ -346,52 +455,17 @@ class BaseChart():
         def check_collision(gr_individual_a, start_y_a, end_y_a, gr_individual_b, start_y_b, end_y_b):
             if gr_individual_a == gr_individual_b:
                 return False
-            start_position_a = start_y_a - 365*min_distance
-            start_position_b = start_y_b - 365*min_distance
-            end_position_a = end_y_a + 365*min_distance
-            end_position_b = end_y_b + 365*min_distance
-            if ((start_position_a - start_position_b)
-                * (start_position_a - end_position_b) < 0 or
-                (end_position_a - start_position_b)
-                * (end_position_a - end_position_b) < 0 or
-                (start_position_b - start_position_a)
-                * (start_position_b - end_position_a) < 0 or
-                (end_position_b - start_position_a)
-                    * (end_position_b - end_position_a) < 0):
-                return True
-            return False
+            return spans_collide(start_y_a, end_y_a, start_y_b, end_y_b, min_distance)
 
-        line_bend_orientation = 0 if (str(type(self)) == "<class 'life_line_chart.DescendantChart.DescendantChart'>" and self._positioning['chart_layout'] == 'cactus') else 1
+        line_bend_orientation = self._get_line_bend_orientation()
         # assign the individuals to all x_indices in which they appear
         for gr_individual in self.gr_individuals:
-            position_vector = list(gr_individual.get_position_dict().values())
-            spouse_families = list(gr_individual.get_spouse_positions().values())
-            missing_families = len(position_vector)-len(spouse_families)
-            if missing_families:
-                if spouse_families:
-                    spouse_families = [spouse_families[0]] * missing_families + spouse_families
-                else:
-                    spouse_families = [(None, None, None, None)] * missing_families
-
-            for i, value in enumerate(position_vector):
-                if line_bend_orientation == 1:
-                    x_index = value[1]
-                else:
-                    x_index = position_vector[1][1]
-                marriage = spouse_families[i][2]
+            for x_index, start_y, end_y, marriage in self._get_individual_spans(gr_individual, line_bend_orientation):
                 if x_index not in v:
                     v[x_index] = []
 
                     if position_to_person_map is not None:
                         position_to_person_map[x_index] = []
-                if i == 0:
-                    start_y = gr_individual.birth_date_ov
-                else:
-                    start_y = position_vector[i][0]
-                if i < len(position_vector) - 1:
-                    end_y = position_vector[i+1][0]
-                else:
-                    end_y = gr_individual.death_date_ov
 
                 if start_y == end_y:
                     # happens in ancestor charts if spouse family is None (i.e. the root individual)
@@ -408,8 +482,6 @@ class BaseChart():
                 v[x_index].append((gr_individual, start_y, end_y))  # , gr_individual.birth_date_ov, gr_individual.death_date_ov))
                 max_x = max(max_x, x_index)
                 min_x = min(min_x, x_index)
-        if len(collisions) > 0:
-            raise LifeLineChartCollisionDetected()
 
         # block every x_index from birth to death in which an individual appears
         for x_index, gr_individuals in v.items():
@@ -423,6 +495,191 @@ class BaseChart():
                             (gr_individual_a, gr_individual_b))
         return collisions, min_x, max_x
 
+    def _update_position_to_person_map(self):
+        """
+        Fill position_to_person_map without checking for collisions.
+
+        Returns:
+            tuple: min_x_index, max_x_index
+        """
+        self.position_to_person_map.clear()
+        min_x = 999999
+        max_x = 0
+        line_bend_orientation = self._get_line_bend_orientation()
+        for gr_individual in self.gr_individuals:
+            for x_index, start_y, end_y, marriage in self._get_individual_spans(gr_individual, line_bend_orientation):
+                persons = self.position_to_person_map.setdefault(x_index, [])
+                if start_y == end_y:
+                    continue
+                persons.append({
+                    'start': start_y,
+                    'end': end_y,
+                    'individual': gr_individual,
+                    'family': marriage
+                })
+                max_x = max(max_x, x_index)
+                min_x = min(min_x, x_index)
+        return min_x, max_x
+
+    def _modify_layout_fast(self):
+        """
+        Improvement of the individual placement in the layout mode 'fast'. Instead of flipping and
+        compressing step by step, the chart is compressed with one pass over the constraint graph.
+        The slow checks of the whole chart are skipped, so that the time grows with O(n log n).
+        """
+        self._compress_chart_constraint_graph()
+        min_x_index, max_x_index = self._update_position_to_person_map()
+        if self.position_to_person_map:
+            self.min_x_index = min_x_index
+            self.max_x_index = max_x_index + 1
+
+    def _get_line_bend_orientation(self):
+        """
+        Get the orientation of the line bends, which defines in which x_index the sections of an individual are drawn.
+
+        Returns:
+            int: 0 for cactus descendant charts, otherwise 1
+        """
+        return 0 if (str(type(self)) == "<class 'life_line_chart.DescendantChart.DescendantChart'>" and
+                     self._positioning['chart_layout'] == 'cactus') else 1
+
+    def _get_individual_spans(self, gr_individual, line_bend_orientation):
+        """
+        Get the vertical sections of an individual in the x_indices in which it appears.
+
+        Args:
+            gr_individual (GraphicalIndividual): individual
+            line_bend_orientation (int): orientation of the line bends
+
+        Returns:
+            list: list of (x_index, start_y, end_y, marriage) tuples
+        """
+        spans = []
+        position_vector = list(gr_individual.get_position_dict().values())
+        spouse_families = list(gr_individual.get_spouse_positions().values())
+        missing_families = len(position_vector)-len(spouse_families)
+        if missing_families:
+            if spouse_families:
+                spouse_families = [spouse_families[0]] * missing_families + spouse_families
+            else:
+                spouse_families = [(None, None, None, None)] * missing_families
+
+        for i, value in enumerate(position_vector):
+            if line_bend_orientation == 1:
+                x_index = value[1]
+            else:
+                x_index = position_vector[1][1]
+            marriage = spouse_families[i][2]
+            if i == 0:
+                start_y = gr_individual.birth_date_ov
+            else:
+                start_y = position_vector[i][0]
+            if i < len(position_vector) - 1:
+                end_y = position_vector[i+1][0]
+            else:
+                end_y = gr_individual.death_date_ov
+            spans.append((x_index, start_y, end_y, marriage))
+        return spans
+
+    def _build_collision_index(self):
+        """
+        Build the span index of all graphical individuals. Afterwards, the index is updated
+        whenever an individual is moved, until it is reset with _reset_collision_index.
+        """
+        line_bend_orientation = self._get_line_bend_orientation()
+
+        def get_spans(gr_individual):
+            return [
+                (x_index, start_y, end_y)
+                for x_index, start_y, end_y, _ in self._get_individual_spans(gr_individual, line_bend_orientation)
+                if start_y != end_y]
+
+        self._collision_index = CollisionIndex(get_spans)
+        for gr_individual in self.gr_individuals:
+            self._collision_index.add(gr_individual)
+
+    def _reset_collision_index(self):
+        """
+        Drop the span index, e.g. if individuals have been placed without _move_single_individual.
+        """
+        self._collision_index = None
+
+    def _compress_chart_constraint_graph(self, min_distance=15):
+        """
+        Compress the chart at once. Every individual in every x_index is a node of a constraint graph.
+        A node has to stay right of the nodes whose spans are left of it and overlap (see
+        _check_compressed_x_position), parents stay on their side of the children. The nodes are
+        moved as far left as the constraints allow.
+
+        Args:
+            min_distance (float, optional): minimum distance in years between individuals in one x_index. Defaults to 15.
+        """
+        line_bend_orientation = self._get_line_bend_orientation()
+        # (g_id of the individual, x_index) -> index of the node
+        node_indices = {}
+        # (x_index, spans) of the nodes
+        nodes = []
+        # (gr_individual, g_id of the family) of the positions of the nodes
+        node_positions = []
+        # in cactus charts, the first position is the branch in the x_index of the parent
+        branch_positions = []
+
+        def add_position(node_key, gr_individual, g_id, x_index):
+            if node_key not in node_indices:
+                node_indices[node_key] = len(nodes)
+                nodes.append((x_index, []))
+                node_positions.append([])
+            node_indices[(gr_individual.g_id, x_index)] = node_indices[node_key]
+            node_positions[node_indices[node_key]].append((gr_individual, g_id))
+
+        for gr_individual in self.gr_individuals:
+            position_dict = gr_individual.get_position_dict()
+            if not position_dict:
+                continue
+            for index, (g_id, (_, x_index, gr_family, _)) in enumerate(position_dict.items()):
+                if line_bend_orientation == 0 and index == 0 and len(position_dict) > 1 and gr_family is not None:
+                    branch_positions.append((gr_individual, g_id, x_index, gr_family))
+                    continue
+                add_position((gr_individual.g_id, x_index), gr_individual, g_id, x_index)
+            for x_index, start_y, end_y, _ in self._get_individual_spans(gr_individual, line_bend_orientation):
+                if start_y != end_y:
+                    nodes[node_indices[(gr_individual.g_id, x_index)]][1].append((start_y, end_y))
+
+        # the branch moves with the parent
+        for gr_individual, g_id, x_index, gr_family in branch_positions:
+            node_key = (gr_individual.g_id, x_index)
+            if node_key not in node_indices:
+                for gr_parent in (gr_family.gr_husb, gr_family.gr_wife):
+                    if gr_parent is not None and (gr_parent.g_id, x_index) in node_indices:
+                        node_key = (gr_parent.g_id, x_index)
+                        break
+            add_position(node_key, gr_individual, g_id, x_index)
+
+        edges = {}
+        for gr_family in self.gr_families:
+            children = [
+                node_indices[(gr_child.g_id, gr_child.get_x_index(gr_family.g_id))]
+                for gr_child in gr_family.visible_children if gr_child.has_position_vector(gr_family)]
+            for gr_parent in (gr_family.gr_husb, gr_family.gr_wife):
+                if gr_parent is None or not gr_parent.has_position_vector(gr_family):
+                    continue
+                parent = node_indices[(gr_parent.g_id, gr_parent.get_x_index(gr_family.g_id))]
+                for child in children:
+                    if nodes[parent][0] < nodes[child][0]:
+                        edges.setdefault(child, []).append((parent, 1))
+                    elif nodes[child][0] < nodes[parent][0]:
+                        edges.setdefault(parent, []).append((child, 1))
+
+        new_x_indices = compact_columns(nodes, edges, 365 * min_distance)
+        for (x_index, _), new_x_index, positions in zip(nodes, new_x_indices, node_positions):
+            if new_x_index != x_index:
+                for gr_individual, g_id in positions:
+                    gr_individual.get_position_dict().move([g_id], new_x_index - x_index)
+        # all ranges may have been moved
+        self._instances.ancestor_width_cache.clear()
+        self._instances.descendant_range_cache.clear()
+        self._reset_collision_index()
+
     def _map_y_position(self, ordinal_value):
         """
         Map date information to y axis.
@@ -621,8 +878,11 @@ class BaseChart():
         self.additional_graphical_items.clear()
         self.gr_individuals.clear()
         self.gr_families.clear()
+        self._reset_collision_index()
         self._instances.clear_connections()
+        self._instances.position_table.clear()
         self.position_to_person_map = {}
+        self._selection_frontier = {}
         for _, instance in self._instances.items():
             if instance is not None:
                 instance.graphical_representations.clear()
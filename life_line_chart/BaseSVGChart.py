@@ -165,8 +165,26 @@ class BaseSVGChart(BaseChart):
         self.max_x_index = 0
         self.clear_svg_items()
         self._instances.ancestor_width_cache.clear()
+        self._instances.descendant_range_cache.clear()
         BaseChart.clear_graphical_representations(self)
 
+    def clear_positions(self):
+        """
+        Clear the positions of all graphical representations to place the selected individuals again.
+        """
+        self.min_x_index = 0
+        self.max_x_index = 0
+        self.min_ordinal = None
+        self.max_ordinal = None
+        self.clear_svg_items()
+        self._instances.ancestor_width_cache.clear()
+        self._instances.descendant_range_cache.clear()
+        self._reset_collision_index()
+        self._instances.position_table.clear()
+        self.position_to_person_map = {}
+        for gr_individual in self.gr_individuals:
+            gr_individual.clear_position_vector()
+
     def define_svg_items(self):
         """
         Generate graphical item information used for rendering the image.
@@ -232,16 +250,16 @@ class BaseSVGChart(BaseChart):
                     )
                 )
 
-        min_x_index = 9e99
-        max_x_index = -9e99
         for gr_individual in self.gr_individuals:
-            x_positions = gr_individual.get_position_dict()
-            if x_positions is None:
+            if gr_individual.get_position_dict() is None:
                 logger.error(gr_individual.individual.plain_name + ' has a graphical representation, but was not placed!')
-                continue
-            for _, x_position in x_positions.items():
-                min_x_index = min(min_x_index, x_position[1])
-                max_x_index = max(max_x_index, x_position[1])
+        # the position table holds the positions of all placed individuals of this chart
+        x_index_range = self._instances.position_table.get_x_index_range()
+        if x_index_range is None:
+            min_x_index = 9e99
+            max_x_index = -9e99
+        else:
+            min_x_index, max_x_index = x_index_range
         if len(self.gr_individuals) == 0:
             min_x_index = 0
             max_x_index = 0
@@ -0,0 +1,267 @@
+from bisect import bisect_left, bisect_right, insort
+
+
+def spans_collide(start_y_a, end_y_a, start_y_b, end_y_b, min_distance):
+    """
+    Check if two spans in the same x_index collide. They collide if a start or end of one span
+    lies within the other one, both extended by min_distance years.
+
+    Args:
+        start_y_a (float): start ordinal value of span a
+        end_y_a (float): end ordinal value of span a
+        start_y_b (float): start ordinal value of span b
+        end_y_b (float): end ordinal value of span b
+        min_distance (float): minimum distance in years
+
+    Returns:
+        bool: spans collide
+    """
+    start_position_a = start_y_a - 365*min_distance
+    start_position_b = start_y_b - 365*min_distance
+    end_position_a = end_y_a + 365*min_distance
+    end_position_b = end_y_b + 365*min_distance
+    if ((start_position_a - start_position_b)
+        * (start_position_a - end_position_b) < 0 or
+        (end_position_a - start_position_b)
+        * (end_position_a - end_position_b) < 0 or
+        (start_position_b - start_position_a)
+        * (start_position_b - end_position_a) < 0 or
+        (end_position_b - start_position_a)
+            * (end_position_b - end_position_a) < 0):
+        return True
+    return False
+
+
+class CollisionIndex():
+    """
+    Persistent index of the spans of all individuals, sorted by x_index and start.
+
+    Moving an individual only updates the spans of this individual. For every
+    min_distance which has been queried, the colliding pairs are kept up to date,
+    so that asking for a collision does not need to look at the whole chart.
+    """
+
+    def __init__(self, get_spans):
+        """
+        Args:
+            get_spans (function): returns the list of (x_index, start_y, end_y) spans of a graphical individual
+        """
+        self._get_spans = get_spans
+        # x_index -> sorted list of (low, high, g_id, start_y, end_y)
+        self._columns = {}
+        # sorted x_indices of the columns
+        self._column_keys = []
+        # g_id -> list of (x_index, entry)
+        self._spans = {}
+        self._gr_individuals = {}
+        # longest span, limits the search window
+        self._max_length = 0
+        # min_distance -> g_id -> set of g_ids of the colliding individuals
+        self._collisions = {}
+        # min_distance -> set of g_ids which collide with any other individual
+        self._colliding = {}
+        # g_id -> spans before the first update while recording
+        self._recorded = None
+
+    def add(self, gr_individual):
+        """
+        Add the spans of a graphical individual.
+
+        Args:
+            gr_individual (GraphicalIndividual): graphical individual
+        """
+        g_id = gr_individual.g_id
+        self._gr_individuals[g_id] = gr_individual
+        spans = []
+        for x_index, start_y, end_y in self._get_spans(gr_individual):
+            low, high = min(start_y, end_y), max(start_y, end_y)
+            entry = (low, high, g_id, start_y, end_y)
+            column = self._columns.get(x_index)
+            if column is None:
+                column = []
+                self._columns[x_index] = column
+                insort(self._column_keys, x_index)
+            insort(column, entry)
+            spans.append((x_index, entry))
+            self._max_length = max(self._max_length, high - low)
+        self._spans[g_id] = spans
+        for min_distance, collisions in self._collisions.items():
+            partners = self._find_partners(g_id, min_distance)
+            collisions[g_id] = partners
+            if partners:
+                colliding = self._colliding[min_distance]
+                colliding.add(g_id)
+                for partner in partners:
+                    collisions[partner].add(g_id)
+                    colliding.add(partner)
+
+    def remove(self, gr_individual):
+        """
+        Remove the spans of a graphical individual.
+
+        Args:
+            gr_individual (GraphicalIndividual): graphical individual
+        """
+        g_id = gr_individual.g_id
+        if self._recorded is not None and g_id not in self._recorded:
+            self._recorded[g_id] = self._spans.get(g_id, [])
+        for x_index, entry in self._spans.pop(g_id, []):
+            column = self._columns[x_index]
+            del column[bisect_left(column, entry)]
+        for min_distance, collisions in self._collisions.items():
+            colliding = self._colliding[min_distance]
+            for partner in collisions.pop(g_id, ()):
+                collisions[partner].discard(g_id)
+                if not collisions[partner]:
+                    colliding.discard(partner)
+            colliding.discard(g_id)
+        self._gr_individuals.pop(g_id, None)
+
+    def update(self, gr_individual):
+        """
+        Update the spans of a graphical individual after it has been moved.
+
+        Args:
+            gr_individual (GraphicalIndividual): graphical individual
+        """
+        self.remove(gr_individual)
+        self.add(gr_individual)
+
+    def get_spans(self, g_id):
+        """
+        Get the indexed spans of a graphical individual.
+
+        Args:
+            g_id (tuple): g_id of the graphical individual
+
+        Returns:
+            list: list of (x_index, entry) tuples
+        """
+        return self._spans.get(g_id, [])
+
+    def start_recording(self):
+        """
+        Start recording the spans of the individuals which are updated.
+        """
+        self._recorded = {}
+
+    def stop_recording(self):
+        """
+        Stop recording.
+
+        Returns:
+            dict: spans of every updated individual before the first update
+        """
+        recorded = self._recorded
+        self._recorded = None
+        return recorded
+
+    def _collides_in_column(self, x_index, g_id, start_y, end_y, min_distance, ignored_entries):
+        """
+        Check if a span would collide with the spans in a column.
+
+        Args:
+            x_index (int): column
+            g_id (tuple): g_id of the graphical individual of the span
+            start_y (float): start ordinal value of the span
+            end_y (float): end ordinal value of the span
+            min_distance (float): minimum distance in years
+            ignored_entries (set): entries which are not regarded
+
+        Returns:
+            bool: collision found
+        """
+        column = self._columns[x_index]
+        low, high = min(start_y, end_y), max(start_y, end_y)
+        padding = 2 * 365 * min_distance
+        first = bisect_left(column, (low - padding - self._max_length,))
+        last = bisect_right(column, (high + padding, float('inf')))
+        for entry in column[first:last]:
+            other_low, other_high, other_g_id, other_start_y, other_end_y = entry
+            if other_g_id == g_id or other_high < low - padding or (x_index, entry) in ignored_entries:
+                continue
+            if spans_collide(start_y, end_y, other_start_y, other_end_y, min_distance):
+                return True
+        return False
+
+    def get_steps_to_collision(self, moving_spans, min_distance, max_steps):
+        """
+        Get the number of steps after which a block of moving spans collides with the
+        other spans. The moving spans do not collide with each other, since they keep
+        their distances.
+
+        Args:
+            moving_spans (list): list of (x_index, entry, step) tuples, the x_index changes by step in every step
+            min_distance (float): minimum distance in years
+            max_steps (int): maximum number of steps
+
+        Returns:
+            int: number of steps or None if there is no collision within max_steps
+        """
+        ignored_entries = set((x_index, entry) for x_index, entry, _ in moving_spans)
+        column_keys = self._column_keys
+        best = None
+        for x_index, (_, _, g_id, start_y, end_y), step in moving_spans:
+            limit = max_steps if best is None else best - 1
+            if step > 0:
+                first = bisect_right(column_keys, x_index)
+                last = bisect_right(column_keys, x_index + step * limit)
+                candidates = column_keys[first:last]
+            else:
+                first = bisect_left(column_keys, x_index + step * limit)
+                last = bisect_left(column_keys, x_index)
+                candidates = reversed(column_keys[first:last])
+            for other_x_index in candidates:
+                steps, remainder = divmod(other_x_index - x_index, step)
+                if remainder:
+                    continue
+                if self._collides_in_column(other_x_index, g_id, start_y, end_y, min_distance, ignored_entries):
+                    best = steps
+                    break
+        return best
+
+    def _find_partners(self, g_id, min_distance):
+        """
+        Find the individuals which collide with an individual.
+
+        Args:
+            g_id (tuple): g_id of the graphical individual
+            min_distance (float): minimum distance in years
+
+        Returns:
+            set: g_ids of the colliding individuals
+        """
+        partners = set()
+        padding = 2 * 365 * min_distance
+        for x_index, (low, high, _, start_y, end_y) in self._spans[g_id]:
+            column = self._columns[x_index]
+            first = bisect_left(column, (low - padding - self._max_length,))
+            last = bisect_right(column, (high + padding, float('inf')))
+            for other_low, other_high, other_g_id, other_start_y, other_end_y in column[first:last]:
+                if other_g_id == g_id or other_g_id in partners or other_high < low - padding:
+                    continue
+                if spans_collide(start_y, end_y, other_start_y, other_end_y, min_distance):
+                    partners.add(other_g_id)
+        return partners
+
+    def find_collision(self, min_distance):
+        """
+        Find a pair of colliding individuals.
+
+        Args:
+            min_distance (float): minimum distance in years
+
+        Returns:
+            tuple: two colliding graphical individuals or None
+        """
+        collisions = self._collisions.get(min_distance)
+        if collisions is None:
+            # from now on, the collisions with this min_distance are updated with every change
+            collisions = {g_id: self._find_partners(g_id, min_distance) for g_id in self._spans}
+            self._collisions[min_distance] = collisions
+            self._colliding[min_distance] = {g_id for g_id, partners in collisions.items() if partners}
+        colliding = self._colliding[min_distance]
+        if colliding:
+            g_id = next(iter(colliding))
+            return self._gr_individuals[g_id], self._gr_individuals[next(iter(collisions[g_id]))]
+        return None
@@ -0,0 +1,86 @@
+class ConnectionAdjacency():
+    """
+    Neighbour lists of the graphical individuals, derived from the connection container
+
+    The lists of a graphical individual are built on the first access and kept until a
+    connection of this individual is added. The visible marriages are sorted by marriage
+    date, the connected parent families keep the order of the connection container.
+    The returned lists are shared and must not be modified.
+    """
+
+    def __init__(self, instances):
+        """
+        Args:
+            instances (InstanceContainer): container with the connection container
+        """
+        self._instances = instances
+        # g_id of a graphical individual -> (visible marriages, connected parent families)
+        self._neighbours = {}
+
+    def _build_neighbours(self, g_id):
+        """
+        Build the neighbour lists of a graphical individual.
+
+        Args:
+            g_id (tuple): g_id of the graphical individual
+
+        Returns:
+            tuple: list of visible marriages, list of connected parent families
+        """
+        visible_marriages = []
+        connected_parent_families = []
+        individual_connections = self._instances.connection_container['i']
+        if g_id in individual_connections:
+            for f_g_id, connections in individual_connections[g_id].items():
+                if 'gr_husb' in connections or 'gr_wife' in connections or 'weak_child' in connections:
+                    gr_family = self._instances[('f', f_g_id[1])].graphical_representations[f_g_id[0]]
+                    if 'gr_husb' in connections or 'gr_wife' in connections:
+                        visible_marriages.append(gr_family)
+                    if 'weak_child' in connections:
+                        connected_parent_families.append(gr_family)
+            visible_marriages.sort()
+        neighbours = (visible_marriages, connected_parent_families)
+        self._neighbours[g_id] = neighbours
+        return neighbours
+
+    def get_visible_marriages(self, g_id):
+        """
+        Get the visible marriages of a graphical individual.
+
+        Args:
+            g_id (tuple): g_id of the graphical individual
+
+        Returns:
+            list: visible marriages sorted by marriage date
+        """
+        neighbours = self._neighbours.get(g_id)
+        if neighbours is None:
+            neighbours = self._build_neighbours(g_id)
+        return neighbours[0]
+
+    def get_connected_parent_families(self, g_id):
+        """
+        Get the connected parent families of a graphical individual.
+
+        Args:
+            g_id (tuple): g_id of the graphical individual
+
+        Returns:
+            list: connected parent families
+        """
+        neighbours = self._neighbours.get(g_id)
+        if neighbours is None:
+            neighbours = self._build_neighbours(g_id)
+        return neighbours[1]
+
+    def invalidate_individual(self, g_id):
+        """
+        Remove the neighbour lists of a graphical individual after a connection has been added.
+
+        Args:
+            g_id (tuple): g_id of the graphical individual
+        """
+        self._neighbours.pop(g_id, None)
+
+    def clear(self):
+        self._neighbours.clear()
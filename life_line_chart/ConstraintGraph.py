@@ -0,0 +1,134 @@
+from bisect import bisect_left
+
+
+class MaxProfile():
+    """
+    Maximum value along the time axis, e.g. the rightmost x_index of the spans placed so far
+
+    Segment tree over the intervals between the given coordinates. Raising the values of an
+    interval and asking for the maximum of an interval both need O(log n) steps.
+    """
+
+    def __init__(self, coordinates):
+        """
+        Args:
+            coordinates (iterable): all start and end coordinates of the intervals
+        """
+        self._coordinates = sorted(set(coordinates))
+        size = 1
+        while size < len(self._coordinates):
+            size *= 2
+        self._size = size
+        # maximum of the values in the subtree
+        self._maximum = [float('-inf')] * (2 * size)
+        # value which has been applied to the whole subtree
+        self._applied = [float('-inf')] * (2 * size)
+
+    def _get_leaves(self, low, high):
+        return bisect_left(self._coordinates, low) + self._size, bisect_left(self._coordinates, high) + self._size
+
+    def raise_to(self, low, high, value):
+        """
+        Raise the values within an interval.
+
+        Args:
+            low (float): start of the interval
+            high (float): end of the interval
+            value (int): minimum value within the interval
+        """
+        left, right = self._get_leaves(low, high)
+        if left >= right:
+            return
+        boundary_leaves = left, right - 1
+        maximum = self._maximum
+        applied = self._applied
+        while left < right:
+            if left & 1:
+                maximum[left] = max(maximum[left], value)
+                applied[left] = max(applied[left], value)
+                left += 1
+            if right & 1:
+                right -= 1
+                maximum[right] = max(maximum[right], value)
+                applied[right] = max(applied[right], value)
+            left >>= 1
+            right >>= 1
+        # the parents of the changed nodes are parents of the boundary leaves
+        for node in boundary_leaves:
+            node >>= 1
+            while node:
+                maximum[node] = max(maximum[node], value)
+                node >>= 1
+
+    def get_maximum(self, low, high):
+        """
+        Get the maximum value within an interval.
+
+        Args:
+            low (float): start of the interval
+            high (float): end of the interval
+
+        Returns:
+            float: maximum value, -inf if the interval has not been raised
+        """
+        result = float('-inf')
+        left, right = self._get_leaves(low, high)
+        if left >= right:
+            return result
+        boundary_leaves = left, right - 1
+        maximum = self._maximum
+        applied = self._applied
+        while left < right:
+            if left & 1:
+                result = max(result, maximum[left])
+                left += 1
+            if right & 1:
+                right -= 1
+                result = max(result, maximum[right])
+            left >>= 1
+            right >>= 1
+        # values applied to the parents are valid for the whole interval
+        for node in boundary_leaves:
+            node >>= 1
+            while node:
+                result = max(result, applied[node])
+                node >>= 1
+        return result
+
+
+def compact_columns(nodes, edges, margin):
+    """
+    Move groups of spans horizontally as far left as possible, with one longest path pass
+    over a constraint graph.
+
+    A node is a group of spans which stay in one column. It has to be at least one column right
+    of every node left of it, if their spans overlap when they are extended by margin. Additional
+    edges define minimum distances to other nodes left of it. The nodes are handled in the order
+    of their current x_index, so the order of all constrained nodes is kept.
+
+    Args:
+        nodes (list): list of (x_index, spans) tuples, spans is a list of (start, end) tuples
+        edges (dict): index of a node -> list of (index of a node left of it, minimum distance) tuples
+        margin (float): extension of the spans
+
+    Returns:
+        list: new x_index of every node
+    """
+    if not nodes:
+        return []
+    intervals = [
+        [(min(start, end) - margin, max(start, end) + margin) for start, end in spans]
+        for _, spans in nodes]
+    profile = MaxProfile(coordinate for node_intervals in intervals for interval in node_intervals for coordinate in interval)
+    min_x_index = min(x_index for x_index, _ in nodes)
+    new_x_indices = [None] * len(nodes)
+    for index in sorted(range(len(nodes)), key=lambda index: nodes[index][0]):
+        x_index = min_x_index
+        for low, high in intervals[index]:
+            x_index = max(x_index, profile.get_maximum(low, high) + 1)
+        for other_index, distance in edges.get(index, []):
+            x_index = max(x_index, new_x_indices[other_index] + distance)
+        new_x_indices[index] = x_index
+        for low, high in intervals[index]:
+            profile.raise_to(low, high, x_index)
+    return new_x_indices
@@ -3,6 +3,10 @@ from copy import deepcopy
 from collections import OrderedDict
 from .BaseSVGChart import BaseSVGChart
 from .Translation import get_strings, recursive_merge_dict_members
+from .Traversal import run_iteratively
+from .LayoutSnapshot import get_layout_filename, load_layout, save_layout
+from .LayoutBudget import LayoutBudget
+from .ParallelPlacement import is_parallel_placement_available, place_root_individuals
 
 logger = logging.getLogger("life_line_chart")
 
@@ -30,6 +34,7 @@ class DescendantChart(BaseSVGChart):
 
     DEFAULT_POSITIONING = {
         'chart_layout': 'enclosing',
+        'placement_processes': 1,
     }
     DEFAULT_POSITIONING.update(BaseSVGChart.DEFAULT_POSITIONING)
 
@@ -47,7 +52,7 @@ class DescendantChart(BaseSVGChart):
         # configuration of this chart
         self._chart_configuration.update(DescendantChart.DEFAULT_CHART_CONFIGURATION)
 
-    def select_descendants(self, individual, gr_child_of_family, generations=None, filter=None):
+    def select_descendants(self, individual, gr_child_of_family, generations=None, filter=None, frontier=None):
         """
         Create graphical representations for all descendants.
 
@@ -56,6 +61,19 @@ class DescendantChart(BaseSVGChart):
             gr_child_of_family (GraphicalFamily): parent family
             generations (int, optional): number of generations to go deeper. Defaults to None.
             filter (lambda, optional): filter for individuals. Defaults to None.
+            frontier (list, optional): collects (graphical individual, parent family) tuples where the
+                selection stopped due to the generation limit. Defaults to None.
+
+        Returns:
+            GraphicalIndividual: graphical representation of the individual
+        """
+        if frontier is None:
+            frontier = []
+        return run_iteratively(self._select_descendants_steps(individual, gr_child_of_family, generations, filter, frontier))
+
+    def _select_descendants_steps(self, individual, gr_child_of_family, generations, filter, frontier):
+        """
+        Steps of select_descendants, see run_iteratively.
         """
         if individual is None or filter and filter(individual):
             return
@@ -70,6 +88,8 @@ class DescendantChart(BaseSVGChart):
             gr_child_of_family = self._create_family_graphical_representation(
                 individual.child_of_families[0], not self._positioning['unique_graphical_representation'])
 
+        if generations == 0 and individual.marriages:
+            frontier.append((gr_individual, gr_child_of_family))
         for marriage in individual.marriages:
             if self._positioning['chart_layout'] == 'enclosing':
                 if marriage.has_graphical_representation() and self._positioning['unique_graphical_representation']:
@@ -99,8 +119,8 @@ class DescendantChart(BaseSVGChart):
 
                 if new_gr_marriage or not self._positioning['unique_graphical_representation']:
                     for child in marriage.children:
-                        gr_child = self.select_descendants(
-                            child, gr_marriage, generations - 1, filter=filter)
+                        gr_child = yield self._select_descendants_steps(
+                            child, gr_marriage, generations - 1, filter, frontier)
                         if gr_child:
                             gr_marriage.add_visible_children(gr_child)
                             # gr_child.ancestor_chart_parent_family_placement = gr_marriage
@@ -122,6 +142,17 @@ class DescendantChart(BaseSVGChart):
         """
         if discovery_cache is None:
             discovery_cache = []
+        run_iteratively(self._place_selected_individuals_cactus_steps(
+            gr_individual, gr_child_of_family, x_offset, x_offset_root, discovery_cache, {}))
+
+    def _place_selected_individuals_cactus_steps(self, gr_individual, gr_child_of_family, x_offset, x_offset_root, discovery_cache,
+                                                 descendant_counts):
+        """
+        Steps of place_selected_individuals_cactus, see run_iteratively.
+
+        Args:
+            descendant_counts (dict): number of descendants of every g_id which has been counted
+        """
         individual = gr_individual.individual
         discovery_cache.append(gr_individual)
         logger.info("discovering {}".format(individual.plain_name))
@@ -140,9 +171,9 @@ class DescendantChart(BaseSVGChart):
         total_number_of_descendants = 0
         for gr_marriage in reversed(visible_local_marriages):
             for gr_child in gr_marriage.visible_children:
-                gr_child_descendants = gr_child.get_all_descendants()
-                child_widths[gr_child.g_id] = gr_child_descendants
-                total_number_of_descendants += len(gr_child_descendants) + 1
+                number_of_child_descendants = gr_child.get_number_of_descendants(descendant_counts)
+                child_widths[gr_child.g_id] = number_of_child_descendants
+                total_number_of_descendants += number_of_child_descendants + 1
 
         gr_individual.special_properties['number_of_descendants'] = total_number_of_descendants
 
@@ -153,7 +184,7 @@ class DescendantChart(BaseSVGChart):
             split_children[0][gr_marriage.g_id] = []
             split_children[1][gr_marriage.g_id] = []
             vcs = gr_marriage.visible_children
-            sorted_vcs = sorted(vcs, key=lambda t: len(child_widths[t.g_id]))
+            sorted_vcs = sorted(vcs, key=lambda t: child_widths[t.g_id])
             reordered_vcs = []
             for index in range(len(sorted_vcs)):
                 if index*2 < len(sorted_vcs):
@@ -165,7 +196,7 @@ class DescendantChart(BaseSVGChart):
                     reordered_vcs.append(sorted_vcs[index2])
                 # sorted_vcs[(2*i) % len(sorted_vcs)]
             for gr_child in reordered_vcs:
-                this_step = len(child_widths[gr_child.g_id]) + 1
+                this_step = child_widths[gr_child.g_id] + 1
                 if max(2, total_number_of_descendants) / 2 + 0.5 >= number_of_placed_descendants + this_step:
                     number_of_placed_descendants += this_step
                     split_children[0][gr_marriage.g_id].append(gr_child)
@@ -198,10 +229,10 @@ class DescendantChart(BaseSVGChart):
             else:
                 sorted_vcs = sorted(vcs, key=lambda t: -t[0].birth_date_ov)
             for gr_child, gr_marriage in sorted_vcs:
-                self.place_selected_individuals_cactus(
+                yield self._place_selected_individuals_cactus_steps(
                     gr_child, gr_marriage, x_position, root_individual_position,
-                    discovery_cache=discovery_cache)
-                width = len(child_widths[gr_child.g_id]) + 1
+                    discovery_cache, descendant_counts)
+                width = child_widths[gr_child.g_id] + 1
                 # width = gr_child.get_descendant_width(
                 #     gr_marriage)
                 x_position += width
@@ -246,7 +277,7 @@ class DescendantChart(BaseSVGChart):
             self.min_ordinal = birth_ordinal_value
             self.max_ordinal = death_ordinal_value
 
-    def place_selected_individuals_enclosing(self, gr_individual, gr_child_of_family, x_offset=0, discovery_cache=[]):
+    def place_selected_individuals_enclosing(self, gr_individual, gr_child_of_family, x_offset=0, discovery_cache=None):
         """
         Place the graphical representations in direction of x.
 
@@ -256,6 +287,18 @@ class DescendantChart(BaseSVGChart):
             x_offset (int): starting position
             discovery_cache (list): list of discovered individuals
         """
+        if discovery_cache is None:
+            discovery_cache = []
+        run_iteratively(self._place_selected_individuals_enclosing_steps(
+            gr_individual, gr_child_of_family, x_offset, discovery_cache, {}))
+
+    def _place_selected_individuals_enclosing_steps(self, gr_individual, gr_child_of_family, x_offset, discovery_cache, descendant_counts):
+        """
+        Steps of place_selected_individuals_enclosing, see run_iteratively.
+
+        Args:
+            descendant_counts (dict): number of descendants of every g_id which has been counted
+        """
         individual = gr_individual.individual
         discovery_cache.append(individual.plain_name)
         logger.info("discovering {}".format(individual.plain_name))
@@ -274,14 +317,14 @@ class DescendantChart(BaseSVGChart):
                 x_position, gr_child_of_family, True)
             x_position += 1
 
-        total_number_of_descendants = len(gr_individual.get_all_descendants())
+        total_number_of_descendants = gr_individual.get_number_of_descendants(descendant_counts)
         gr_individual.special_properties['number_of_descendants'] = total_number_of_descendants
 
         for marriage_index, gr_marriage in enumerate(reversed(visible_local_marriages)):
             gr_spouse = gr_marriage.get_gr_spouse(gr_individual)
 
             if gr_spouse:
-                total_number_of_descendants = len(gr_spouse.get_all_descendants())
+                total_number_of_descendants = gr_spouse.get_number_of_descendants(descendant_counts)
                 gr_spouse.special_properties['number_of_descendants'] = total_number_of_descendants
 
             # starting x index of gr_individual is first marriage (i.e. last in reversed list)
@@ -302,9 +345,9 @@ class DescendantChart(BaseSVGChart):
                     x_position += 1
 
             for gr_child in gr_marriage.visible_children:
-                self.place_selected_individuals_enclosing(
+                yield self._place_selected_individuals_enclosing_steps(
                     gr_child, gr_marriage, x_position,
-                    discovery_cache=discovery_cache)
+                    discovery_cache, descendant_counts)
                 width = gr_child.get_descendant_width(
                     gr_marriage)
                 x_position += width
@@ -343,10 +386,211 @@ class DescendantChart(BaseSVGChart):
         self._check_compressed_x_position(
             False, self.position_to_person_map)
 
+    def _calculate_layout(self, filter_lambda):
+        """
+        Select, place and compress the descendants of the root individuals
+
+        Args:
+            filter_lambda (lambda(BaseIndividual)): filtering of individuals
+        """
+        for index, settings in enumerate(self._chart_configuration['root_individuals']):
+            root_individual_id = settings['individual_id']
+            generations = settings['generations']
+            root_individual = self._instances[(
+                'i', root_individual_id)]
+            frontier = []
+            self.select_descendants(root_individual, None, generations, filter=filter_lambda, frontier=frontier)
+            self._selection_frontier[index] = frontier
+        # the selection may have added children to families which are already cached
+        self._instances.descendant_range_cache.clear()
+
+        self._place_and_modify_layout()
+
+    def _expand_layout(self, expansion, filter_lambda):
+        """
+        Add the descendants of additional generations to the current layout. The selection continues
+        where it stopped before. Since the placement of a descendant depends on the number of its
+        descendants, all selected individuals are placed again.
+
+        Args:
+            expansion (list): list of (index of the root individual, additional generations) tuples
+            filter_lambda (lambda(BaseIndividual)): filtering of individuals
+
+        Returns:
+            bool: the layout has been expanded
+        """
+        for index, generations in expansion:
+            frontier = []
+            selected_g_ids = set()
+            for gr_individual, gr_child_of_family in self._selection_frontier[index]:
+                if gr_individual.g_id in selected_g_ids:
+                    continue
+                selected_g_ids.add(gr_individual.g_id)
+                self.select_descendants(
+                    gr_individual.individual, gr_child_of_family, generations, filter=filter_lambda, frontier=frontier)
+            self._selection_frontier[index] = frontier
+
+        self.clear_positions()
+        self._place_and_modify_layout()
+        return True
+
+    def _get_root_individual_placement(self, settings):
+        """
+        Get the graphical representations which are used to place a root individual.
+
+        Args:
+            settings (dict): settings of the root individual in the chart configuration
+
+        Returns:
+            tuple: root individual and its child-of-family, or None if the individual does not exist
+        """
+        root_individual = self._instances[(
+            'i', settings['individual_id'])]
+        if root_individual is None:
+            return None
+        gr_root_individual = root_individual.graphical_representations[0]
+        cof_family_id = None
+        if root_individual.child_of_family_id:
+            cof_family_id = root_individual.child_of_family_id[0]
+        cof_family = self._instances[('f', cof_family_id)]
+        gr_cof_family = None
+        if cof_family:
+            gr_cof_family = cof_family.graphical_representations[0]
+        return gr_root_individual, gr_cof_family
+
+    def _place_root_individual(self, gr_root_individual, gr_cof_family, x_offset):
+        """
+        Place the selected descendants of a root individual with the chart layout.
+
+        Args:
+            gr_root_individual (GraphicalIndividual): root individual
+            gr_cof_family (GraphicalFamily): child-of-family of the root individual
+            x_offset (int): starting position
+        """
+        if self._positioning['chart_layout'] == 'cactus':
+            self.place_selected_individuals_cactus(
+                gr_root_individual, gr_cof_family, x_offset)
+        else:
+            self.place_selected_individuals_enclosing(
+                gr_root_individual, gr_cof_family, x_offset)
+
+    def _get_placed_individuals(self, gr_root_individual):
+        """
+        Get the individuals which might be placed together with a root individual, i.e. the
+        descendants and their spouses in all visible marriages.
+
+        Args:
+            gr_root_individual (GraphicalIndividual): root individual
+
+        Returns:
+            set: g_ids of the individuals
+        """
+        g_ids = {gr_root_individual.g_id}
+        gr_individuals = [gr_root_individual]
+        while gr_individuals:
+            gr_individual = gr_individuals.pop()
+            for gr_marriage in gr_individual.visible_marriages:
+                gr_spouse = gr_marriage.get_gr_spouse(gr_individual)
+                for gr_descendant in [gr_spouse] + gr_marriage.visible_children:
+                    if gr_descendant is not None and gr_descendant.g_id not in g_ids:
+                        g_ids.add(gr_descendant.g_id)
+                        gr_individuals.append(gr_descendant)
+        return g_ids
+
+    def _place_root_individuals_in_parallel(self):
+        """
+        Place the descendants of independent root individuals in worker processes. Root individuals are
+        independent, if they do not share descendants or spouses with other root individuals. The others
+        are placed in order afterwards, so that shared individuals are placed by the first root individual.
+
+        Returns:
+            dict: index of the root individual -> placement at x_index 0, see place_root_individuals
+        """
+        processes = self._positioning['placement_processes']
+        root_individuals = self._chart_configuration['root_individuals']
+        if processes <= 1 or len(root_individuals) < 2 or not is_parallel_placement_available():
+            return {}
+        placed_individuals = OrderedDict()
+        for index, settings in enumerate(root_individuals):
+            placement = self._get_root_individual_placement(settings)
+            if placement is not None:
+                placed_individuals[index] = self._get_placed_individuals(placement[0])
+        # number of root individuals which place an individual
+        counts = {}
+        for g_ids in placed_individuals.values():
+            for g_id in g_ids:
+                counts[g_id] = counts.get(g_id, 0) + 1
+        individual_indices = {gr_individual.g_id: index for index, gr_individual in enumerate(self.gr_individuals)}
+        tasks = [
+            (index, sorted(individual_indices[g_id] for g_id in g_ids))
+            for index, g_ids in placed_individuals.items() if all(counts[g_id] == 1 for g_id in g_ids)]
+        if len(tasks) < 2:
+            return {}
+        return {index: placement for (index, _), placement in zip(tasks, place_root_individuals(self, tasks, processes))}
+
+    def _apply_root_individual_placement(self, placement, x_offset):
+        """
+        Set the positions which have been calculated in a worker process.
+
+        Args:
+            placement (dict): placement at x_index 0, see place_root_individuals
+            x_offset (int): starting position
+        """
+        gr_families = {gr_family.g_id: gr_family for gr_family in self.gr_families}
+        for individual_index, g_id, ordinal_value, x_index, is_parent in placement['positions']:
+            self.gr_individuals[individual_index].set_position_vector(
+                x_index + x_offset, gr_families.get(g_id), is_parent, overrule_ov=ordinal_value)
+        for individual_index, number_of_descendants in placement['number_of_descendants'].items():
+            self.gr_individuals[individual_index].special_properties['number_of_descendants'] = number_of_descendants
+        min_x_index, max_x_index = placement['x_index_range']
+        self.min_x_index = min(self.min_x_index, min_x_index + x_offset)
+        self.max_x_index = max(self.max_x_index, max_x_index + x_offset)
+        min_ordinal, max_ordinal = placement['ordinal_range']
+        if min_ordinal is not None and max_ordinal is not None:
+            if self.min_ordinal is not None and self.max_ordinal is not None:
+                self.min_ordinal = min(self.min_ordinal, min_ordinal)
+                self.max_ordinal = max(self.max_ordinal, max_ordinal)
+            else:
+                self.min_ordinal = min_ordinal
+                self.max_ordinal = max_ordinal
+
+    def _place_and_modify_layout(self):
+        """
+        Place the selected descendants of the root individuals and improve the placement
+        """
+        placements = self._place_root_individuals_in_parallel()
+        x_pos = 0
+        for index, settings in enumerate(self._chart_configuration['root_individuals']):
+            if 'x_offset' in settings:
+                x_pos += settings['x_offset']
+            placement = self._get_root_individual_placement(settings)
+            if placement is None:
+                continue
+            gr_root_individual, gr_cof_family = placement
+            if index in placements:
+                self._apply_root_individual_placement(placements[index], x_pos)
+            else:
+                self._place_root_individual(gr_root_individual, gr_cof_family, x_pos)
+
+            x_pos += gr_root_individual.get_descendant_width(gr_cof_family)
+            self._layout_budget.advance('placement', len(self._chart_configuration['root_individuals']))
+
+        if self._positioning['layout_mode'] == 'fast':
+            self._modify_layout_fast()
+            return
+
+        for settings in self._chart_configuration['root_individuals']:
+            root_individual_id = settings['individual_id']
+            generations = settings['generations']
+            try:
+                self.modify_layout(root_individual_id)
+            except Exception:
+                pass
+
     def update_chart(
         self, filter_lambda=None, color_lambda=None,
         images_lambda=None, rebuild_all=False, update_view=False,
-        clear_before_rebuild=True
+        clear_before_rebuild=True, layout_cache_dir=None, layout_budget=None
     ):
         """
         Update the chart, caching of positioning data is regarded
@@ -358,10 +602,17 @@ class DescendantChart(BaseSVGChart):
             rebuild_all (bool, optional): clear cache, rebuild everything. Defaults to False.
             update_view (bool, optional): update formatting only. Defaults to False.
             clear_before_rebuild (bool, optional): clear instances before rebuilding the chart. Defaults to True.
+            layout_cache_dir (str, optional): directory of layout snapshots. Without filter_lambda, a saved
+                layout is restored instead of calculating it. Defaults to None (no snapshots).
+            layout_budget (LayoutBudget, optional): time budget, cancellation and progress reporting of the
+                layout. If it is exhausted, the optimization stops early. Defaults to None (unlimited).
 
         Returns:
             bool: view has changed
         """
+        self._layout_budget = layout_budget if layout_budget is not None else LayoutBudget()
+        self._layout_budget.start()
+        expansion = None if rebuild_all or not clear_before_rebuild else self._get_generation_expansion(filter_lambda)
         rebuild_all = rebuild_all or self._positioning != self._backup_positioning or \
             self._chart_configuration != self._backup_chart_configuration
         update_view = update_view or rebuild_all or self._formatting != self._backup_formatting
@@ -386,49 +637,16 @@ class DescendantChart(BaseSVGChart):
             return 1
 
         if rebuild_all:
-            if clear_before_rebuild:
-                self.clear_graphical_representations()
-            for settings in self._chart_configuration['root_individuals']:
-                root_individual_id = settings['individual_id']
-                generations = settings['generations']
-                root_individual = self._instances[(
-                    'i', root_individual_id)]
-                self.select_descendants(root_individual, None, generations, filter=local_filter_lambda)
-
-            x_pos = 0
-            for settings in self._chart_configuration['root_individuals']:
-                if 'x_offset' in settings:
-                    x_pos += settings['x_offset']
-                root_individual_id = settings['individual_id']
-                generations = settings['generations']
-                root_individual = self._instances[(
-                    'i', root_individual_id)]
-                if root_individual is None:
-                    continue
-                gr_root_individual = root_individual.graphical_representations[0]
-                cof_family_id = None
-                if root_individual.child_of_family_id:
-                    cof_family_id = root_individual.child_of_family_id[0]
-                cof_family = self._instances[('f', cof_family_id)]
-                gr_cof_family = None
-                if cof_family:
-                    gr_cof_family = cof_family.graphical_representations[0]
-                if self._positioning['chart_layout'] == 'cactus':
-                    self.place_selected_individuals_cactus(
-                        gr_root_individual, gr_cof_family, x_pos)
-                else:
-                    self.place_selected_individuals_enclosing(
-                        gr_root_individual, gr_cof_family, x_pos)
-
-                x_pos += gr_root_individual.get_descendant_width(gr_cof_family)
-
-            for settings in self._chart_configuration['root_individuals']:
-                root_individual_id = settings['individual_id']
-                generations = settings['generations']
-                try:
-                    self.modify_layout(root_individual_id)
-                except Exception:
-                    pass
+            if not self._try_to_expand_layout(expansion, local_filter_lambda):
+                if clear_before_rebuild:
+                    self.clear_graphical_representations()
+                layout_filename = None
+                if layout_cache_dir and filter_lambda is None and clear_before_rebuild:
+                    layout_filename = get_layout_filename(self, layout_cache_dir)
+                if layout_filename is None or not load_layout(self, layout_filename):
+                    self._calculate_layout(local_filter_lambda)
+                    if layout_filename and not self._layout_budget.exhausted:
+                        save_layout(self, layout_filename)
 
             for gir in self.gr_individuals:
                 gir.weight = weighting_lambda(gir)
@@ -491,4 +709,5 @@ class DescendantChart(BaseSVGChart):
         self._backup_chart_configuration = deepcopy(self._chart_configuration)
         self._backup_formatting = deepcopy(self._formatting)
         self._backup_positioning = deepcopy(self._positioning)
+        self._backup_filter_lambda = filter_lambda
         return update_view or rebuild_all
@@ -0,0 +1,127 @@
+import os
+import logging
+import hashlib
+import pickle
+
+from .ReadGedcom import read_data, read_data_compact
+from .GedcomParsing import get_relevant_events
+
+logging.basicConfig()  # level=20)
+logger = logging.getLogger("life_line_chart")
+
+# increase if the content of the cache files changes
+_cache_version = 2
+
+
+def get_file_hash(filename):
+    """
+    get the sha1 hash of the file content
+
+    Args:
+        filename (str): file
+
+    Returns:
+        str: hex digest
+    """
+    file_hash = hashlib.sha1()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
+
+def get_cache_key(filename):
+    """
+    get the key which identifies the content of a gedcom file
+
+    Args:
+        filename (str): gedcom file
+
+    Returns:
+        tuple: path, size, modification time, content hash
+    """
+    stat = os.stat(filename)
+    return (
+        os.path.abspath(filename),
+        stat.st_size,
+        stat.st_mtime_ns,
+        get_file_hash(filename))
+
+
+def get_cache_filename(filename, cache_dir, compact=False):
+    """
+    get the cache file of a gedcom file
+
+    Args:
+        filename (str): gedcom file
+        cache_dir (str): cache directory
+        compact (bool, optional): compact record store. Defaults to False.
+
+    Returns:
+        str: cache file
+    """
+    path_hash = hashlib.sha1(os.path.abspath(filename).encode('utf8')).hexdigest()
+    return os.path.join(cache_dir, path_hash + ('_compact' if compact else '') + '.pickle')
+
+
+def get_relevant_events_of_all(database_indi):
+    """
+    parse the events of all individuals
+
+    Args:
+        database_indi (dict): individual database
+
+    Returns:
+        dict: events of every individual id
+    """
+    database_events = {}
+    for individual_id in database_indi:
+        get_relevant_events(database_indi, database_events, individual_id)
+    return database_events
+
+
+def read_data_cached(filename, cache_dir, compact=False):
+    """
+    read a gedcom file and use the cache file if it is valid. Otherwise the cache file is rewritten.
+
+    Args:
+        filename (str): gedcom file
+        cache_dir (str): cache directory
+        compact (bool, optional): use the compact record store. Defaults to False.
+
+    Returns:
+        tuple: individual database, family database, events of the individuals, content hash of the parsed file
+    """
+    cache_key = get_cache_key(filename)
+    cache_filename = get_cache_filename(filename, cache_dir, compact)
+    try:
+        with open(cache_filename, 'rb') as f:
+            version, key, data = pickle.load(f)
+        if version == _cache_version and key == cache_key:
+            logger.debug('read cache file ' + cache_filename)
+            return data + (key[3],)
+        logger.debug('cache file is outdated ' + cache_filename)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.info('failed to read cache file ' + cache_filename + ': ' + str(e))
+
+    # the file might have been changed in the meantime, the key contains the hash of the parsed content
+    file_hash = hashlib.sha1()
+    if compact:
+        database_indi, database_fam = read_data_compact(filename, file_hash=file_hash)
+    else:
+        database_indi, database_fam = read_data(filename, file_hash=file_hash)
+    cache_key = cache_key[:3] + (file_hash.hexdigest(),)
+    data = database_indi, database_fam, get_relevant_events_of_all(database_indi)
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # write to a temporary file first, so that a concurrent reader never sees a partial file
+        temp_filename = cache_filename + '.' + str(os.getpid()) + '.tmp'
+        with open(temp_filename, 'wb') as f:
+            pickle.dump((_cache_version, cache_key, data), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_filename, cache_filename)
+    except OSError as e:
+        logger.info('failed to write cache file ' + cache_filename + ': ' + str(e))
+    return data + (cache_key[3],)
@@ -8,10 +8,11 @@ class GedcomFamily(BaseFamily):
     GedcomFamily class for gedcom files
     """
 
-    def __init__(self, instances, database_fam, database_indi, family_id):
+    def __init__(self, instances, database_fam, database_indi, family_id, database_events=None):
         BaseFamily.__init__(self, instances, family_id)
         self._database_fam = database_fam
         self._database_indi = database_indi
+        self._database_events = database_events if database_events is not None else {}
         self._initialize()
 
     def _initialize(self):
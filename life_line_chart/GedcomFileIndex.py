@@ -0,0 +1,194 @@
+import hashlib
+import io
+import mmap
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from .ReadGedcom import _parse_gedcom_lines
+
+
+class GedcomFileIndex():
+    """
+    Index of the records in a memory mapped gedcom file
+
+    A single scan over the file collects the byte ranges of all INDI and FAM
+    records. The records are parsed only when they are accessed.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._file = open(filename, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files cannot be mapped
+            self._mmap = b''
+        self.indi_ranges = OrderedDict()
+        self.fam_ranges = OrderedDict()
+        self._build_index()
+
+    def _iter_level_0_lines(self):
+        """
+        iterate over the start positions of the level 0 lines. Apart from the
+        first line, level 0 lines must not be indented.
+        """
+        data = self._mmap
+        position = 3 if data[:3] == b'\xef\xbb\xbf' else 0
+        yield position
+        while True:
+            position = data.find(b'\n0 ', position)
+            if position < 0:
+                return
+            position += 1
+            yield position
+
+    def _build_index(self):
+        data = self._mmap
+        size = len(data)
+        # byte ranges of the current record and its start
+        ranges = None
+        start = None
+        for position in self._iter_level_0_lines():
+            line_end = data.find(b'\n', position)
+            if line_end < 0:
+                line_end = size
+            line = data[position:line_end].decode('utf-8', 'replace').rstrip('\r').lstrip()
+            level, _, line = line.partition(' ')
+            if level != '0':
+                continue
+            if ranges is not None:
+                ranges.append((start, position))
+            xref, _, record_type = line.partition(' ')
+            if record_type == 'INDI':
+                ranges = self.indi_ranges.setdefault(xref, [])
+            elif record_type == 'FAM':
+                ranges = self.fam_ranges.setdefault(xref, [])
+            else:
+                ranges = None
+            start = position
+        if ranges is not None:
+            ranges.append((start, size))
+
+    def read_records(self, ranges):
+        """
+        get a text stream of records
+
+        Args:
+            ranges (list): byte ranges of the records
+
+        Returns:
+            io.TextIOWrapper: gedcom lines
+        """
+        data = b''.join(self._mmap[start:end] for start, end in ranges)
+        return io.TextIOWrapper(io.BytesIO(data), encoding='utf-8')
+
+    def parse_record(self, xref, ranges, record_type):
+        """
+        parse the tag tree of a record
+
+        Args:
+            xref (str): xref of the record
+            ranges (list): byte ranges of the record (several if the xref is repeated)
+            record_type (str): 'INDI' or 'FAM'
+
+        Returns:
+            OrderedDict: record like in the result of ReadGedcom.read_data
+        """
+        indi_database = OrderedDict()
+        fam_database = OrderedDict()
+        with self.read_records(ranges) as f:
+            _parse_gedcom_lines(f, indi_database, fam_database)
+        if record_type == 'INDI':
+            return indi_database[xref]
+        return fam_database[xref]
+
+    def get_record_hashes(self):
+        """
+        get the hashes of the raw records
+
+        Returns:
+            dict: sha1 digest of every record key, e.g. ('i', '@I1@')
+        """
+        record_hashes = {}
+        for key_type, record_ranges in (('i', self.indi_ranges), ('f', self.fam_ranges)):
+            for xref, ranges in record_ranges.items():
+                record_hash = hashlib.sha1()
+                for start, end in ranges:
+                    record_hash.update(self._mmap[start:end])
+                record_hashes[(key_type, xref)] = record_hash.digest()
+        return record_hashes
+
+    def get_file_hash(self):
+        """
+        get the hash of the indexed file content
+
+        Returns:
+            str: sha1 hex digest
+        """
+        return hashlib.sha1(self._mmap).hexdigest()
+
+    def close(self):
+        """
+        close the memory map and the file
+        """
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+        self._file.close()
+
+
+class GedcomLazyDatabase(Mapping):
+    """
+    Read-only mapping from gedcom xref to the record, which is parsed on first access
+    """
+
+    def __init__(self, file_index, ranges, record_type):
+        self._file_index = file_index
+        self._ranges = ranges
+        self._record_type = record_type
+        self._records = {}
+
+    def update(self, file_index, ranges, changed_ids):
+        """
+        use the index of the changed file. Parsed records which did not change are kept.
+
+        Args:
+            file_index (GedcomFileIndex): index of the changed file
+            ranges (dict): byte ranges of the records in the changed file
+            changed_ids (iterable): ids of the changed records
+        """
+        self._file_index = file_index
+        self._ranges = ranges
+        for key in changed_ids:
+            self._records.pop(key, None)
+
+    def __getitem__(self, key):
+        record = self._records.get(key)
+        if record is None:
+            record = self._file_index.parse_record(key, self._ranges[key], self._record_type)
+            self._records[key] = record
+        return record
+
+    def __contains__(self, key):
+        return key in self._ranges
+
+    def __iter__(self):
+        return iter(self._ranges)
+
+    def __len__(self):
+        return len(self._ranges)
+
+
+def read_data_lazy(filename):
+    """
+    index a gedcom file. The records are parsed when they are accessed.
+
+    Args:
+        filename (str): gedcom file
+
+    Returns:
+        tuple: individual database, family database
+    """
+    file_index = GedcomFileIndex(filename)
+    return (
+        GedcomLazyDatabase(file_index, file_index.indi_ranges, 'INDI'),
+        GedcomLazyDatabase(file_index, file_index.fam_ranges, 'FAM'))
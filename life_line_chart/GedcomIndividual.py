@@ -1,5 +1,5 @@
 from .BaseIndividual import BaseIndividual, estimate_birth_date, estimate_death_date
-from .GedcomParsing import _get_relevant_events
+from .GedcomParsing import get_relevant_events
 from .Exceptions import LifeLineChartNotEnoughInformationToDisplay
 
 
@@ -8,10 +8,11 @@ class GedcomIndividual(BaseIndividual):
     GedcomIndividual class for gedcom files
     """
 
-    def __init__(self, instances, database_fam, database_indi, individual_id):
+    def __init__(self, instances, database_fam, database_indi, individual_id, database_events=None):
         BaseIndividual.__init__(self, instances, individual_id)
         self._database_fam = database_fam
         self._database_indi = database_indi
+        self._database_events = database_events if database_events is not None else {}
         self._initialize()
 
     def _initialize(self):
@@ -19,8 +20,8 @@ class GedcomIndividual(BaseIndividual):
         if 'FAMC' in self._database_indi[self.individual_id]:
             self.child_of_family_id = self._database_indi[self.individual_id]['FAMC']['tag_data'].split(
                 '\n')
-        _get_relevant_events(self._database_indi,
-                             self.individual_id, self.events)
+        self.events.update(get_relevant_events(
+            self._database_indi, self._database_events, self.individual_id))
         estimate_birth_date(self, self._instances)
         estimate_death_date(self)
         if self.events['birth_or_christening'] is None:
@@ -1,67 +1,176 @@
-import os
+import hashlib
 import logging
-import json
 from collections import OrderedDict
 
 from .GedcomIndividual import GedcomIndividual
 from .GedcomFamily import GedcomFamily
-from .ReadGedcom import read_data
+from .ReadGedcom import read_data, read_data_compact, _parse_gedcom_lines
+from .GedcomRecordStore import GedcomRecordDatabase
+from .GedcomCache import read_data_cached
+from .GedcomFileIndex import GedcomFileIndex, GedcomLazyDatabase, read_data_lazy
 from .InstanceContainer import InstanceContainer
+from .Exceptions import LifeLineChartNotEnoughInformationToDisplay
 
 logging.basicConfig()  # level=20)
 logger = logging.getLogger("life_line_chart")
 
 
-def get_gedcom_instance_container(filename='gramps_testdata.ged'):
+def get_gedcom_instance_container(filename='gramps_testdata.ged', compact=False, cache_dir=None, lazy=False, reloadable=False):
     """
     instance container for families and individuals from gedcom file
 
     Args:
         filename (str, optional): gedcom file. Defaults to 'gramps_testdata.ged'.
+        compact (bool, optional): use the compact record store. Defaults to False.
+        cache_dir (str, optional): directory for cache files of the parsed gedcom file. Defaults to None (no cache).
+        lazy (bool, optional): index the memory mapped file and parse the records on first access. Defaults to False.
+            Cannot be combined with compact or cache_dir.
+        reloadable (bool, optional): store hashes of the records, so that reload only parses changed records. Defaults to False.
+
+    Raises:
+        ValueError: lazy is combined with compact or cache_dir
 
     Returns:
         InstanceContainer: instance container
     """
+    if lazy and (compact or cache_dir):
+        raise ValueError('the lazy access cannot be combined with the compact record store or the cache')
     logger.debug('start reading data')
-    if True:
-        if filename:
-            # read gedcom and write json
-            database_indi, database_fam = read_data(filename)
-            # self.database_indi, self.database_fam = read_data('--- febr. 2015.ged')
-            # open(os.path.join('..', os.path.dirname(__file__), 'indi.json'),'w').write(json.dumps(database_indi))
-            # open(os.path.join('..', os.path.dirname(__file__), 'fam.json'),'w').write(json.dumps(database_fam))
+    # index of the parsed events of the individuals, shared by all instances
+    database_events = {}
+    # hash of the parsed file content
+    content_hash = None
+    if filename:
+        if lazy:
+            database_indi, database_fam = read_data_lazy(filename)
+            content_hash = database_indi._file_index.get_file_hash()
+        elif cache_dir:
+            database_indi, database_fam, database_events, content_hash = read_data_cached(filename, cache_dir, compact)
         else:
-            database_indi = OrderedDict()
-            database_fam = OrderedDict()
+            file_hash = hashlib.sha1()
+            if compact:
+                database_indi, database_fam = read_data_compact(filename, file_hash=file_hash)
+            else:
+                database_indi, database_fam = read_data(filename, file_hash=file_hash)
+            content_hash = file_hash.hexdigest()
     else:
-        # read json
-        database_indi = json.loads(
-            open(os.path.join('..', os.path.dirname(__file__), 'indi.json'), 'r').read(),
-            object_pairs_hook=OrderedDict)
-        database_fam = json.loads(
-            open(os.path.join('..', os.path.dirname(__file__), 'fam.json'), 'r').read(),
-            object_pairs_hook=OrderedDict)
+        database_indi = OrderedDict()
+        database_fam = OrderedDict()
+
+    # hashes of the raw records to find the changed records on reload
+    record_hashes = {}
+    if filename and reloadable:
+        if lazy:
+            record_hashes.update(database_indi._file_index.get_record_hashes())
+        else:
+            file_index = GedcomFileIndex(filename)
+            record_hashes.update(file_index.get_record_hashes())
+            file_index.close()
 
     def instantiate_all(self, database_fam, database_indi):
-        for family_id in list(database_fam.keys()):
-            if not ('f', family_id) in self:
-                try:
-                    self[('f', family_id)] = GedcomFamily(
-                        self, database_fam, database_indi, family_id)
-                except Exception:
-                    pass
-        for individual_id in list(database_indi.keys()):
-            if not ('i', individual_id) in self:
-                try:
-                    self[('i', individual_id)] = GedcomIndividual(
-                        self, database_fam, database_indi, individual_id)
-                except Exception:
-                    pass
+        """
+        build all families and individuals. Records which cannot be displayed are set to None,
+        the reason is stored in self.dropped_records.
+
+        The families only depend on the event index and the individuals only on the families
+        (marriages and the parents marriage for the birth estimation). So all families are
+        built first and the individuals find them already instantiated.
+        """
+        data = self._data
+        for family_id in database_fam:
+            if ('f', family_id) not in data:
+                self[('f', family_id)]
+        for individual_id in database_indi:
+            if ('i', individual_id) not in data:
+                self[('i', individual_id)]
+
+    def construct_family(self, key):
+        if key[1] not in database_fam:
+            raise LifeLineChartNotEnoughInformationToDisplay(
+                "family record is missing " + key[1])
+        family = GedcomFamily(self, database_fam, database_indi, key[1], database_events)
+        # children without record are reported, the family is still displayed
+        for child_id in family.children_individual_ids:
+            if child_id not in database_indi:
+                self[('i', child_id)]
+        return family
+
+    def construct_individual(self, key):
+        if key[1] not in database_indi:
+            raise LifeLineChartNotEnoughInformationToDisplay(
+                "individual record is missing " + key[1])
+        return GedcomIndividual(self, database_fam, database_indi, key[1], database_events)
+
+    def reload(self, new_filename=None):
+        """
+        read the gedcom file again after it has been changed. Only the changed records are
+        parsed and only the instances which depend on them are removed from the container.
+        If the container is not reloadable, all records are parsed again.
+
+        Args:
+            new_filename (str, optional): gedcom file. Defaults to None (the file which was read before).
+
+        Returns:
+            set: keys of the removed instances
+        """
+        nonlocal filename
+        if new_filename:
+            filename = new_filename
+        file_index = GedcomFileIndex(filename)
+        new_record_hashes = file_index.get_record_hashes()
+        content_hash = file_index.get_file_hash()
+        if record_hashes:
+            changed_keys = {
+                key for key in record_hashes.keys() | new_record_hashes.keys()
+                if record_hashes.get(key) != new_record_hashes.get(key)}
+        else:
+            # the records of the previous file are unknown
+            changed_keys = set(new_record_hashes)
+            changed_keys.update(('i', individual_id) for individual_id in database_indi)
+            changed_keys.update(('f', family_id) for family_id in database_fam)
+        record_hashes.clear()
+        record_hashes.update(new_record_hashes)
+
+        changed_indi_ids = [key[1] for key in changed_keys if key[0] == 'i']
+        changed_fam_ids = [key[1] for key in changed_keys if key[0] == 'f']
+        new_ranges = [
+            range_ for xref in changed_indi_ids for range_ in file_index.indi_ranges.get(xref, [])
+        ] + [
+            range_ for xref in changed_fam_ids for range_ in file_index.fam_ranges.get(xref, [])
+        ]
+        if isinstance(database_indi, GedcomLazyDatabase):
+            old_file_index = database_indi._file_index
+            database_indi.update(file_index, file_index.indi_ranges, changed_indi_ids)
+            database_fam.update(file_index, file_index.fam_ranges, changed_fam_ids)
+            old_file_index.close()
+        else:
+            with file_index.read_records(new_ranges) as f:
+                if isinstance(database_indi, GedcomRecordDatabase):
+                    database_indi._store.replace_records(f, changed_indi_ids, changed_fam_ids)
+                else:
+                    new_database_indi = OrderedDict()
+                    new_database_fam = OrderedDict()
+                    _parse_gedcom_lines(f, new_database_indi, new_database_fam)
+                    for database, new_database, changed_ids in (
+                            (database_indi, new_database_indi, changed_indi_ids),
+                            (database_fam, new_database_fam, changed_fam_ids)):
+                        for xref in changed_ids:
+                            if xref in new_database:
+                                database[xref] = new_database[xref]
+                            else:
+                                database.pop(xref, None)
+            file_index.close()
+
+        for individual_id in changed_indi_ids:
+            database_events.pop(individual_id, None)
+        self.content_hash = content_hash
+        return self.invalidate(changed_keys)
 
     logger.debug('start creating instances')
-    return InstanceContainer(
-        lambda self, key: GedcomFamily(
-            self, database_fam, database_indi, key[1]),
-        lambda self, key: GedcomIndividual(
-            self, database_fam, database_indi, key[1]),
-        lambda self: instantiate_all(self, database_fam, database_indi))
+    instance_container = InstanceContainer(
+        construct_family,
+        construct_individual,
+        lambda self: instantiate_all(self, database_fam, database_indi),
+        reload)
+    instance_container.content_hash = content_hash
+    return instance_container
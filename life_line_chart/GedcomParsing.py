@@ -1,4 +1,5 @@
 import datetime
+import functools
 import re
 
 
@@ -41,6 +42,162 @@ _max_days = {
 }
 
 
+_month_numbers = {month: index + 1 for index, month in enumerate(_months)}
+
+
+class ImmutableEvent(dict):
+    """
+    Read-only event dict. The parsed events are shared between all individuals
+    and families with the same date string, so they must not be changed.
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError('event records are read-only')
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = __ior__ = _readonly
+
+    def __reduce__(self):
+        return (ImmutableEvent, (dict(self),))
+
+
+def _create_event(tag_name, date_min, date_max, comment, precision):
+    if tag_name in ['BURI', 'DEAT']:
+        # if unknown move to the end of the year
+        date = date_max
+    else:
+        # if unknown move to the beginning of the year
+        date = date_min
+
+    return ImmutableEvent((
+        ('tag_name', tag_name),
+        ('date', date),
+        ('ordinal_value', date.toordinal()),
+        ('ordinal_value_max', date_max.toordinal()),
+        ('ordinal_value_min', date_min.toordinal()),
+        ('comment', comment),
+        ('precision', precision)
+    ))
+
+
+def _parse_date_expr(content, tag_name):
+    """
+    parse a gedcom date string with the regular expressions
+
+    Args:
+        content (str): gedcom date string
+        tag_name (str): event type
+
+    Returns:
+        ImmutableEvent: event
+    """
+    comment = None
+    precision = ''
+    date_info = _date_expr.match(content)
+    if date_info is None:
+        date_info = _interval_expr.match(content)
+    if date_info.group(1) == 'EST':
+        comment = 'Estimated'
+    elif date_info.group(1) == 'ABT':
+        comment = 'About'
+    elif date_info.group(1) == 'CAL':
+        comment = 'Calculated'
+    elif date_info.group(1) == 'AFT':
+        comment = 'After'
+    elif date_info.group(1) == 'BEF':
+        comment = 'Before'
+    elif date_info.group(1) == 'BET':
+        comment = 'Between'
+    elif date_info.group(2) is None and date_info.group(3) is None and date_info.group(4) is not None:
+        comment = 'YearPrecision'
+
+    month_max_, day_max_ = 12, 31
+    month_min_, day_min_ = 1, 1
+    year_min, year_max = None, None
+    month_max, day_max = None, None
+    month_min, day_min = None, None
+
+    if date_info.group(1) == 'BET':
+        if date_info.group(7):
+            year_max = int(date_info.group(7))
+        if date_info.group(6):
+            month_max = _month_numbers[date_info.group(6)]
+        if date_info.group(5):
+            day_max = int(date_info.group(5))
+
+    if date_info.group(4):
+        year_min = int(date_info.group(4))
+        if not year_max:
+            year_max = year_min
+        precision = 'y' + precision
+    if date_info.group(3):
+        month_min = _month_numbers[date_info.group(3)]
+        if not month_max:
+            month_max = month_min
+        precision = 'm' + precision
+    if date_info.group(2):
+        day_min = int(date_info.group(2))
+        if not day_max:
+            day_max = day_min
+        precision = 'd' + precision
+
+    if date_info.group(1) == 'AFT':
+        year_max = year_min + 15
+    elif date_info.group(1) == 'BEF':
+        year_min = year_max - 15
+
+    if not month_max:
+        month_max = month_max_
+    if not month_min:
+        month_min = month_min_
+    if not day_max:
+        day_max = day_max_
+    if not day_min:
+        day_min = day_min_
+
+    day_max = min(_max_days[month_max], day_max)
+
+    date_min = datetime.datetime(year_min, month_min, day_min, 0, 0, 0, 0)
+    date_max = datetime.datetime(year_max, month_max, day_max, 0, 0, 0, 0)
+
+    return _create_event(tag_name, date_min, date_max, comment, precision)
+
+
+@functools.lru_cache(maxsize=65536)
+def _parse_date(content, tag_name):
+    """
+    parse a gedcom date string. The common forms "D MON YYYY" and "YYYY" are
+    parsed without regular expressions. The results are memoized, since
+    genealogy files repeat the same date strings very often.
+
+    Args:
+        content (str): gedcom date string
+        tag_name (str): event type
+
+    Returns:
+        ImmutableEvent: event or None if the date cannot be parsed
+    """
+    try:
+        parts = content.split(' ')
+        if len(parts) == 1:
+            year = parts[0]
+            if len(year) == 4 and year.isdecimal():
+                year = int(year)
+                return _create_event(
+                    tag_name,
+                    datetime.datetime(year, 1, 1),
+                    datetime.datetime(year, 12, 31),
+                    'YearPrecision', 'y')
+        elif len(parts) == 3:
+            day, month, year = parts
+            # day 0 stands for the whole month, which is left to the regular expressions
+            if day.isdecimal() and int(day) and month in _month_numbers and len(year) == 4 and year.isdecimal():
+                date = datetime.datetime(int(year), _month_numbers[month], int(day))
+                return _create_event(tag_name, date, date, None, 'dmy')
+        return _parse_date_expr(content, tag_name)
+    except Exception:
+        return None
+
+
 def get_date_dict_from_tag(parent_item, tag_name):
     """
     read the date from a gedcom tag
@@ -48,6 +205,9 @@ def get_date_dict_from_tag(parent_item, tag_name):
     Args:
         parent_item (dict): parent event node to output the result
         tag_name (str): event type
+
+    Returns:
+        ImmutableEvent: event or None
     """
 
     # TODO: Implement BET = Between
@@ -56,99 +216,7 @@ def get_date_dict_from_tag(parent_item, tag_name):
             return
         if 'DATE' not in parent_item[tag_name]:
             return
-        comment = None
-        precision = ''
-        content = parent_item[tag_name]['DATE']['tag_data']
-        date_info = _date_expr.match(content)
-        if date_info is None:
-            date_info = _interval_expr.match(content)
-        if date_info.group(1) == 'EST':
-            comment = 'Estimated'
-        elif date_info.group(1) == 'ABT':
-            comment = 'About'
-        elif date_info.group(1) == 'CAL':
-            comment = 'Calculated'
-        elif date_info.group(1) == 'AFT':
-            comment = 'After'
-        elif date_info.group(1) == 'BEF':
-            comment = 'Before'
-        elif date_info.group(1) == 'BET':
-            comment = 'Between'
-        elif date_info.group(2) is None and date_info.group(3) is None and date_info.group(4) is not None:
-            comment = 'YearPrecision'
-
-        month_max_, day_max_ = 12, 31
-        month_min_, day_min_ = 1, 1
-        year_min, year_max = None, None
-        month_max, day_max = None, None
-        month_min, day_min = None, None
-
-        if date_info.group(1) == 'BET':
-            if date_info.group(7):
-                year_max = int(date_info.group(7))
-            if date_info.group(6):
-                month_max = _months.index(date_info.group(6)) + 1
-            if date_info.group(5):
-                day_max = int(date_info.group(5))
-
-        if date_info.group(4):
-            year_min = int(date_info.group(4))
-            if not year_max:
-                year_max = year_min
-            precision = 'y' + precision
-        if date_info.group(3):
-            month_min = _months.index(date_info.group(3)) + 1
-            if not month_max:
-                month_max = month_min
-            precision = 'm' + precision
-        if date_info.group(2):
-            day_min = int(date_info.group(2))
-            if not day_max:
-                day_max = day_min
-            precision = 'd' + precision
-
-        if date_info.group(1) == 'AFT':
-            year_max = year_min + 15
-        elif date_info.group(1) == 'BEF':
-            year_min = year_max - 15
-
-        if not month_max:
-            month_max = month_max_
-        if not month_min:
-            month_min = month_min_
-        if not day_max:
-            day_max = day_max_
-        if not day_min:
-            day_min = day_min_
-
-        day_max = min(_max_days[month_max], day_max)
-
-        date_min = datetime.datetime(year_min, month_min, day_min, 0, 0, 0, 0)
-        try:
-            date_max = datetime.datetime(year_max, month_max, day_max, 0, 0, 0, 0)
-        except ValueError:
-            if month_max == 2:
-                date_max = datetime.datetime(year_max, month_max, day_max, 0, 0, 0, 0)
-            else:
-                raise
-
-        if tag_name in ['BURI', 'DEAT']:
-            # if unknown move to the end of the year
-            date = date_max
-        else:
-            # if unknown move to the beginning of the year
-            date = date_min
-
-        return {
-            'tag_name': tag_name,
-            'date': date,
-            'ordinal_value': date.toordinal(),
-            'ordinal_value_max': date_max.toordinal(),
-            'ordinal_value_min': date_min.toordinal(),
-            'comment': comment,
-            'precision': precision
-        }
-
+        return _parse_date(parent_item[tag_name]['DATE']['tag_data'], tag_name)
     except Exception:
         pass
 
@@ -202,19 +270,42 @@ def _get_relevant_events(database_indi, individual_id, target):
         target['death_or_burial'] = None
 
 
+def get_relevant_events(database_indi, database_events, individual_id):
+    """
+    get the events of an individual from the event index. The events are parsed on first access.
+
+    Args:
+        database_indi (dict): individual database
+        database_events (dict): event index, i.e. the events of every individual id
+        individual_id (str): individual id
+
+    Returns:
+        dict: events of the individual (must not be changed)
+    """
+    events = database_events.get(individual_id)
+    if events is None:
+        events = {}
+        _get_relevant_events(database_indi, individual_id, events)
+        database_events[individual_id] = events
+    return events
+
+
 def estimate_marriage_date(family):
     """
     If the marriage date is unknown, then estimate the date by assuming:
         - the marriage took place before the first child was born
 
+    Children without record are skipped.
+
     Args:
         family (BaseFamily): family instance
     """
     if family.marriage is None:
         children_events = []
         for child in family.children_individual_ids:
-            child_events = {}
-            _get_relevant_events(family._database_indi, child, child_events)
+            if child not in family._database_indi:
+                continue
+            child_events = get_relevant_events(family._database_indi, family._database_events, child)
             if child_events['birth_or_christening']:
                 children_events.append(child_events['birth_or_christening'])
 
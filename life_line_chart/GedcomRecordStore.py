@@ -0,0 +1,214 @@
+from array import array
+from collections.abc import Mapping
+
+
+class GedcomRecordStore():
+    """
+    Compact storage of gedcom records
+
+    Instead of one dict per gedcom line, every line is a node in flat arrays:
+        - the tag name as index into the interned tag list
+        - the tag data as index into the string table (equal strings are stored once)
+        - the index behind the last node of the subtree
+
+    The records are exposed as read-only mappings which behave like the
+    nested OrderedDict trees created by ReadGedcom.read_data.
+    """
+
+    def __init__(self):
+        self._tags = []
+        self._tag_ids = {}
+        self._strings = []
+        self._string_ids = {}
+        self._node_tag = array('i')
+        self._node_data = array('i')
+        self._node_end = array('i')
+        self.indi_records = {}
+        self.fam_records = {}
+
+    def _intern_tag(self, tag_name):
+        tag_id = self._tag_ids.get(tag_name)
+        if tag_id is None:
+            tag_id = len(self._tags)
+            self._tag_ids[tag_name] = tag_id
+            self._tags.append(tag_name)
+        return tag_id
+
+    def _intern_string(self, data):
+        string_id = self._string_ids.get(data)
+        if string_id is None:
+            string_id = len(self._strings)
+            self._string_ids[data] = string_id
+            self._strings.append(data)
+        return string_id
+
+    def _add_node(self, tag_name, tag_data):
+        node = len(self._node_tag)
+        self._node_tag.append(self._intern_tag(tag_name))
+        self._node_data.append(self._intern_string(tag_data))
+        self._node_end.append(node + 1)
+        return node
+
+    def parse_lines(self, lines):
+        """
+        parse gedcom lines and add the INDI and FAM records to the store
+
+        Args:
+            lines (iterable): gedcom lines, e.g. an open file
+        """
+        node_end = self._node_end
+        # open_nodes[level] is the node of this level which is still open.
+        # records is None while skipping records which are neither INDI nor FAM
+        open_nodes = []
+        records = None
+        for line in lines:
+            line = line.rstrip('\n').lstrip()
+            if not line:
+                continue
+            level, _, line = line.partition(' ')
+            try:
+                level = int(level)
+            except ValueError:
+                continue
+            tag_name, _, tag_data = line.partition(' ')
+            if level == 0:
+                if tag_data == 'INDI':
+                    records = self.indi_records
+                elif tag_data == 'FAM':
+                    records = self.fam_records
+                else:
+                    records = None
+            elif records is None or level > len(open_nodes):
+                # content of skipped records or a broken level hierarchy
+                continue
+            # the subtrees of the previous lines end here
+            end = len(node_end)
+            for node in open_nodes[level:]:
+                node_end[node] = end
+            del open_nodes[level:]
+            if records is None:
+                continue
+            node = self._add_node(tag_name, tag_data)
+            if level == 0:
+                if tag_name in records:
+                    records[tag_name] += (node,)
+                else:
+                    records[tag_name] = (node,)
+            open_nodes.append(node)
+        end = len(node_end)
+        for node in open_nodes:
+            node_end[node] = end
+
+    def replace_records(self, lines, indi_ids, fam_ids):
+        """
+        replace records, e.g. after the gedcom file changed. The nodes of the old
+        records stay in the arrays, so after many changes a new store is smaller.
+
+        Args:
+            lines (iterable): gedcom lines of the new records
+            indi_ids (iterable): ids of the individual records which are replaced or removed
+            fam_ids (iterable): ids of the family records which are replaced or removed
+        """
+        for individual_id in indi_ids:
+            self.indi_records.pop(individual_id, None)
+        for family_id in fam_ids:
+            self.fam_records.pop(family_id, None)
+        self.parse_lines(lines)
+
+    def get_databases(self):
+        """
+        get the read-only databases of individuals and families
+
+        Returns:
+            tuple: individual database, family database
+        """
+        return GedcomRecordDatabase(self, self.indi_records), GedcomRecordDatabase(self, self.fam_records)
+
+
+class GedcomRecordDatabase(Mapping):
+    """
+    Read-only mapping from gedcom xref to the record view
+    """
+
+    def __init__(self, store, records):
+        self._store = store
+        self._records = records
+
+    def __getitem__(self, key):
+        return GedcomRecordView(self._store, self._records[key])
+
+    def __contains__(self, key):
+        return key in self._records
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __len__(self):
+        return len(self._records)
+
+
+class GedcomRecordView(Mapping):
+    """
+    Read-only mapping view of a gedcom node
+
+    Like in the nested dict representation, repeated tags are merged: the
+    tag data is joined with a newline and the children are combined.
+    """
+
+    __slots__ = ('_store', '_nodes')
+
+    def __init__(self, store, nodes):
+        self._store = store
+        self._nodes = nodes
+
+    def _iter_children(self):
+        node_end = self._store._node_end
+        for node in self._nodes:
+            child = node + 1
+            end = node_end[node]
+            while child < end:
+                yield child
+                child = node_end[child]
+
+    def _get_children(self, tag_name):
+        tag_id = self._store._tag_ids.get(tag_name)
+        if tag_id is None:
+            return ()
+        node_tag = self._store._node_tag
+        return tuple(child for child in self._iter_children() if node_tag[child] == tag_id)
+
+    def __getitem__(self, key):
+        if key == 'tag_data':
+            strings = self._store._strings
+            node_data = self._store._node_data
+            return '\n'.join(strings[node_data[node]] for node in self._nodes)
+        children = self._get_children(key)
+        if not children:
+            raise KeyError(key)
+        return GedcomRecordView(self._store, children)
+
+    def __contains__(self, key):
+        if key == 'tag_data':
+            return True
+        tag_id = self._store._tag_ids.get(key)
+        if tag_id is None:
+            return False
+        node_tag = self._store._node_tag
+        return any(node_tag[child] == tag_id for child in self._iter_children())
+
+    def __iter__(self):
+        yield 'tag_data'
+        tags = self._store._tags
+        node_tag = self._store._node_tag
+        seen = set()
+        for child in self._iter_children():
+            tag_id = node_tag[child]
+            if tag_id not in seen:
+                seen.add(tag_id)
+                yield tags[tag_id]
+
+    def __len__(self):
+        return 1 + len({self._store._node_tag[child] for child in self._iter_children()})
+
+    def __repr__(self):
+        return 'GedcomRecordView(' + repr(list(self.items())) + ')'
@@ -95,8 +95,7 @@ class GraphicalFamily():
             self.visible_children.append(gr_child)
             self.visible_children.sort()
         if gr_child is not None:
-            self.__instances.connection_container['f'][self.g_id][gr_child.g_id].append('weak_child')
-            self.__instances.connection_container['i'][gr_child.g_id][self.g_id].append('weak_child')
+            self.__instances.add_connection(gr_child.g_id, self.g_id, 'weak_child')
 
     @property
     def connected_children(self):
@@ -167,8 +166,7 @@ class GraphicalFamily():
     @gr_husb.setter
     def gr_husb(self, gr_husb):
         if gr_husb is not None:
-            self.__instances.connection_container['f'][self.g_id][gr_husb.g_id].append('gr_husb')
-            self.__instances.connection_container['i'][gr_husb.g_id][self.g_id].append('gr_husb')
+            self.__instances.add_connection(gr_husb.g_id, self.g_id, 'gr_husb')
 
     @property
     def gr_wife(self):
@@ -187,8 +185,7 @@ class GraphicalFamily():
     @gr_wife.setter
     def gr_wife(self, gr_wife):
         if gr_wife is not None:
-            self.__instances.connection_container['f'][self.g_id][gr_wife.g_id].append('gr_wife')
-            self.__instances.connection_container['i'][gr_wife.g_id][self.g_id].append('gr_wife')
+            self.__instances.add_connection(gr_wife.g_id, self.g_id, 'gr_wife')
 
     @property
     def descendant_chart_parent_family_placement(self):
@@ -1,6 +1,8 @@
 from .GedcomIndividual import GedcomIndividual
 from .Exceptions import LifeLineChartUnknownPlacementError
 from collections import OrderedDict
+from .Traversal import run_iteratively
+from .PositionTable import PositionView
 
 
 class GraphicalIndividual():
@@ -103,14 +105,26 @@ class GraphicalIndividual():
         Returns:
             tuple: x_min, x_max
         """
+        return run_iteratively(self._get_ancestor_range_steps(gr_family))
+
+    def _get_ancestor_range_steps(self, gr_family):
+        """
+        Steps of get_ancestor_range, see run_iteratively.
+        """
         gr_family_g_id = None
         if gr_family is not None:
             gr_family_g_id = gr_family.g_id
             # at least root node has None
-        if (self.g_id, gr_family_g_id) in self.__instances.ancestor_width_cache:
+        ancestor_width_cache = self.__instances.ancestor_width_cache
+        cache_key = (self.g_id, gr_family_g_id)
+        cached_range = ancestor_width_cache.get_range(cache_key)
+        if cached_range is not None:
             # caching
-            return self.__instances.ancestor_width_cache[(self.g_id, gr_family_g_id)]
-        x_v = [self._x_position[gr_family_g_id][1]]
+            return cached_range
+        # positions and cache entries which are used, to invalidate the entry if they change
+        read_g_ids = [self.g_id]
+        used_keys = []
+        x_v = [self._x_position.get_x_index(gr_family_g_id)]
         x_min = x_v.copy()
         x_max = x_v.copy()
         # if [3] is true, then that index is the ancestor family
@@ -121,15 +135,17 @@ class GraphicalIndividual():
             gr_father = strongly_connected_parent_family.gr_husb
             if gr_father:
                 # only handle if the father is visible
-                f_x_min, f_x_max = gr_father.get_ancestor_range(
+                f_x_min, f_x_max = yield gr_father._get_ancestor_range_steps(
                     strongly_connected_parent_family)
+                used_keys.append((gr_father.g_id, strongly_connected_parent_family.g_id))
                 x_min.append(f_x_min)
                 x_max.append(f_x_max)
             gr_mother = strongly_connected_parent_family.gr_wife
             if gr_mother:
                 # only handle if the mother is visible
-                m_x_min, m_x_max = gr_mother.get_ancestor_range(
+                m_x_min, m_x_max = yield gr_mother._get_ancestor_range_steps(
                     strongly_connected_parent_family)
+                used_keys.append((gr_mother.g_id, strongly_connected_parent_family.g_id))
                 x_min.append(m_x_min)
                 x_max.append(m_x_max)
             # add siblings
@@ -137,10 +153,11 @@ class GraphicalIndividual():
                    if strongly_connected_parent_family.g_id in gr_c.get_position_dict()]
             x_min += x_v
             x_max += x_v
+            read_g_ids += [gr_c.g_id for gr_c in strongly_connected_parent_family.visible_children]
 
         x_min = min(x_min)
         x_max = max(x_max)
-        self.__instances.ancestor_width_cache[(self.g_id, gr_family_g_id)] = x_min, x_max
+        ancestor_width_cache.add_range(cache_key, (x_min, x_max), read_g_ids, used_keys)
         return x_min, x_max
 
     def get_descendant_width(self, gr_family):
@@ -169,6 +186,12 @@ class GraphicalIndividual():
         Returns:
             tuple: x_min, x_max
         """
+        return run_iteratively(self._get_descendant_range_steps(gr_family))
+
+    def _get_descendant_range_steps(self, gr_family):
+        """
+        Steps of get_descendant_range, see run_iteratively.
+        """
         family_id = None
         family = None
         family_g_id = None
@@ -177,10 +200,16 @@ class GraphicalIndividual():
             family = gr_family.family
             family_g_id = gr_family.g_id
             # at least root node has None
-        if (self.individual_id, family_id) in self.__instances.ancestor_width_cache:
+        # the individual_id is not unique if an individual has several graphical representations
+        descendant_range_cache = self.__instances.descendant_range_cache
+        cache_key = (self.g_id, family_g_id)
+        cached_range = descendant_range_cache.get_range(cache_key)
+        if cached_range is not None:
             # caching
-            # return self.__instances.ancestor_width_cache[(self.individual_id, family_id)]
-            pass
+            return cached_range
+        # positions and cache entries which are used, to invalidate the entry if they change
+        read_g_ids = [self.g_id]
+        used_keys = []
 
         x_min = []
         x_max = []
@@ -204,27 +233,29 @@ class GraphicalIndividual():
             if (family_id is None or gr_marriage.visual_placement_parent_family is not None and
                 gr_marriage.visual_placement_parent_family.family_id == family_id
                 ):
-                x_min.append(self._x_position[gr_marriage.g_id][1])
-                x_max.append(self._x_position[gr_marriage.g_id][1])
+                x_min.append(self._x_position.get_x_index(gr_marriage.g_id))
+                x_max.append(self._x_position.get_x_index(gr_marriage.g_id))
 
                 for gr_child in gr_marriage.visible_children:
-                    c_x_min, c_x_max = gr_child.get_descendant_range(gr_marriage)
+                    c_x_min, c_x_max = yield gr_child._get_descendant_range_steps(gr_marriage)
+                    used_keys.append((gr_child.g_id, gr_marriage.g_id))
                     x_min.append(c_x_min)
                     x_max.append(c_x_max)
 
                 gr_spouse = gr_marriage.get_gr_spouse(self)
                 if gr_spouse:
+                    read_g_ids.append(gr_spouse.g_id)
                     x_v = gr_spouse.get_x_index(gr_marriage.g_id)
                     x_min.append(x_v)
                     x_max.append(x_v)
 
         if len(x_min) == 0 and len(x_max) == 0:
-            x_v = [self._x_position[family_g_id][1]]
+            x_v = [self._x_position.get_x_index(family_g_id)]
             x_min += x_v
             x_max += x_v
         x_min = min(x_min)
         x_max = max(x_max)
-        self.__instances.ancestor_width_cache[(self.individual_id, family_id)] = x_min, x_max
+        descendant_range_cache.add_range(cache_key, (x_min, x_max), read_g_ids, used_keys)
         return x_min, x_max
 
     @property
@@ -235,16 +266,7 @@ class GraphicalIndividual():
         Returns:
             list: list of visible marriages
         """
-        if self.g_id not in self.__instances.connection_container['i']:
-            return []
-        connected_parent_families = []
-        for g_id, connections in self.__instances.connection_container['i'][self.g_id].items():
-            if 'gr_husb' in connections or 'gr_wife' in connections:
-                connected_parent_families.append(self.__instances[('f', g_id[1])].graphical_representations[g_id[0]])
-        if len(connected_parent_families) > 0:
-            connected_parent_families.sort()
-            return connected_parent_families
-        return []
+        return self.__instances.adjacency.get_visible_marriages(self.g_id)
 
     @property
     def connected_parent_families(self):
@@ -254,15 +276,7 @@ class GraphicalIndividual():
         Returns:
             list: list of parent families
         """
-        if self.g_id not in self.__instances.connection_container['i']:
-            return []
-        connected_parent_families = []
-        for g_id, connections in self.__instances.connection_container['i'][self.g_id].items():
-            if 'weak_child' in connections:
-                connected_parent_families.append(self.__instances[('f', g_id[1])].graphical_representations[g_id[0]])
-        if len(connected_parent_families) > 0:
-            return connected_parent_families
-        return []
+        return self.__instances.adjacency.get_connected_parent_families(self.g_id)
 
     @property
     def ancestor_chart_parent_family_placement(self):
@@ -301,11 +315,9 @@ class GraphicalIndividual():
     def ancestor_chart_parent_family_placement(self, gr_families):
         gr_parent_family, gr_spouse_family = gr_families
         if gr_parent_family is not None:
-            self.__instances.connection_container['i'][self.g_id][gr_parent_family.g_id].append('strong_child')
-            self.__instances.connection_container['f'][gr_parent_family.g_id][self.g_id].append('strong_child')
+            self.__instances.add_connection(self.g_id, gr_parent_family.g_id, 'strong_child')
         if gr_spouse_family is not None:
-            self.__instances.connection_container['i'][self.g_id][gr_spouse_family.g_id].append('strong_marriage')
-            self.__instances.connection_container['f'][gr_spouse_family.g_id][self.g_id].append('strong_marriage')
+            self.__instances.add_connection(self.g_id, gr_spouse_family.g_id, 'strong_marriage')
 
     def get_name(self):
         return self.individual.get_name()
@@ -337,7 +349,7 @@ class GraphicalIndividual():
         return OrderedDict([(k, v) for k, v in self._x_position.items() if not v[3]])
 
     def get_x_index(self, g_id):
-        return self._x_position.get(g_id)[1]
+        return self._x_position.get_x_index(g_id)
 
     def get_other_family_connected_to_birth_position(self, gr_family):
         if gr_family is not None:
@@ -388,13 +400,17 @@ class GraphicalIndividual():
         if overrule_ov:
             ov = overrule_ov
         if not self._x_position:
-            self._x_position = OrderedDict()
+            self._x_position = PositionView(self.__instances.position_table)
         if g_id not in self._x_position:
-            self._x_position[g_id] = (
-                (ov, x_position, gr_family, this_is_the_parent_family))
-        _x_position = OrderedDict()
-        _x_position.update(OrderedDict(sorted(self._x_position.items(), key=lambda t: t[1][0])))
-        self._x_position = _x_position
+            self.__instances.ancestor_width_cache.invalidate_individual(self.g_id)
+            self.__instances.descendant_range_cache.invalidate_individual(self.g_id)
+            self._x_position.add(g_id, ov, x_position, gr_family, this_is_the_parent_family)
+
+    def clear_position_vector(self):
+        """
+        Remove all positions, so that the individual can be placed again.
+        """
+        self._x_position = None
 
     x_position = property(get_position_dict, set_position_vector)
 
@@ -430,8 +446,7 @@ class GraphicalIndividual():
         else:
             return
             g_id = None
-        self.__instances.connection_container['i'][self.g_id][g_id].append('strong_marriage')
-        self.__instances.connection_container['f'][g_id][self.g_id].append('strong_marriage')
+        self.__instances.add_connection(self.g_id, g_id, 'strong_marriage')
 
     def is_cross_connection(self, gr_family_a, gr_family_b):
         """
@@ -526,22 +541,74 @@ class GraphicalIndividual():
             list: list of ancestors
         """
         gr_ancestors = []
+        run_iteratively(self._get_all_ancestors_steps(gr_ancestors))
+        return gr_ancestors
+
+    def _get_all_ancestors_steps(self, gr_ancestors):
+        """
+        Steps of get_all_ancestors, see run_iteratively.
+
+        Args:
+            gr_ancestors (list): list which receives the ancestors
+        """
         strongly_connected_parent_family, strongly_connected_spouse_family = self.ancestor_chart_parent_family_placement
         if strongly_connected_parent_family:
             if strongly_connected_parent_family.gr_husb:
                 gr_ancestors += [(strongly_connected_parent_family, strongly_connected_parent_family.gr_husb)]
-                gr_ancestors += strongly_connected_parent_family.gr_husb.get_all_ancestors()
+                yield strongly_connected_parent_family.gr_husb._get_all_ancestors_steps(gr_ancestors)
             gr_ancestors += [(strongly_connected_parent_family, c) for c in strongly_connected_parent_family.visible_children]
             if strongly_connected_parent_family.gr_wife:
                 gr_ancestors += [(strongly_connected_parent_family, strongly_connected_parent_family.gr_wife)]
-                gr_ancestors += strongly_connected_parent_family.gr_wife.get_all_ancestors()
-        return gr_ancestors
+                yield strongly_connected_parent_family.gr_wife._get_all_ancestors_steps(gr_ancestors)
 
     def get_all_descendants(self):
+        """
+        get all descendants placed below this individual
+
+        Returns:
+            list: list of (family, descendant) tuples
+        """
         gr_descendants = []
+        run_iteratively(self._get_all_descendants_steps(gr_descendants))
+        return gr_descendants
+
+    def _get_all_descendants_steps(self, gr_descendants):
+        """
+        Steps of get_all_descendants, see run_iteratively.
+
+        Args:
+            gr_descendants (list): list which receives the descendants
+        """
         for vm in self.visible_marriages:
             for vc in vm.visible_children:
                 if not self.connected_parent_families or vm.descendant_chart_parent_family_placement == self.connected_parent_families[0]:
                     gr_descendants += [(vm, vc)]
-                    gr_descendants += vc.get_all_descendants()
-        return gr_descendants
+                    yield vc._get_all_descendants_steps(gr_descendants)
+
+    def get_number_of_descendants(self, descendant_counts=None):
+        """
+        get the number of descendants placed below this individual, i.e. len(get_all_descendants())
+
+        Args:
+            descendant_counts (dict, optional): counts of g_ids which have already been counted. Defaults to None.
+
+        Returns:
+            int: number of descendants
+        """
+        if descendant_counts is None:
+            descendant_counts = {}
+        return run_iteratively(self._get_number_of_descendants_steps(descendant_counts))
+
+    def _get_number_of_descendants_steps(self, descendant_counts):
+        """
+        Steps of get_number_of_descendants, see run_iteratively.
+        """
+        if self.g_id in descendant_counts:
+            return descendant_counts[self.g_id]
+        number_of_descendants = 0
+        for vm in self.visible_marriages:
+            for vc in vm.visible_children:
+                if not self.connected_parent_families or vm.descendant_chart_parent_family_placement == self.connected_parent_families[0]:
+                    number_of_descendants += 1 + (yield vc._get_number_of_descendants_steps(descendant_counts))
+        descendant_counts[self.g_id] = number_of_descendants
+        return number_of_descendants
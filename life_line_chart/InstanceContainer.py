@@ -1,4 +1,7 @@
 from .Exceptions import LifeLineChartNotEnoughInformationToDisplay
+from .RangeCache import RangeCache
+from .ConnectionAdjacency import ConnectionAdjacency
+from .PositionTable import PositionTable
 import logging
 import hashlib
 from collections import OrderedDict
@@ -46,14 +49,20 @@ class InstanceContainer():
         'Between': '{symbol}\xa0{date}'
     }
 
-    def __init__(self, family_constructor, individual_constructor, instantiate_all):
+    def __init__(self, family_constructor, individual_constructor, instantiate_all, reload=None):
         self._data = OrderedDict(((('i', None), None), (('f', None), None)))
         self._family_constructor = family_constructor
         self._individual_constructor = individual_constructor
         self.instantiate_all = instantiate_all
-        self.ancestor_width_cache = OrderedDict()
+        self.reload = reload
+        self.dropped_records = OrderedDict()  # : reasons why records could not be instantiated
+        self.content_hash = None  # : hash of the database content, identifies saved layouts
+        self.ancestor_width_cache = RangeCache()
+        self.descendant_range_cache = RangeCache()
         self.connection_container = OrderedDict()
         self.connection_container.update(OrderedDict((('i', connection_container_type()), ('f', connection_container_type()))))
+        self.adjacency = ConnectionAdjacency(self)
+        self.position_table = PositionTable()
         self.color_getters = {
             'unique': self.color_generator_unique,
             'surname': self.color_generator_surname
@@ -95,6 +104,7 @@ class InstanceContainer():
                     self._data[key] = item
                 except LifeLineChartNotEnoughInformationToDisplay as e:
                     logger.info(str(e))
+                    self.dropped_records[key] = str(e)
                     item = None
                     self._data[key] = item
             return item
@@ -106,6 +116,7 @@ class InstanceContainer():
                     self._data[key] = item
                 except LifeLineChartNotEnoughInformationToDisplay as e:
                     logger.info(str(e))
+                    self.dropped_records[key] = str(e)
                     item = None
                     self._data[key] = item
             return item
@@ -120,12 +131,68 @@ class InstanceContainer():
         """
         self._data.clear()
         self._data.update(OrderedDict({('i', None): None, ('f', None): None}))
+        self.dropped_records.clear()
         self.ancestor_width_cache.clear()
+        self.descendant_range_cache.clear()
         self.clear_connections()
 
+    def invalidate(self, changed_keys):
+        """
+        remove the instances of changed records and all instances which depend on them, so that
+        they are rebuilt on the next access:
+            - families of which a changed individual is a child (estimated marriage date)
+            - individuals which are spouse or child of an invalidated family
+        Dropped records are removed as well, since they might have enough information now.
+
+        Args:
+            changed_keys (iterable): keys of the changed records, e.g. ('i', '@I1@')
+
+        Returns:
+            set: keys of the removed instances
+        """
+        invalid_keys = set(changed_keys)
+        changed_individual_ids = {key[1] for key in invalid_keys if key[0] == 'i'}
+        invalid_family_ids = {key[1] for key in invalid_keys if key[0] == 'f'}
+        for key, instance in self.items():
+            if key[0] == 'f':
+                if instance is None or not changed_individual_ids.isdisjoint(instance.children_individual_ids):
+                    invalid_family_ids.add(key[1])
+                    invalid_keys.add(key)
+        for key, instance in self.items():
+            if key[0] == 'i':
+                if (
+                    instance is None
+                    or not invalid_family_ids.isdisjoint(instance.child_of_family_id)
+                    or not invalid_family_ids.isdisjoint(instance._marriage_family_ids)
+                ):
+                    invalid_keys.add(key)
+        invalid_keys = {key for key in invalid_keys if key in self._data and key[1] is not None}
+        for key in invalid_keys:
+            del self._data[key]
+            self.dropped_records.pop(key, None)
+        if invalid_keys:
+            self.ancestor_width_cache.clear()
+            self.descendant_range_cache.clear()
+            self.adjacency.clear()
+        return invalid_keys
+
     def clear_connections(self):
         self.connection_container.clear()
         self.connection_container.update(OrderedDict({'i': connection_container_type(), 'f': connection_container_type()}))
+        self.adjacency.clear()
+
+    def add_connection(self, individual_g_id, family_g_id, connection):
+        """
+        add a connection between a graphical individual and a graphical family
+
+        Args:
+            individual_g_id (tuple): g_id of the graphical individual
+            family_g_id (tuple): g_id of the graphical family
+            connection (str): type of the connection, e.g. 'weak_child'
+        """
+        self.connection_container['i'][individual_g_id][family_g_id].append(connection)
+        self.connection_container['f'][family_g_id][individual_g_id].append(connection)
+        self.adjacency.invalidate_individual(individual_g_id)
 
     def color_generator_unique(self, gr_individual):
         """
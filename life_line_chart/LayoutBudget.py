@@ -0,0 +1,66 @@
+from time import monotonic
+
+
+class LayoutBudget():
+    """
+    Time budget, cancellation and progress reporting of the layout calculation
+
+    The optimization steps of the layout (flipping and compression) check the budget between two
+    steps. If it is exhausted, they stop and the chart keeps the consistent layout of the last
+    finished step. The selection and placement of the individuals is always finished.
+    """
+
+    def __init__(self, time_limit=None, cancellation_token=None, progress_callback=None):
+        """
+        Args:
+            time_limit (float, optional): seconds available for the layout, counted from start(). Defaults to None (unlimited).
+            cancellation_token (threading.Event, optional): the layout is cancelled as soon as the event is set.
+                Any object with is_set() can be used. Defaults to None.
+            progress_callback (function, optional): called with the name of the stage and the finished
+                fraction (0..1) of it. Defaults to None.
+        """
+        self.time_limit = time_limit
+        self.cancellation_token = cancellation_token
+        self.progress_callback = progress_callback
+        self.exhausted = False
+        self._deadline = None
+        # stage -> number of finished steps
+        self._finished_steps = {}
+
+    def start(self):
+        """
+        Start the time budget and the progress of all stages.
+        """
+        self.exhausted = False
+        self._finished_steps.clear()
+        if self.time_limit is not None:
+            self._deadline = monotonic() + self.time_limit
+
+    def is_exhausted(self):
+        """
+        Check if the layout has been cancelled or the time budget has run out. Once exhausted,
+        the budget stays exhausted until it is started again.
+
+        Returns:
+            bool: no further optimization steps should be done
+        """
+        if not self.exhausted:
+            if self.cancellation_token is not None and self.cancellation_token.is_set():
+                self.exhausted = True
+            elif self._deadline is not None and monotonic() > self._deadline:
+                self.exhausted = True
+        return self.exhausted
+
+    def advance(self, stage, total_steps, steps=1):
+        """
+        Report that more steps of a stage have been finished.
+
+        Args:
+            stage (str): name of the stage, e.g. 'flipping' or 'compression'
+            total_steps (int): expected number of steps of the stage
+            steps (int, optional): number of finished steps. Defaults to 1.
+        """
+        finished_steps = self._finished_steps.get(stage, 0) + steps
+        self._finished_steps[stage] = finished_steps
+        if self.progress_callback is not None:
+            self.progress_callback(stage, min(1.0, finished_steps / total_steps) if total_steps else 1.0)
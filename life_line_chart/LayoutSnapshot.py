@@ -0,0 +1,216 @@
+import os
+import logging
+import hashlib
+import pickle
+
+logging.basicConfig()  # level=20)
+logger = logging.getLogger("life_line_chart")
+
+# increase if the content of the snapshot files changes
+_layout_version = 1
+
+
+def get_layout_key(chart):
+    """
+    get the key which identifies a layout: the content of the database, the chart type,
+    the chart configuration and the positioning
+
+    Args:
+        chart (BaseChart): chart
+
+    Returns:
+        str: hex digest or None if the content of the database is unknown
+    """
+    content_hash = chart._instances.content_hash
+    if content_hash is None:
+        return None
+    return hashlib.sha1(repr((
+        _layout_version,
+        content_hash,
+        type(chart).__name__,
+        chart._chart_configuration,
+        chart._positioning)).encode('utf8')).hexdigest()
+
+
+def get_layout_filename(chart, layout_cache_dir):
+    """
+    get the snapshot file of the current layout of a chart
+
+    Args:
+        chart (BaseChart): chart
+        layout_cache_dir (str): directory of the snapshot files
+
+    Returns:
+        str: snapshot file or None if the layout cannot be identified
+    """
+    layout_key = get_layout_key(chart)
+    if layout_key is None:
+        return None
+    return os.path.join(layout_cache_dir, layout_key + '.layout.pickle')
+
+
+def _get_position_map_data(position_to_person_map):
+    return [
+        (x_index, [
+            (
+                entry['start'],
+                entry['end'],
+                entry['individual'].g_id,
+                entry['family'].g_id if entry['family'] else None)
+            for entry in entries])
+        for x_index, entries in position_to_person_map.items()]
+
+
+def save_layout(chart, filename):
+    """
+    save the layout of a chart: the graphical representations with their positions and
+    the connection container. Errors are logged, since the snapshot is only a cache.
+
+    Args:
+        chart (BaseChart): chart with a finished layout
+        filename (str): snapshot file
+    """
+    connection_container = chart._instances.connection_container
+    data = {
+        'individuals': [
+            (
+                gr_individual.g_id,
+                [
+                    (g_id, ov, x_index, is_parent)
+                    for g_id, (ov, x_index, _, is_parent) in (gr_individual.get_position_dict() or {}).items()],
+                gr_individual.qualified_for_placement,
+                gr_individual.special_properties,
+                gr_individual.debug_label)
+            for gr_individual in chart.gr_individuals],
+        'families': [
+            (
+                gr_family.g_id,
+                [gr_child.g_id for gr_child in gr_family.visible_children],
+                gr_family.visual_placement_parent_family.g_id if gr_family.visual_placement_parent_family else None)
+            for gr_family in chart.gr_families],
+        'connections': {
+            side: [
+                (g_id, [(other_g_id, list(connections)) for other_g_id, connections in other_g_ids.items()])
+                for g_id, other_g_ids in connection_container[side].items()]
+            for side in ('i', 'f')},
+        'position_to_person_map': _get_position_map_data(chart.position_to_person_map),
+        'bounds': (chart.min_x_index, chart.max_x_index, chart.min_ordinal, chart.max_ordinal),
+    }
+    try:
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # write to a temporary file first, so that a concurrent reader never sees a partial file
+        temp_filename = filename + '.' + str(os.getpid()) + '.tmp'
+        with open(temp_filename, 'wb') as f:
+            pickle.dump((_layout_version, get_layout_key(chart), data), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_filename, filename)
+    except OSError as e:
+        logger.info('failed to write layout file ' + filename + ': ' + str(e))
+
+
+def _add_graphical_representation(instance, graphical_representation, g_id):
+    """
+    put a restored graphical representation to the index of its g_id
+    """
+    graphical_representations = instance.graphical_representations
+    graphical_representations.remove(graphical_representation)
+    while len(graphical_representations) <= g_id[0]:
+        graphical_representations.append(None)
+    graphical_representations[g_id[0]] = graphical_representation
+    graphical_representation.g_id = g_id
+
+
+def _has_all_instances(instances, data):
+    """
+    check that the families and individuals of all graphical representations of a snapshot exist
+
+    Args:
+        instances (InstanceContainer): instance container of the chart
+        data (dict): layout data of the snapshot
+
+    Returns:
+        bool: all instances exist
+    """
+    return (
+        all(instances[('f', g_id[1])] is not None for g_id, _, _ in data['families']) and
+        all(instances[('i', g_id[1])] is not None for g_id, _, _, _, _ in data['individuals']))
+
+
+def load_layout(chart, filename):
+    """
+    restore the layout of a chart which has been saved with save_layout. The chart must not
+    have graphical representations. After restoring, the svg items can be defined.
+
+    Args:
+        chart (BaseChart): chart with the configuration and positioning of the saved layout
+        filename (str): snapshot file
+
+    Returns:
+        bool: the layout has been restored
+    """
+    instances = chart._instances
+    try:
+        with open(filename, 'rb') as f:
+            version, key, data = pickle.load(f)
+        if version != _layout_version or key != get_layout_key(chart):
+            logger.debug('layout file is outdated ' + filename)
+            return False
+        # the graphical representations are only created, if none of them is missing
+        if not _has_all_instances(instances, data):
+            logger.info('layout file refers to missing records ' + filename)
+            return False
+    except FileNotFoundError:
+        return False
+    except Exception as e:
+        logger.info('failed to read layout file ' + filename + ': ' + str(e))
+        return False
+    logger.debug('read layout file ' + filename)
+
+    gr_individuals = {}
+    gr_families = {}
+    for g_id, _, _ in data['families']:
+        gr_family = chart._graphical_family_class(instances, g_id[1])
+        _add_graphical_representation(gr_family.family, gr_family, g_id)
+        chart.gr_families.append(gr_family)
+        gr_families[g_id] = gr_family
+    for g_id, _, qualified_for_placement, special_properties, debug_label in data['individuals']:
+        gr_individual = chart._graphical_individual_class(instances, g_id[1])
+        _add_graphical_representation(gr_individual.individual, gr_individual, g_id)
+        gr_individual.qualified_for_placement = qualified_for_placement
+        gr_individual.special_properties = special_properties
+        gr_individual.debug_label = debug_label
+        gr_individual.color = (0, 0, 0)
+        chart.gr_individuals.append(gr_individual)
+        gr_individuals[g_id] = gr_individual
+
+    for side in ('i', 'f'):
+        connection_container = instances.connection_container[side]
+        for g_id, other_g_ids in data['connections'][side]:
+            for other_g_id, connections in other_g_ids:
+                connection_container[g_id][other_g_id] = connections
+    instances.adjacency.clear()
+
+    for g_id, visible_children, visual_placement_parent_family in data['families']:
+        gr_family = gr_families[g_id]
+        gr_family.visible_children = [gr_individuals[child_g_id] for child_g_id in visible_children]
+        if visual_placement_parent_family is not None:
+            gr_family.visual_placement_parent_family = gr_families[visual_placement_parent_family]
+    for g_id, positions, _, _, _ in data['individuals']:
+        gr_individual = gr_individuals[g_id]
+        for family_g_id, ov, x_index, is_parent in positions:
+            gr_family = gr_families[family_g_id] if family_g_id is not None else None
+            gr_individual.set_position_vector(x_index, gr_family, is_parent, overrule_ov=ov)
+
+    chart.position_to_person_map = {
+        x_index: [
+            {
+                'start': start_y,
+                'end': end_y,
+                'individual': gr_individuals[individual_g_id],
+                'family': gr_families[family_g_id] if family_g_id is not None else None
+            }
+            for start_y, end_y, individual_g_id, family_g_id in entries]
+        for x_index, entries in data['position_to_person_map']}
+    chart.min_x_index, chart.max_x_index, chart.min_ordinal, chart.max_ordinal = data['bounds']
+    return True
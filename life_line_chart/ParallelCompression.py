@@ -0,0 +1,58 @@
+from multiprocessing import get_all_start_methods, get_context
+
+# chart of the worker process, inherited from the parent process
+_chart = None
+
+
+def is_parallel_compression_available():
+    """
+    The worker processes inherit the chart from the parent process, which requires the fork start method.
+
+    Returns:
+        bool: compression in worker processes is possible
+    """
+    return 'fork' in get_all_start_methods()
+
+
+def _initialize_worker(chart):
+    global _chart
+    _chart = chart
+    # the progress is reported by the parent process
+    chart._layout_budget.progress_callback = None
+
+
+def _compress_branch(task):
+    """
+    Compress one independent branch in a worker process.
+
+    Args:
+        task (tuple): index of the family in gr_families, slots of the positions of the branch
+
+    Returns:
+        tuple: x_indices of the slots after the compression, compression offsets of the branch
+    """
+    family_index, slots = task
+    chart = _chart
+    chart._compression_offsets = {}
+    chart.debug_optimization_compression_steps = 1e30
+    chart._reset_collision_index()
+    chart._compress_chart_ancestor_graph(chart.gr_families[family_index])
+    x_indices = chart._instances.position_table.x_indices
+    return [x_indices[slot] for slot in slots], chart._compression_offsets
+
+
+def compress_branches(chart, tasks, processes):
+    """
+    Compress independent branches of an ancestor chart in worker processes. The workers get a copy
+    of the chart when they are started, the chart itself is not changed.
+
+    Args:
+        chart (AncestorChart): chart
+        tasks (list): list of (index of the family in gr_families, slots of the positions of the branch) tuples
+        processes (int): number of worker processes
+
+    Returns:
+        list: (x_indices of the slots, compression offsets) of every task
+    """
+    with get_context('fork').Pool(processes, _initialize_worker, (chart,)) as pool:
+        return pool.map(_compress_branch, tasks, chunksize=1)
@@ -0,0 +1,84 @@
+from multiprocessing import get_all_start_methods, get_context
+
+# chart of the worker process, inherited from the parent process
+_chart = None
+
+
+def is_parallel_placement_available():
+    """
+    The worker processes inherit the chart from the parent process, which requires the fork start method.
+
+    Returns:
+        bool: placement in worker processes is possible
+    """
+    return 'fork' in get_all_start_methods()
+
+
+def _initialize_worker(chart):
+    global _chart
+    _chart = chart
+
+
+def _place_root_individual(task):
+    """
+    Place the descendants of one root individual at x_index 0 in a worker process.
+
+    Args:
+        task (tuple): index of the root individual, indices of the placed individuals in gr_individuals
+
+    Returns:
+        dict: placement of the root individual, see place_root_individuals
+    """
+    root_index, individual_indices = task
+    chart = _chart
+    chart.min_x_index = 10000000
+    chart.max_x_index = -10000000
+    chart.min_ordinal = None
+    chart.max_ordinal = None
+    first_slot = len(chart._instances.position_table)
+    gr_root_individual, gr_cof_family = chart._get_root_individual_placement(
+        chart._chart_configuration['root_individuals'][root_index])
+    chart._place_root_individual(gr_root_individual, gr_cof_family, 0)
+
+    position_table = chart._instances.position_table
+    positions = []
+    number_of_descendants = {}
+    for individual_index in individual_indices:
+        gr_individual = chart.gr_individuals[individual_index]
+        if 'number_of_descendants' in gr_individual.special_properties:
+            number_of_descendants[individual_index] = gr_individual.special_properties['number_of_descendants']
+        position_dict = gr_individual.get_position_dict()
+        if not position_dict:
+            continue
+        for g_id, slot in zip(position_dict, position_dict.get_slots()):
+            if slot >= first_slot:
+                ordinal_value, x_index, _, is_parent = position_table.get(slot)
+                positions.append((slot, individual_index, g_id, ordinal_value, x_index, is_parent))
+    return {
+        # in the order in which they have been placed
+        'positions': [position[1:] for position in sorted(positions)],
+        'number_of_descendants': number_of_descendants,
+        'x_index_range': (chart.min_x_index, chart.max_x_index),
+        'ordinal_range': (chart.min_ordinal, chart.max_ordinal),
+    }
+
+
+def place_root_individuals(chart, tasks, processes):
+    """
+    Place the descendants of root individuals in worker processes. The workers get a copy of the
+    chart when they are started, the chart itself is not changed.
+
+    Args:
+        chart (DescendantChart): chart with the selected descendants
+        tasks (list): list of (index of the root individual, indices of the placed individuals in gr_individuals) tuples
+        processes (int): number of worker processes
+
+    Returns:
+        list: placement of every task, i.e. a dict with
+            - positions: list of (index of the individual, g_id of the family, ordinal_value, x_index, is_parent) tuples
+            - number_of_descendants: index of the individual -> number of descendants
+            - x_index_range: min_x_index, max_x_index
+            - ordinal_range: min_ordinal, max_ordinal
+    """
+    with get_context('fork').Pool(processes, _initialize_worker, (chart,)) as pool:
+        return pool.map(_place_root_individual, tasks, chunksize=1)
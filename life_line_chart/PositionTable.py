@@ -0,0 +1,193 @@
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping
+
+
+class PositionTable():
+    """
+    Column oriented storage of the positions of all graphical individuals of a chart
+
+    Every position of a graphical individual in a family is a row (slot) in flat columns:
+        - the ordinal value where the position starts
+        - the x_index
+        - the graphical family
+        - the flag if the family is the parent family
+
+    The positions of one graphical individual are exposed as PositionView, which
+    behaves like the OrderedDict of (ordinal_value, x_index, gr_family, is_parent)
+    tuples used before.
+    """
+
+    def __init__(self):
+        self.ordinal_values = array('q')
+        self.x_indices = array('q')
+        self.gr_families = []
+        self.parent_flags = array('b')
+
+    def __len__(self):
+        return len(self.x_indices)
+
+    def add(self, ordinal_value, x_index, gr_family, is_parent):
+        """
+        add a position
+
+        Args:
+            ordinal_value (int): ordinal value where the position starts
+            x_index (int): x_index
+            gr_family (GraphicalFamily): family of this position
+            is_parent (bool): the family is the parent family
+
+        Returns:
+            int: slot of the position
+        """
+        slot = len(self.x_indices)
+        self.ordinal_values.append(ordinal_value)
+        self.x_indices.append(x_index)
+        self.gr_families.append(gr_family)
+        self.parent_flags.append(1 if is_parent else 0)
+        return slot
+
+    def get(self, slot):
+        """
+        get a position
+
+        Args:
+            slot (int): slot of the position
+
+        Returns:
+            tuple: ordinal_value, x_index, gr_family, is_parent
+        """
+        return (
+            self.ordinal_values[slot],
+            self.x_indices[slot],
+            self.gr_families[slot],
+            self.parent_flags[slot] == 1)
+
+    def shift(self, slots, x_index_offset):
+        """
+        move positions horizontally
+
+        Args:
+            slots (iterable): slots of the positions
+            x_index_offset (int): horizontal offset
+        """
+        x_indices = self.x_indices
+        for slot in slots:
+            x_indices[slot] += x_index_offset
+
+    def map_x_indices(self, x_index_mapping):
+        """
+        move all positions horizontally, e.g. to insert or remove columns
+
+        Args:
+            x_index_mapping (function): maps an old x_index to the new x_index
+        """
+        x_indices = self.x_indices
+        for slot, x_index in enumerate(x_indices):
+            x_indices[slot] = x_index_mapping(x_index)
+
+    def get_x_index_range(self):
+        """
+        get the range of all x_indices
+
+        Returns:
+            tuple: min_x_index, max_x_index or None if there are no positions
+        """
+        if not self.x_indices:
+            return None
+        return min(self.x_indices), max(self.x_indices)
+
+    def clear(self):
+        del self.ordinal_values[:]
+        del self.x_indices[:]
+        self.gr_families.clear()
+        del self.parent_flags[:]
+
+
+class PositionView(Mapping):
+    """
+    Read-only mapping view of the positions of one graphical individual
+
+    Maps the g_id of the family to the (ordinal_value, x_index, gr_family, is_parent)
+    tuple, sorted by ordinal value.
+    """
+
+    __slots__ = ('_table', '_slots')
+
+    def __init__(self, table):
+        self._table = table
+        # g_id of the family -> slot, sorted by ordinal value
+        self._slots = OrderedDict()
+
+    def __getitem__(self, g_id):
+        return self._table.get(self._slots[g_id])
+
+    def __contains__(self, g_id):
+        return g_id in self._slots
+
+    def __iter__(self):
+        return iter(self._slots)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __repr__(self):
+        return 'PositionView(' + repr(list(self.items())) + ')'
+
+    def add(self, g_id, ordinal_value, x_index, gr_family, is_parent):
+        """
+        add the position in a family
+
+        Args:
+            g_id (tuple): g_id of the family
+            ordinal_value (int): ordinal value where the position starts
+            x_index (int): x_index
+            gr_family (GraphicalFamily): family
+            is_parent (bool): the family is the parent family
+        """
+        slots = OrderedDict(self._slots)
+        slots[g_id] = self._table.add(ordinal_value, x_index, gr_family, is_parent)
+        ordinal_values = self._table.ordinal_values
+        # a new dict, so that running iterations are not affected
+        self._slots = OrderedDict(sorted(slots.items(), key=lambda t: ordinal_values[t[1]]))
+
+    def get_x_index(self, g_id):
+        """
+        get the x_index in a family
+
+        Args:
+            g_id (tuple): g_id of the family
+
+        Returns:
+            int: x_index
+        """
+        return self._table.x_indices[self._slots[g_id]]
+
+    def get_x_indices(self):
+        """
+        get the x_indices of all positions, sorted by ordinal value
+
+        Returns:
+            list: x_indices
+        """
+        x_indices = self._table.x_indices
+        return [x_indices[slot] for slot in self._slots.values()]
+
+    def get_slots(self):
+        """
+        get the slots of all positions in the position table, sorted by ordinal value
+
+        Returns:
+            list: slots
+        """
+        return list(self._slots.values())
+
+    def move(self, g_ids, x_index_offset):
+        """
+        move the positions in some families horizontally
+
+        Args:
+            g_ids (iterable): g_ids of the families
+            x_index_offset (int): horizontal offset
+        """
+        self._table.shift([self._slots[g_id] for g_id in g_ids], x_index_offset)
@@ -0,0 +1,98 @@
+from collections import OrderedDict
+
+
+class RangeCache(OrderedDict):
+    """
+    Cache of x ranges (e.g. the ancestor range of a graphical individual)
+
+    Every entry knows the graphical individuals whose positions have been read and
+    the entries which have been used to calculate it. If an individual is moved,
+    only the entries which read its position and the entries which depend on them
+    are removed.
+    """
+
+    def __init__(self):
+        OrderedDict.__init__(self)
+        # g_id of a graphical individual -> keys of the entries which read its positions
+        self._readers = {}
+        # key -> keys of the entries which have been calculated from this entry
+        self._dependents = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+    def get_range(self, key):
+        """
+        Get a cached range and count hits and misses.
+
+        Args:
+            key (tuple): key of the entry
+
+        Returns:
+            tuple: x_min, x_max or None if the range is not cached
+        """
+        value = self.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def add_range(self, key, value, read_g_ids, used_keys):
+        """
+        Add a range together with its dependencies.
+
+        Args:
+            key (tuple): key of the entry
+            value (tuple): x_min, x_max
+            read_g_ids (iterable): g_ids of the graphical individuals whose positions have been read
+            used_keys (iterable): keys of the entries which have been used
+        """
+        self[key] = value
+        for g_id in read_g_ids:
+            self._readers.setdefault(g_id, set()).add(key)
+        for used_key in used_keys:
+            self._dependents.setdefault(used_key, set()).add(key)
+
+    def invalidate_individual(self, g_id):
+        """
+        Remove all entries which depend on the positions of a graphical individual.
+
+        Args:
+            g_id (tuple): g_id of the graphical individual
+        """
+        keys = list(self._readers.pop(g_id, ()))
+        while keys:
+            key = keys.pop()
+            if key in self:
+                del self[key]
+                self.invalidated += 1
+            keys += self._dependents.pop(key, ())
+
+    def reset_statistics(self):
+        """
+        Reset the hit and miss counters.
+        """
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+    def get_statistics(self):
+        """
+        Get the hit and miss counters.
+
+        Returns:
+            dict: hits, misses, invalidated entries and hit rate
+        """
+        requests = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidated': self.invalidated,
+            'hit_rate': self.hits / requests if requests else 0.0
+        }
+
+    def clear(self):
+        OrderedDict.clear(self)
+        self._readers.clear()
+        self._dependents.clear()
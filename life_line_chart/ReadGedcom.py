@@ -1,50 +1,238 @@
+import concurrent.futures
+import io
+import os
 from collections import OrderedDict
 
+from .GedcomRecordStore import GedcomRecordStore
 
-def read_data(filename):
+
+def _parse_gedcom_lines(lines, indi_database, fam_database):
+    """
+    parse gedcom lines in a single pass and add the INDI and FAM records to the databases
+
+    Args:
+        lines (iterable): gedcom lines, e.g. an open file
+        indi_database (OrderedDict): target for the INDI records
+        fam_database (OrderedDict): target for the FAM records
+    """
+    # stack[level] is the node which receives the tags of this level.
+    # stack[0] is None while skipping records which are neither INDI nor FAM
+    stack = [None]
+    for line in lines:
+        line = line.rstrip('\n').lstrip()
+        if not line:
+            continue
+        level, _, line = line.partition(' ')
+        try:
+            level = int(level)
+        except ValueError:
+            continue
+        tag_name, _, tag_data = line.partition(' ')
+        if level == 0:
+            del stack[1:]
+            if tag_data == 'INDI':
+                stack[0] = indi_database
+            elif tag_data == 'FAM':
+                stack[0] = fam_database
+            else:
+                stack[0] = None
+                continue
+        elif stack[0] is None or level >= len(stack):
+            # content of skipped records or a broken level hierarchy
+            continue
+        else:
+            del stack[level + 1:]
+        parent = stack[level]
+        if tag_name not in parent:
+            node = OrderedDict({'tag_data': tag_data})
+            parent[tag_name] = node
+        else:
+            node = parent[tag_name]
+            node['tag_data'] += '\n' + tag_data
+        stack.append(node)
+
+
+class _HashingReader(io.RawIOBase):
+    """
+    binary stream which passes the bytes of a file to a hash while they are read
+    """
+
+    def __init__(self, filename, file_hash):
+        self._file = open(filename, 'rb', buffering=0)
+        self._file_hash = file_hash
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = self._file.readinto(buffer)
+        if size:
+            self._file_hash.update(memoryview(buffer)[:size])
+        return size
+
+    def close(self):
+        self._file.close()
+        io.RawIOBase.close(self)
+
+
+def _open_gedcom_file(filename, file_hash=None):
+    """
+    open a gedcom file as text stream
+
+    Args:
+        filename (str): gedcom file
+        file_hash (hashlib hash, optional): hash which is updated with the bytes of the file while they are read.
+            Defaults to None.
+
+    Returns:
+        io.TextIOBase: gedcom lines
+    """
+    if file_hash is None:
+        return open(filename, 'r', encoding='utf-8-sig')
+    return io.TextIOWrapper(io.BufferedReader(_HashingReader(filename, file_hash)), encoding='utf-8-sig')
+
+
+def _get_chunk_ranges(filename, chunks):
+    """
+    split a gedcom file into byte ranges which start at level 0 lines
+
+    Args:
+        filename (str): gedcom file
+        chunks (int): desired number of chunks
+
+    Returns:
+        list: list of (start, end) tuples
+    """
+    size = os.path.getsize(filename)
+    boundaries = [0]
+    with open(filename, 'rb') as f:
+        for index in range(1, chunks):
+            position = max(size * index // chunks, boundaries[-1])
+            f.seek(position)
+            # search the next level 0 line. The last bytes of a block are kept
+            # to find the marker across the block border
+            buffer = b''
+            while True:
+                block = f.read(1 << 16)
+                if not block:
+                    position = size
+                    break
+                buffer += block
+                offset = buffer.find(b'\n0 ')
+                if offset >= 0:
+                    position += offset + 1
+                    break
+                kept = min(2, len(buffer))
+                position += len(buffer) - kept
+                buffer = buffer[len(buffer) - kept:]
+            if position >= size:
+                break
+            boundaries.append(position)
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _read_chunk(filename, start, end):
+    """
+    parse a byte range of a gedcom file
+
+    Args:
+        filename (str): gedcom file
+        start (int): first byte
+        end (int): end of the byte range
+
+    Returns:
+        tuple: individual database, family database
+    """
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    indi_database = OrderedDict()
+    fam_database = OrderedDict()
+    with io.TextIOWrapper(io.BytesIO(data), encoding='utf-8-sig' if start == 0 else 'utf-8') as f:
+        _parse_gedcom_lines(f, indi_database, fam_database)
+    return indi_database, fam_database
+
+
+def _merge_node(target, source):
+    """
+    merge a node into a node with the same tag, like repeated tags are merged while parsing
+
+    Args:
+        target (OrderedDict): node which is extended
+        source (OrderedDict): node with the same tag
+    """
+    target['tag_data'] += '\n' + source['tag_data']
+    for tag_name, node in source.items():
+        if tag_name == 'tag_data':
+            continue
+        if tag_name in target:
+            _merge_node(target[tag_name], node)
+        else:
+            target[tag_name] = node
+
+
+def read_data(filename, workers=None, file_hash=None):
     """
     read a gedcom file and creates a structured data dict
 
+    The file is streamed line by line, so apart from the resulting databases
+    the memory consumption does not depend on the file size.
+
+    With several workers, the file is split into chunks at level 0 records. The
+    chunks are parsed in separate processes and merged in the original order.
+
     Args:
         filename (str): gedcom file
+        workers (int, optional): number of worker processes. Defaults to None (no parallel parsing).
+        file_hash (hashlib hash, optional): hash which is updated with the parsed bytes, e.g. to identify
+            the content. Cannot be combined with workers. Defaults to None.
+
+    Raises:
+        ValueError: file_hash is combined with workers
 
     Returns:
         dict: structured data
     """
-    import re
-    stack = [None, None, None, None, None, None, None, None]
-    indi = re.compile(r'0 @I\d+@ INDI.*?(?=\n0)',
-                      flags=re.DOTALL | re.MULTILINE)
-    fam = re.compile(r'0 @F\d+@ FAM.*?(?=\n0)', flags=re.DOTALL | re.MULTILINE)
-    content = open(filename, 'r', encoding='utf8').read()
     indi_database = OrderedDict()
-    for i in indi.finditer(content):
-        ged_data = i.string[i.regs[0][0]:i.regs[0][1]]
-        stack[0] = indi_database
-        for line in ged_data.split('\n'):
-            level = int(line[0])
-            tag_name = line.split(' ')[1]
-            tag_data = " ".join(line.split(' ')[2:])
-            if tag_name not in stack[level]:
-                stack[level][tag_name] = OrderedDict({'tag_data': tag_data})
-            else:
-                stack[level][tag_name]['tag_data'] += '\n'+tag_data
-            stack[level+1] = stack[level][tag_name]
-        if len(indi_database) > 999000:
-            break
     fam_database = OrderedDict()
-    for i in fam.finditer(content):
-        ged_data = i.string[i.regs[0][0]:i.regs[0][1]]
-        stack[0] = fam_database
-        for line in ged_data.split('\n'):
-            level = int(line[0])
-            tag_name = line.split(' ')[1]
-            tag_data = " ".join(line.split(' ')[2:])
-            if tag_name not in stack[level]:
-                stack[level][tag_name] = OrderedDict({'tag_data': tag_data})
-            else:
-                stack[level][tag_name]['tag_data'] += '\n'+tag_data
-            stack[level+1] = stack[level][tag_name]
-        if len(fam_database) > 992000:
-            break
+    if workers is None or workers <= 1:
+        with _open_gedcom_file(filename, file_hash) as f:
+            _parse_gedcom_lines(f, indi_database, fam_database)
+        return indi_database, fam_database
+    if file_hash is not None:
+        raise ValueError('the chunks of the parallel parsing cannot be hashed in order')
+
+    ranges = _get_chunk_ranges(filename, workers)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            _read_chunk, [filename] * len(ranges), *zip(*ranges))
+        for chunk_databases in results:
+            for database, chunk_database in zip((indi_database, fam_database), chunk_databases):
+                for key, record in chunk_database.items():
+                    if key in database:
+                        # the same xref in several chunks
+                        _merge_node(database[key], record)
+                    else:
+                        database[key] = record
     return indi_database, fam_database
+
+
+def read_data_compact(filename, file_hash=None):
+    """
+    read a gedcom file into a compact record store
+
+    The returned databases are read-only mappings which can be used like the
+    result of read_data, but need only a fraction of the memory.
+
+    Args:
+        filename (str): gedcom file
+        file_hash (hashlib hash, optional): hash which is updated with the parsed bytes. Defaults to None.
+
+    Returns:
+        tuple: individual database, family database
+    """
+    store = GedcomRecordStore()
+    with _open_gedcom_file(filename, file_hash) as f:
+        store.parse_lines(f)
+    return store.get_databases()
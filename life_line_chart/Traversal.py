@@ -0,0 +1,46 @@
+def run_iteratively(generator):
+    """
+    Run a recursive algorithm with an explicit stack instead of the call stack, so that
+    deep graphs do not reach the recursion limit.
+
+    The algorithm is written as generator function. Instead of calling itself, it yields
+    the generator of the recursive call and receives its return value:
+
+        def _get_depth_steps(node):
+            depths = []
+            for child in node.children:
+                depths.append((yield _get_depth_steps(child)))
+            return max(depths, default=0) + 1
+
+    Exceptions are passed to the calling generator, like with recursive calls.
+
+    Args:
+        generator (generator): generator of the outermost call
+
+    Returns:
+        object: return value of the outermost call
+    """
+    stack = [generator]
+    value = None
+    error = None
+    while True:
+        try:
+            if error is None:
+                call = stack[-1].send(value)
+            else:
+                thrown, error = error, None
+                call = stack[-1].throw(thrown)
+        except StopIteration as e:
+            stack.pop()
+            value = e.value
+            if not stack:
+                return value
+            continue
+        except Exception as e:
+            stack.pop()
+            if not stack:
+                raise
+            error = e
+            continue
+        stack.append(call)
+        value = None
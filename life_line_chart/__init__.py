@@ -18,6 +18,7 @@ from .BaseFamily import BaseFamily
 from .BaseIndividual import BaseIndividual, estimate_birth_date, estimate_death_date
 
 from .InstanceContainer import InstanceContainer
+from .LayoutBudget import LayoutBudget
 
 # from .GedcomParsing import get_date_dict_from_tag, estimate_marriage_date, get_gedcom_instance_container
 
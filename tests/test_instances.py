@@ -1,7 +1,8 @@
-# import pytest
+import pytest
 from life_line_chart import InstanceContainer, GedcomIndividual, GraphicalIndividual, GraphicalFamily, GedcomFamily
 from life_line_chart import ReadGedcom
 from life_line_chart.GedcomInstanceContainer import get_gedcom_instance_container
+from life_line_chart.GedcomCache import get_file_hash
 import os
 
 
@@ -56,3 +57,137 @@ def test_instance_container_labels():
         individual_birth_labels[1:5]) == "['*\\xa011.08.1966', '*\\xa017.04.1904', '*\\xa029.01.1821', '*\\xa031.08.1889']"
     assert str(
         individual_death_labels[1:5]) == "['', '†\\xa029.01.1977', '†\\xa0geschätzt\\xa01896', '†\\xa01945']"
+
+
+def test_instance_container_compact():
+    instances = get_gedcom_instance_container(
+        os.path.join(os.path.dirname(__file__), 'gramps_sample.ged'), compact=True)
+
+    i = instances[('i', '@I1@')]
+    assert i.plain_name == 'Keith Lloyd Smith'
+    f = instances[('f', '@F1@')]
+    assert f.wife_individual_id == '@I25@'
+    assert f.husband_individual_id == '@I27@'
+
+    instances.instantiate_all(instances)
+    assert len(instances._data) == 59
+
+
+def test_instance_container_cache(tmp_path):
+    import shutil
+    from life_line_chart.GedcomCache import get_cache_filename, read_data_cached
+    filename = str(tmp_path / 'gramps_sample.ged')
+    shutil.copy(os.path.join(os.path.dirname(__file__), 'gramps_sample.ged'), filename)
+    cache_dir = str(tmp_path / 'cache')
+
+    # the first run writes the cache file
+    instances = get_gedcom_instance_container(filename, cache_dir=cache_dir)
+    assert os.path.isfile(get_cache_filename(filename, cache_dir))
+    assert instances[('i', '@I1@')].birth_label == '*\xa011.08.1966'
+
+    # the second run reads it
+    instances = get_gedcom_instance_container(filename, cache_dir=cache_dir)
+    instances.instantiate_all(instances)
+    assert len(instances._data) == 59
+    assert instances[('i', '@I1@')].birth_label == '*\xa011.08.1966'
+
+    # every way of reading the file hashes the same content
+    file_hash = get_file_hash(filename)
+    assert instances.content_hash == file_hash
+    for arguments in ({}, {'compact': True}, {'lazy': True}):
+        assert get_gedcom_instance_container(filename, **arguments).content_hash == file_hash
+
+    # the lazy access does not parse the whole file, it cannot be cached
+    with pytest.raises(ValueError):
+        get_gedcom_instance_container(filename, lazy=True, cache_dir=cache_dir)
+
+    # changed content invalidates the cache
+    with open(filename, 'r', encoding='utf-8-sig') as f:
+        content = f.read()
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write(content.replace('2 DATE 11 AUG 1966', '2 DATE 12 AUG 1966'))
+    database_indi, database_fam, database_events, content_hash = read_data_cached(filename, cache_dir)
+    assert database_events['@I1@']['birth']['date'].day == 12
+    assert content_hash == get_file_hash(filename)
+
+
+def test_instance_container_event_index():
+    instances = get_gedcom_instance_container(
+        os.path.join(os.path.dirname(__file__), 'gramps_sample.ged'))
+    instances.instantiate_all(instances)
+
+    # families and individuals share one event index with one entry per individual
+    individual = instances[('i', '@I1@')]
+    family = instances[('f', '@F1@')]
+    database_events = individual._database_events
+    assert family._database_events is database_events
+    assert len(database_events) == 42
+    assert individual.events['birth'] is database_events['@I1@']['birth']
+
+
+def test_instance_container_dropped_records(tmp_path):
+    filename = tmp_path / 'dropped.ged'
+    filename.write_text(
+        '0 @I1@ INDI\n'
+        '1 NAME John /Doe/\n'
+        '1 BIRT\n'
+        '2 DATE 1 JAN 1850\n'
+        '1 FAMS @F1@\n'
+        '1 FAMS @F9@\n'
+        '1 FAMS @F2@\n'
+        '0 @I2@ INDI\n'
+        '1 NAME Jane /Doe/\n'
+        '0 @I3@ INDI\n'
+        '1 NAME Jim /Doe/\n'
+        '1 BIRT\n'
+        '2 DATE 1 MAR 1876\n'
+        '1 FAMC @F2@\n'
+        '0 @F1@ FAM\n'
+        '1 HUSB @I1@\n'
+        '1 WIFE @I2@\n'
+        '0 @F2@ FAM\n'
+        '1 HUSB @I1@\n'
+        '1 MARR\n'
+        '2 DATE 1875\n'
+        '1 CHIL @I3@\n'
+        '1 CHIL @I8@\n'
+        '0 TRLR\n', encoding='utf8')
+    instances = get_gedcom_instance_container(str(filename))
+    instances.instantiate_all(instances)
+
+    # the reference to the missing family does not prevent the individual from being displayed
+    assert instances[('i', '@I1@')].plain_name == 'John Doe'
+    assert instances[('i', '@I2@')] is None
+    # the reference to the missing child does not prevent the family from being displayed
+    assert instances[('f', '@F2@')].marriage['ordinal_value'] > 0
+    assert instances[('i', '@I3@')].plain_name == 'Jim Doe'
+    assert list(instances.dropped_records.items()) == [
+        (('f', '@F1@'), 'Marriage date is missing @F1@'),
+        (('i', '@I8@'), 'individual record is missing @I8@'),
+        (('f', '@F9@'), 'family record is missing @F9@'),
+        (('i', '@I2@'), 'birth date is missing @I2@'),
+    ]
+
+
+def test_instance_container_reload(tmp_path):
+    filename = str(tmp_path / 'gramps_sample.ged')
+    with open(os.path.join(os.path.dirname(__file__), 'gramps_sample.ged'), 'r', encoding='utf-8-sig') as f:
+        content = f.read()
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write(content)
+    instances = get_gedcom_instance_container(filename, reloadable=True)
+    instances.instantiate_all(instances)
+    unchanged_individual = instances[('i', '@I2@')]
+
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write(content.replace('2 DATE 11 AUG 1966', '2 DATE 12 AUG 1967'))
+    invalid_keys = instances.reload(instances)
+    assert instances.content_hash == get_file_hash(filename)
+
+    # the changed individual, its parents family and the members of this family
+    assert ('i', '@I1@') in invalid_keys
+    assert ('f', '@F8@') in invalid_keys
+    assert ('i', '@I2@') not in invalid_keys
+    assert len(invalid_keys) < 10
+    assert instances[('i', '@I1@')].birth_label == '*\xa012.08.1967'
+    assert instances[('i', '@I2@')] is unchanged_individual
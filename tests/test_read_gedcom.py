@@ -22,3 +22,104 @@ def test_read_testdata_file():
     assert str(data[0]['@I1@']) == "OrderedDict([('tag_data', 'INDI'), ('NAME', OrderedDict([('tag_data', 'Stephen /Demetro/')])), ('SEX', OrderedDict([('tag_data', 'M')])), ('BIRT', OrderedDict([('tag_data', ''), ('DATE', OrderedDict([('tag_data', '1 JUN 1001')])), ('PLAC', OrderedDict([('tag_data', 'Paris')]))])), ('DEAT', OrderedDict([('tag_data', ''), ('DATE', OrderedDict([('tag_data', '1 JUN 1060')])), ('PLAC', OrderedDict([('tag_data', 'Bruegge')]))])), ('FAMS', OrderedDict([('tag_data', '@F1@')]))])"
     assert str(data[1]['@F1@']) == "OrderedDict([('tag_data', 'FAM'), ('HUSB', OrderedDict([('tag_data', '@I1@')])), ('WIFE', OrderedDict([('tag_data', '@I2@')])), ('MARR', OrderedDict([('tag_data', ''), ('DATE', OrderedDict([('tag_data', '1 MAY 1021')])), ('PLAC', OrderedDict([('tag_data', 'Tokio')]))])), ('CHIL', OrderedDict([('tag_data', '@I3@\\n@I4@\\n@I5@')]))])"
 
+
+def test_read_non_numeric_xrefs(tmp_path):
+    filename = tmp_path / 'non_numeric.ged'
+    filename.write_text(
+        '0 HEAD\n'
+        '1 CHAR UTF-8\n'
+        '0 @P123@ INDI\n'
+        '1 NAME John /Doe/\n'
+        '1 BIRT\n'
+        '2 DATE 1 JAN 1850\n'
+        '1 FAMS @FAM_1@\n'
+        '0 @FAM_1@ FAM\n'
+        '1 HUSB @P123@\n'
+        '1 CHIL @P124@\n'
+        '1 CHIL @P125@\n'
+        '0 @P124@ INDI\n'
+        '1 NAME Jane /Doe/\n'
+        '0 TRLR\n', encoding='utf8')
+    data = ReadGedcom.read_data(str(filename))
+    assert list(data[0].keys()) == ['@P123@', '@P124@']
+    assert list(data[1].keys()) == ['@FAM_1@']
+    assert data[0]['@P123@']['BIRT']['DATE']['tag_data'] == '1 JAN 1850'
+    assert data[0]['@P124@']['NAME']['tag_data'] == 'Jane /Doe/'
+    assert data[1]['@FAM_1@']['CHIL']['tag_data'] == '@P124@\n@P125@'
+
+
+def test_read_last_record_without_trailer(tmp_path):
+    filename = tmp_path / 'no_trailer.ged'
+    filename.write_text(
+        '0 @I1@ INDI\n'
+        '1 NAME John /Doe/\n'
+        '0 @I2@ INDI\n'
+        '1 NAME Jane /Doe/', encoding='utf8')
+    data = ReadGedcom.read_data(str(filename))
+    assert list(data[0].keys()) == ['@I1@', '@I2@']
+    assert data[0]['@I2@']['NAME']['tag_data'] == 'Jane /Doe/'
+
+
+def _to_dict(record):
+    return [(key, value if key == 'tag_data' else _to_dict(value)) for key, value in record.items()]
+
+
+def test_read_compact_record_store():
+    filename = os.path.join(os.path.dirname(__file__), 'gramps_sample.ged')
+    data = ReadGedcom.read_data(filename)
+    compact_data = ReadGedcom.read_data_compact(filename)
+    for database, compact_database in zip(data, compact_data):
+        assert list(database.keys()) == list(compact_database.keys())
+        for key, record in database.items():
+            assert _to_dict(record) == _to_dict(compact_database[key])
+    record = compact_data[0]['@I1@']
+    assert 'BIRT' in record
+    assert 'BURI' not in record
+    assert record.get('BURI') is None
+    assert record['BIRT']['DATE']['tag_data'] == '11 AUG 1966'
+
+
+def test_date_parser():
+    from life_line_chart.GedcomParsing import get_date_dict_from_tag
+    birth = get_date_dict_from_tag({'BIRT': {'DATE': {'tag_data': '1 JAN 1850'}}}, 'BIRT')
+    assert str(birth['date']) == '1850-01-01 00:00:00'
+    assert birth['precision'] == 'dmy'
+    death = get_date_dict_from_tag({'DEAT': {'DATE': {'tag_data': '1850'}}}, 'DEAT')
+    assert str(death['date']) == '1850-12-31 00:00:00'
+    assert death['comment'] == 'YearPrecision'
+    about = get_date_dict_from_tag({'BIRT': {'DATE': {'tag_data': 'ABT MAR 1850'}}}, 'BIRT')
+    assert about['ordinal_value_max'] - about['ordinal_value_min'] == 30
+    assert about['comment'] == 'About'
+    assert get_date_dict_from_tag({'BIRT': {'DATE': {'tag_data': '31 FEB 1850'}}}, 'BIRT') is None
+
+    # equal date strings share the same read-only event
+    assert get_date_dict_from_tag({'BIRT': {'DATE': {'tag_data': '1 JAN 1850'}}}, 'BIRT') is birth
+    try:
+        birth['comment'] = 'Estimated'
+        assert False
+    except TypeError:
+        pass
+
+
+def test_read_parallel():
+    filename = os.path.join(os.path.dirname(__file__), 'autogenerated.ged')
+    data = ReadGedcom.read_data(filename)
+    parallel_data = ReadGedcom.read_data(filename, workers=3)
+    assert list(data[0].keys()) == list(parallel_data[0].keys())
+    assert list(data[1].keys()) == list(parallel_data[1].keys())
+    assert str(data) == str(parallel_data)
+
+
+def test_read_lazy():
+    from life_line_chart.GedcomFileIndex import read_data_lazy
+    filename = os.path.join(os.path.dirname(__file__), 'autogenerated.ged')
+    data = ReadGedcom.read_data(filename)
+    lazy_data = read_data_lazy(filename)
+    for database, lazy_database, key in zip(data, lazy_data, ['@I1@', '@F1@']):
+        assert list(database.keys()) == list(lazy_database.keys())
+        # nothing is parsed before the first access
+        assert len(lazy_database._records) == 0
+        assert str(database[key]) == str(lazy_database[key])
+        assert len(lazy_database._records) == 1
+        for key, record in database.items():
+            assert str(record) == str(lazy_database[key])
@@ -1,8 +1,15 @@
 from life_line_chart import AncestorChart, DescendantChart
+from life_line_chart.Exceptions import LifeLineChartCollisionDetected
 from life_line_chart.GedcomInstanceContainer import get_gedcom_instance_container
+from life_line_chart.LayoutBudget import LayoutBudget
+from life_line_chart.ParallelCompression import is_parallel_compression_available
 import pytest
 from collections import OrderedDict
+import datetime
 import os
+import pickle
+import shutil
+import threading
 try:
     from PIL import Image
     pillow_available = True
@@ -10,6 +17,91 @@ except ImportError:
     pillow_available = False
 
 
+autogenerated_filename = os.path.join(os.path.dirname(__file__), 'autogenerated.ged')
+
+
+def get_chart(chart_class, root_individuals, positioning=None, filename=autogenerated_filename, **update_arguments):
+    """
+    create a chart and update it
+
+    Args:
+        chart_class (class): AncestorChart or DescendantChart
+        root_individuals (list): list of (individual id, generations) tuples
+        positioning (dict, optional): positioning of the chart. Defaults to None.
+        filename (str, optional): gedcom file. Defaults to autogenerated_filename.
+        update_arguments: arguments of update_chart
+
+    Returns:
+        BaseChart: chart
+    """
+    chart = chart_class(instance_container=get_gedcom_instance_container(filename), positioning=positioning)
+    chart.set_chart_configuration({'root_individuals': [
+        {'individual_id': individual_id, 'generations': generations} for individual_id, generations in root_individuals
+        ]})
+    chart.update_chart(**update_arguments)
+    return chart
+
+
+def get_positions(chart):
+    """
+    get the positions of all individuals of a chart, independent of the graphical representations
+
+    Args:
+        chart (BaseChart): chart
+
+    Returns:
+        list: sorted list of (individual id, list of (family g_id, ordinal_value, x_index) tuples) tuples
+    """
+    return sorted(
+        (gr_individual.individual_id, sorted((g_id, ov, x_index) for g_id, (ov, x_index, _, _) in
+                                             gr_individual.get_position_dict().items() if g_id is not None))
+        for gr_individual in chart.gr_individuals)
+
+
+@pytest.fixture
+def write_pedigree(tmp_path):
+    """
+    writes synthetic gedcom files. The family @Fn@ is the family of the parents of the individual @In@.
+
+    Returns:
+        function: write_pedigree(parents, birth_dates, death_dates=None) with the (father, mother) indices of
+            every individual (None if unknown), returns the filename
+    """
+    def write(parents, birth_dates, death_dates=None):
+        mothers = {mother for _, mother in parents if mother is not None}
+        marriages = {index: [] for index in range(len(parents))}
+        for index, index_parents in enumerate(parents):
+            for parent in index_parents:
+                if parent is not None:
+                    marriages[parent].append(index)
+        lines = ['0 HEAD']
+        for index, (father, mother) in enumerate(parents):
+            lines += [
+                '0 @I{}@ INDI'.format(index),
+                '1 NAME Person{} /Pedigree/'.format(index),
+                '1 SEX ' + ('F' if index in mothers else 'M'),
+                '1 BIRT', '2 DATE ' + birth_dates[index]]
+            if death_dates:
+                lines += ['1 DEAT', '2 DATE ' + death_dates[index]]
+            if father is not None or mother is not None:
+                lines.append('1 FAMC @F{}@'.format(index))
+            lines += ['1 FAMS @F{}@'.format(child) for child in marriages[index]]
+        for index, (father, mother) in enumerate(parents):
+            if father is not None or mother is not None:
+                lines.append('0 @F{}@ FAM'.format(index))
+                if father is not None:
+                    lines.append('1 HUSB @I{}@'.format(father))
+                if mother is not None:
+                    lines.append('1 WIFE @I{}@'.format(mother))
+                lines.append('1 CHIL @I{}@'.format(index))
+        lines.append('0 TRLR')
+        filename = str(tmp_path / 'pedigree.ged')
+        with open(filename, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        return filename
+    return write
+
+
 def test_generate_svg_file():
     max_generations = 20
     x_position = 0
@@ -371,7 +463,434 @@ def test_generate_svg_update_interface_parent_placement():
         os.path.dirname(__file__), 'output', 'test_svg_ancestor_configuration_parent_placement.svg'))
 
 
+def test_collision_index():
+    chart = AncestorChart(instance_container=get_gedcom_instance_container(
+        os.path.join(os.path.dirname(__file__), 'autogenerated.ged')))
+    chart.set_positioning({'compress': True})
+    chart.set_chart_configuration({'root_individuals': [
+        {'individual_id': '@I25@', 'generations': 5},
+        ]})
+    chart.update_chart()
 
+    def has_collision(use_index, min_distance):
+        if not use_index:
+            # the full check is used if the position map is requested
+            return len(chart._check_compressed_x_position(False, {}, min_distance)[0]) > 0
+        try:
+            chart._check_compressed_x_position(True, min_distance=min_distance)
+        except LifeLineChartCollisionDetected:
+            return True
+        return False
+
+    # the index follows the moves and gives the same result as the full check
+    assert not has_collision(True, 15)
+    for step in range(40):
+        gr_individual = chart.gr_individuals[step * 7 % len(chart.gr_individuals)]
+        gr_family = list(gr_individual.get_position_dict().values())[-1][2]
+        if gr_family is None:
+            continue
+        chart._move_single_individual(gr_individual, gr_family, 1 if step % 3 else -2)
+        for min_distance in (1, 15):
+            assert has_collision(True, min_distance) == has_collision(False, min_distance)
+    chart._reset_collision_index()
+
+
+def test_compression_engines():
+    positions = []
+    for compression_engine in ['steps', 'shift']:
+        chart = AncestorChart(instance_container=get_gedcom_instance_container(
+            os.path.join(os.path.dirname(__file__), 'autogenerated.ged')))
+        chart.set_positioning({'compress': True, 'flip_to_optimize': True, 'compression_engine': compression_engine})
+        chart.set_chart_configuration({'root_individuals': [
+            {'individual_id': '@I450@', 'generations': 8},
+            ]})
+        chart.update_chart()
+        positions.append((
+            chart.max_x_index,
+            {gr_individual.g_id: list(gr_individual.get_position_dict().values()) for gr_individual in chart.gr_individuals}))
+
+    # both engines compress the chart in the same way
+    assert positions[0] == positions[1]
+
+
+def test_constraint_graph_compression():
+    for root_individuals in (
+            [{'individual_id': '@I450@', 'generations': 8}],
+            [{'individual_id': '@I1033@', 'generations': 20}, {'individual_id': '@I745@', 'generations': 20}]):
+        widths = []
+        for compression_engine in ['constraint_graph', 'shift']:
+            chart = AncestorChart(instance_container=get_gedcom_instance_container(
+                os.path.join(os.path.dirname(__file__), 'autogenerated.ged')))
+            chart.set_positioning({'compress': True, 'compression_engine': compression_engine})
+            chart.set_chart_configuration({'root_individuals': root_individuals})
+            chart.update_chart()
+            collisions, min_x_index, max_x_index = chart._check_compressed_x_position(False, {})
+            assert collisions == []
+            widths.append(max_x_index - min_x_index + 1)
+
+            # the parents stay beside their children
+            for gr_family in chart.gr_families:
+                children_x_indices = [
+                    gr_child.get_x_index(gr_family.g_id) for gr_child in gr_family.visible_children
+                    if gr_child.has_position_vector(gr_family)]
+                if gr_family.gr_husb and gr_family.gr_husb.has_position_vector(gr_family) and children_x_indices:
+                    assert gr_family.gr_husb.get_x_index(gr_family.g_id) < min(children_x_indices)
+                if gr_family.gr_wife and gr_family.gr_wife.has_position_vector(gr_family) and children_x_indices:
+                    assert gr_family.gr_wife.get_x_index(gr_family.g_id) > max(children_x_indices)
+        assert widths[0] <= widths[1] * 1.2
+
+
+def test_fast_layout_mode():
+    for chart_class, positioning, root_individual_id in (
+            (AncestorChart, {}, '@I450@'),
+            (DescendantChart, {'chart_layout': 'enclosing'}, '@I2@'),
+            (DescendantChart, {'chart_layout': 'cactus'}, '@I2@')):
+        chart = chart_class(instance_container=get_gedcom_instance_container(
+            os.path.join(os.path.dirname(__file__), 'autogenerated.ged')))
+        chart.set_positioning(dict(positioning, layout_mode='fast'))
+        chart.set_chart_configuration({'root_individuals': [
+            {'individual_id': root_individual_id, 'generations': 8},
+            ]})
+        chart.update_chart()
+        position_to_person_map = {}
+        collisions, min_x_index, max_x_index = chart._check_compressed_x_position(False, position_to_person_map)
+        assert collisions == []
+        assert (chart.min_x_index, chart.max_x_index) == (min_x_index, max_x_index + 1)
+
+        def get_persons(position_to_person_map):
+            return {
+                x_index: sorted((person['start'], person['end'], person['individual'].g_id) for person in persons)
+                for x_index, persons in position_to_person_map.items()}
+        assert get_persons(chart.position_to_person_map) == get_persons(position_to_person_map)
+
+
+def test_layout_budget():
+    root_individuals = [('@I450@', 8)]
+    positioning = {'compress': True, 'flip_to_optimize': True}
+    progress = {}
+    budget = LayoutBudget(progress_callback=lambda stage, fraction: progress.__setitem__(stage, fraction))
+    chart = get_chart(AncestorChart, root_individuals, positioning, layout_budget=budget)
+    assert not budget.exhausted
+    assert progress == {'placement': 1.0, 'flipping': 1.0, 'compression': 1.0}
+    compressed_width = chart.max_x_index - chart.min_x_index
+
+    # a cancelled layout stops the optimization, but the chart is consistent
+    cancellation_token = threading.Event()
+    cancellation_token.set()
+    budget = LayoutBudget(cancellation_token=cancellation_token)
+    chart = get_chart(AncestorChart, root_individuals, positioning, layout_budget=budget)
+    assert budget.exhausted
+    collisions, min_x_index, max_x_index = chart._check_compressed_x_position(False, {})
+    assert collisions == []
+    assert chart.max_x_index - chart.min_x_index > compressed_width
+
+
+def test_parallel_placement():
+    # @I25@ and @I69@ share descendants, they are placed in one process
+    root_individuals = [(individual_id, 6) for individual_id in ('@I1350@', '@I106@', '@I25@', '@I69@')]
+    positions = get_positions(get_chart(DescendantChart, root_individuals, {'placement_processes': 1}))
+    chart = get_chart(DescendantChart, root_individuals, {'placement_processes': 2})
+    assert sorted(chart._place_root_individuals_in_parallel()) == [0, 1]
+    assert get_positions(chart) == positions
+
+
+def test_flip_family_cost():
+    chart = AncestorChart(instance_container=get_gedcom_instance_container(
+        os.path.join(os.path.dirname(__file__), 'autogenerated.ged')))
+    chart.set_chart_configuration({'root_individuals': [
+        {'individual_id': '@I450@', 'generations': 8},
+        ]})
+    chart.update_chart()
+
+    # the change of the cross connections is calculated from the moved individuals only
+    width, _ = chart._calculate_sum_of_distances()
+    for gr_family in list(chart.gr_families)[:20]:
+        moved_individuals = chart._flip_family_and_record(gr_family)
+        width += chart._get_moved_distance_difference(moved_individuals)
+        assert width == chart._calculate_sum_of_distances()[0]
+        assert chart._check_moved_x_positions(moved_individuals) == []
+        assert chart.check_unique_x_position()[0] == []
+
+
+def test_ancestor_width_cache_invalidation():
+    chart = AncestorChart(instance_container=get_gedcom_instance_container(
+        os.path.join(os.path.dirname(__file__), 'autogenerated.ged')))
+    chart.set_chart_configuration({'root_individuals': [
+        {'individual_id': '@I450@', 'generations': 8},
+        ]})
+    chart.update_chart()
+    ancestor_width_cache = chart._instances.ancestor_width_cache
+
+    def get_ranges():
+        return {
+            (gr_individual.g_id, g_id): gr_individual.get_ancestor_range(gr_family)
+            for gr_individual in chart.gr_individuals
+            for g_id, (_, _, gr_family, _) in gr_individual.get_position_dict().items()}
+
+    get_ranges()
+    for gr_family in list(chart.gr_families)[:10]:
+        chart._flip_family(gr_family)
+        ancestor_width_cache.reset_statistics()
+        ranges = get_ranges()
+        # only the entries of the moved blocks have been recalculated
+        assert ancestor_width_cache.hits > 0
+        ancestor_width_cache.clear()
+        assert ranges == get_ranges()
+
+
+def test_descendant_range_cache():
+    chart = DescendantChart(instance_container=get_gedcom_instance_container(
+        os.path.join(os.path.dirname(__file__), 'autogenerated.ged')))
+    chart.set_positioning({'unique_graphical_representation': False})
+    chart.set_chart_configuration({'root_individuals': [
+        {'individual_id': '@I2@', 'generations': 6},
+        ]})
+    chart.update_chart()
+    descendant_range_cache = chart._instances.descendant_range_cache
+    assert descendant_range_cache.hits > 0
+
+    def get_ranges():
+        return {
+            (gr_individual.g_id, g_id): gr_individual.get_descendant_range(gr_family)
+            for gr_individual in chart.gr_individuals
+            for g_id, (_, _, gr_family, is_parent) in gr_individual.get_position_dict().items() if is_parent}
+
+    # the cached ranges are the same as the recalculated ones
+    ranges = get_ranges()
+    descendant_range_cache.clear()
+    assert ranges == get_ranges()
+
+
+def test_connection_adjacency():
+    chart = DescendantChart(instance_container=get_gedcom_instance_container(
+        os.path.join(os.path.dirname(__file__), 'autogenerated.ged')))
+    chart.set_chart_configuration({'root_individuals': [
+        {'individual_id': '@I2@', 'generations': 4},
+        ]})
+    chart.update_chart()
+    instances = chart._instances
+
+    def get_neighbours():
+        return {
+            gr_individual.g_id: (
+                [gr_family.g_id for gr_family in gr_individual.visible_marriages],
+                [gr_family.g_id for gr_family in gr_individual.connected_parent_families])
+            for gr_individual in chart.gr_individuals}
+
+    # the lists are built once and shared between the accesses
+    gr_individual = chart.gr_individuals[0]
+    assert gr_individual.visible_marriages is gr_individual.visible_marriages
+    neighbours = get_neighbours()
+    assert any(visible_marriages for visible_marriages, _ in neighbours.values())
+    assert any(parent_families for _, parent_families in neighbours.values())
+    for visible_marriages, _ in neighbours.values():
+        ordinal_values = [instances[('f', g_id[1])].marriage['ordinal_value'] for g_id in visible_marriages]
+        assert ordinal_values == sorted(ordinal_values)
+
+    # the rebuilt lists are the same
+    instances.adjacency.clear()
+    assert neighbours == get_neighbours()
+
+    # adding a connection updates the lists
+    gr_individual = [gr_individual for gr_individual in chart.gr_individuals if gr_individual.visible_marriages][0]
+    gr_family = gr_individual.visible_marriages[0]
+    gr_other = [other for other in chart.gr_individuals if gr_family not in other.connected_parent_families][0]
+    gr_family.add_visible_children(gr_other)
+    assert gr_family in gr_other.connected_parent_families
+
+
+def test_position_table():
+    chart = AncestorChart(instance_container=get_gedcom_instance_container(
+        os.path.join(os.path.dirname(__file__), 'autogenerated.ged')))
+    chart.set_positioning({'compress': True})
+    chart.set_chart_configuration({'root_individuals': [
+        {'individual_id': '@I25@', 'generations': 4},
+        ]})
+    chart.update_chart()
+    position_table = chart._instances.position_table
+    x_indices = []
+    for gr_individual in chart.gr_individuals:
+        positions = gr_individual.get_position_dict()
+        ordinal_values = [position[0] for position in positions.values()]
+        assert ordinal_values == sorted(ordinal_values)
+        assert positions.get_x_indices() == [position[1] for position in positions.values()]
+        x_indices += positions.get_x_indices()
+    assert len(position_table) == len(x_indices)
+    assert position_table.get_x_index_range() == (min(x_indices), max(x_indices))
+    assert (chart.min_x_index, chart.max_x_index) == (min(x_indices), max(x_indices) + 1)
+
+    # moving an individual shifts its slots in the table
+    gr_individual = chart.gr_individuals[0]
+    g_id, (ov, x_index, gr_family, is_parent) = list(gr_individual.get_position_dict().items())[0]
+    chart._move_single_individual(gr_individual, gr_family, 3)
+    assert gr_individual.get_position_dict()[g_id] == (ov, x_index + 3, gr_family, is_parent)
+
+    chart.clear_graphical_representations()
+    assert len(position_table) == 0
+
+
+def test_layout_snapshot(tmp_path):
+    from life_line_chart.LayoutSnapshot import get_layout_filename
+    filename = os.path.join(os.path.dirname(__file__), 'autogenerated.ged')
+    layout_cache_dir = str(tmp_path / 'layouts')
+
+    def get_layout(chart_class, positioning, generations):
+        chart = chart_class(instance_container=get_gedcom_instance_container(filename), positioning=positioning)
+        chart.set_chart_configuration({'root_individuals': [
+            {'individual_id': '@I2@' if chart_class == DescendantChart else '@I25@', 'generations': generations},
+            ]})
+        chart.update_chart(layout_cache_dir=layout_cache_dir)
+        return chart, (
+            [(gr_individual.g_id, list(gr_individual.get_position_dict().items()), gr_individual.items)
+             for gr_individual in chart.gr_individuals],
+            [(gr_family.g_id, gr_family.visible_children) for gr_family in chart.gr_families],
+            chart.additional_graphical_items)
+
+    for chart_class, positioning in ((AncestorChart, {'compress': True}), (DescendantChart, {})):
+        # the first run calculates and saves the layout, the second one restores it
+        chart, layout = get_layout(chart_class, positioning, 4)
+        layout_filename = get_layout_filename(chart, layout_cache_dir)
+        assert os.path.isfile(layout_filename)
+        _, restored_layout = get_layout(chart_class, positioning, 4)
+        assert repr(layout) == repr(restored_layout)
+
+        # other settings have another snapshot
+        chart, _ = get_layout(chart_class, positioning, 3)
+        assert get_layout_filename(chart, layout_cache_dir) != layout_filename
+
+
+def test_layout_snapshot_of_changed_data(tmp_path):
+    from life_line_chart.LayoutSnapshot import get_layout_filename, get_layout_key
+    filename = str(tmp_path / 'autogenerated.ged')
+    shutil.copy(autogenerated_filename, filename)
+    layout_cache_dir = str(tmp_path / 'layouts')
+    positioning = {'compress': True}
+    chart = get_chart(AncestorChart, [('@I25@', 4)], positioning, filename, layout_cache_dir=layout_cache_dir)
+    layout_filename = get_layout_filename(chart, layout_cache_dir)
+    removed_individual_id = chart.gr_individuals[-1].individual_id
+
+    # the individual is removed from the file, but the old snapshot is stored under the new key
+    with open(filename, 'r', encoding='utf-8-sig') as f:
+        content = f.read()
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write(content.replace('0 {} INDI'.format(removed_individual_id), '0 {} NOTE'.format(removed_individual_id)))
+    chart = AncestorChart(instance_container=get_gedcom_instance_container(filename), positioning=positioning)
+    chart.set_chart_configuration({'root_individuals': [
+        {'individual_id': '@I25@', 'generations': 4},
+        ]})
+    with open(layout_filename, 'rb') as f:
+        version, _, data = pickle.load(f)
+    with open(get_layout_filename(chart, layout_cache_dir), 'wb') as f:
+        pickle.dump((version, get_layout_key(chart), data), f)
+
+    # the snapshot is not restored, the layout is calculated
+    chart.update_chart(layout_cache_dir=layout_cache_dir)
+    assert removed_individual_id not in [gr_individual.individual_id for gr_individual in chart.gr_individuals]
+    assert get_positions(chart) == get_positions(get_chart(AncestorChart, [('@I25@', 4)], positioning, filename))
+
+
+def test_deep_pedigree(write_pedigree):
+    # more generations than the recursion limit allows, the father of individual n is n+1
+    generations = 1200
+    birth_date = datetime.date(1900, 1, 1)
+    filename = write_pedigree(
+        [(index + 1 if index < generations - 1 else None, None) for index in range(generations)],
+        [(birth_date - datetime.timedelta(days=10*index)).strftime('%d %b %Y').upper() for index in range(generations)])
+
+    chart = get_chart(AncestorChart, [('@I0@', -1)], {'compress': True, 'flip_to_optimize': True}, filename)
+    assert len(chart.gr_individuals) == generations
+
+    for chart_layout in ['enclosing', 'cactus']:
+        chart = get_chart(
+            DescendantChart, [('@I{}@'.format(generations - 1), -1)], {'chart_layout': chart_layout}, filename)
+        assert len(chart.gr_individuals) == generations
+        assert chart.gr_individuals[0].get_number_of_descendants() == generations - 1
+
+
+def test_expand_generations_incrementally():
+    for chart_class, positioning, individual_id in (
+            (AncestorChart, {}, '@I450@'),
+            (DescendantChart, {}, '@I2@'),
+            (DescendantChart, {'chart_layout': 'cactus'}, '@I2@')):
+        chart = get_chart(chart_class, [(individual_id, 3)], dict(positioning, expand_incrementally=True))
+        gr_individuals = list(chart.gr_individuals)
+        chart.set_chart_configuration({'root_individuals': [
+            {'individual_id': individual_id, 'generations': 5},
+            ]})
+        chart.update_chart()
+        # the graphical representations have been kept
+        assert all(a is b for a, b in zip(chart.gr_individuals, gr_individuals))
+        assert len(chart.gr_individuals) > len(gr_individuals)
+        assert get_positions(chart) == get_positions(get_chart(chart_class, [(individual_id, 5)], positioning))
+
+    # compressed charts are only compressed where ancestors have been added
+    chart = get_chart(AncestorChart, [('@I1350@', 6)], {'compress': True, 'expand_incrementally': True})
+    chart.set_chart_configuration({'root_individuals': [
+        {'individual_id': '@I1350@', 'generations': 12},
+        ]})
+    chart.update_chart()
+    full_chart = get_chart(AncestorChart, [('@I1350@', 12)], {'compress': True})
+    assert len(chart.gr_individuals) == len(full_chart.gr_individuals)
+    collisions, _, _ = chart._check_compressed_x_position(False, {})
+    assert collisions == []
+
+
+def test_warm_start_compression():
+    chart = get_chart(
+        AncestorChart, [('@I1350@', 12)], {'compress': True, 'flip_to_optimize': True, 'warm_start_compression': True})
+    positions = get_positions(chart)
+
+    # the same data: every block is moved to its previous position
+    moved_blocks = []
+    move_by_previous_compression_offset = chart._move_by_previous_compression_offset
+
+    def record_move(gr_individual, gr_family, x_index_offset):
+        moved = move_by_previous_compression_offset(gr_individual, gr_family, x_index_offset)
+        moved_blocks.append(moved)
+        return moved
+    chart._move_by_previous_compression_offset = record_move
+    chart.update_chart(rebuild_all=True)
+    assert get_positions(chart) == positions
+    assert moved_blocks and all(moved_blocks)
+
+    # changed data: the chart is still valid
+    hidden_individual_id = chart.gr_individuals[len(chart.gr_individuals) // 3].individual_id
+    chart.update_chart(filter_lambda=lambda individual: individual.individual_id == hidden_individual_id, rebuild_all=True)
+    assert hidden_individual_id not in [gr_individual.individual_id for gr_individual in chart.gr_individuals]
+    collisions, _, _ = chart._check_compressed_x_position(False, {})
+    assert collisions == []
+
+
+@pytest.mark.skipif(not is_parallel_compression_available(), reason="worker processes cannot inherit the chart")
+def test_parallel_compression(write_pedigree):
+    # full pedigree without pedigree collapse, the parents of individual n are 2n+1 and 2n+2
+    number_of_individuals = 2**7 - 1
+    birth_years = [1990 - 28 * ((index + 1).bit_length() - 1) - index % 7 for index in range(number_of_individuals)]
+    filename = write_pedigree(
+        [(2 * index + 1, 2 * index + 2) if 2 * index + 2 < number_of_individuals else (None, None)
+         for index in range(number_of_individuals)],
+        [str(birth_year) for birth_year in birth_years],
+        [str(birth_year + 50 + index % 30) for index, birth_year in enumerate(birth_years)])
+
+    # the branches of the great-grandparents are independent
+    chart = get_chart(AncestorChart, [('@I0@', -1)], {'compress': False}, filename)
+    gr_root_family = chart._instances[('f', '@F0@')].graphical_representations[0]
+    assert len(chart._get_independent_branches(gr_root_family, 4)) == 4
+
+    # the branches are compressed in worker processes, the result is the same
+    positions = get_positions(get_chart(AncestorChart, [('@I0@', -1)], {'compress': True}, filename))
+    chart = get_chart(AncestorChart, [('@I0@', -1)], {'compress': True, 'compression_processes': 2}, filename)
+    compressed_branch_families = []
+    compress_branches_in_parallel = chart._compress_branches_in_parallel
+
+    def record_compression(gr_family):
+        branch_families = compress_branches_in_parallel(gr_family)
+        compressed_branch_families.extend(branch_families)
+        return branch_families
+    chart._compress_branches_in_parallel = record_compression
+    chart.update_chart(rebuild_all=True)
+    assert len(compressed_branch_families) >= 2
+    assert get_positions(chart) == positions
 
 
 # import life_line_chart, logging